@@ -2,11 +2,12 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from fastapi.responses import FileResponse
 import os
 import json
+import asyncio
 from datetime import datetime
 from typing import Optional
 import uuid
 
-from app.services.orchestrator_v2 import process_job
+from app.services.orchestrator_v2 import submit_job
 from app.utils import create_job_folder, save_file_locally, generate_job_id
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
@@ -74,14 +75,16 @@ async def create_job(
     # Save original file
     file_path = save_file_locally(job_id, file)
 
+    # Jobs run on the persistent V2 worker pool, off the event loop
+    future = submit_job(job_id, job_dir)
+
     if process_mode == "sync":
-        # Process synchronously
-        result = process_job(job_id, job_dir)
+        # Wait for the result
+        result = await asyncio.wrap_future(future)
         return JobResponse(job_id=job_id, status="done", result=result)
     else:
-        # For async, we'd enqueue to RQ, but for now, process sync
-        result = process_job(job_id, job_dir)
-        return JobResponse(job_id=job_id, status="done", result=result)
+        # Return immediately; poll GET /jobs/{job_id} for result.json
+        return JobResponse(job_id=job_id, status="processing", result=None)
 
 @router.get("/jobs/{job_id}")
 async def get_job_status(job_id: str):
@@ -5,7 +5,7 @@ from typing import List
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.utils import get_all_jobs
+from app.utils import get_all_jobs, write_json
 
 class PIIEntity(BaseModel):
     type: str
@@ -85,8 +85,7 @@ async def submit_correction(job_id: str, region_id: str, correction: ReviewCorre
         raise HTTPException(status_code=404, detail="Region not found")
 
     # Save updated result
-    with open(result_path, 'w') as f:
-        json.dump(result, f, indent=2)
+    write_json(result_path, result)
 
     # Append to audit log
     audit_entry = {
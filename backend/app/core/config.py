@@ -60,6 +60,9 @@ class Settings(BaseSettings):
     # Worker settings
     WORKER_CONCURRENCY: int = 2
     JOB_TIMEOUT_SECONDS: int = 600  # 10 minutes
+    # Run jobs inside long-lived preloaded workers instead of a forked work
+    # horse per job (see app.services.worker.run_worker)
+    WORKER_PRELOAD: bool = False
 
     # Environment
     ENVIRONMENT: str = "development"
@@ -104,9 +104,10 @@ class KIngestPipeline:
         model_path = layout_config.get('model_path', 'models/layout/doclayout_yolo_base.pt')
         device = layout_config.get('device', 'cpu')
         fp16 = layout_config.get('fp16', False)
+        engine_dir = layout_config.get('tensorrt_engine_dir')
         
         try:
-            self.model = layout_detection.load_model(model_path, device, fp16)
+            self.model = layout_detection.load_model(model_path, device, fp16, engine_dir)
             self.model_loaded = True
             print(f"Loaded DocLayout-YOLO model from {model_path}")
         except Exception as e:
@@ -12,22 +12,8 @@ from app.schemas import Region, BoundingBox
 YOLO = None
 
 
-def load_model(model_path: str, device: str = "cpu", fp16: bool = False):
-    """
-    Load DocLayout-YOLO model
-    
-    Args:
-        model_path: Path to model weights (.pt file)
-        device: Device to run on ("cpu" or "cuda")
-        fp16: Use half-precision (FP16) for faster inference
-    
-    Returns:
-        Loaded YOLO model
-    
-    Raises:
-        ImportError: If doclayout_yolo is not installed
-        FileNotFoundError: If model file doesn't exist
-    """
+def _import_yolo():
+    """Resolve the YOLO class, preferring doclayout_yolo over ultralytics"""
     global YOLO
     
     # Import YOLO dynamically - try doclayout_yolo first, then ultralytics
@@ -46,6 +32,101 @@ def load_model(model_path: str, device: str = "cpu", fp16: bool = False):
                     "Neither doclayout_yolo nor ultralytics package found. "
                     "Install with: pip install doclayout_yolo"
                 )
+    return YOLO
+
+
+def tensorrt_engine_path(model_path: str, engine_dir: str, fp16: bool = False) -> Optional[str]:
+    """
+    Path of the TensorRT engine for model_path on the current GPU
+    
+    Engines are specific to the GPU architecture, so the file name carries
+    the CUDA compute capability. Returns None when CUDA is unavailable.
+    """
+    try:
+        import torch
+        if not torch.cuda.is_available():
+            return None
+        major, minor = torch.cuda.get_device_capability()
+    except ImportError:
+        return None
+    
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    precision = "fp16" if fp16 else "fp32"
+    return os.path.join(engine_dir, f"{stem}_sm{major}{minor}_{precision}.engine")
+
+
+def export_tensorrt_engine(
+    model_path: str,
+    engine_dir: str,
+    inference_size: int = 1024,
+    fp16: bool = True
+) -> str:
+    """
+    Build a TensorRT engine for the layout model on the current GPU
+    
+    Args:
+        model_path: Path to model weights (.pt file)
+        engine_dir: Directory for cached engines
+        inference_size: Input size the engine is built for
+        fp16: Build an FP16 engine
+    
+    Returns:
+        Path to the cached engine
+    
+    Raises:
+        RuntimeError: If CUDA is unavailable or export fails
+    """
+    engine_path = tensorrt_engine_path(model_path, engine_dir, fp16)
+    if engine_path is None:
+        raise RuntimeError("TensorRT export requires a CUDA device")
+    
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    
+    model = _import_yolo()(model_path)
+    exported = model.export(format="engine", imgsz=inference_size, half=fp16, device=0)
+    
+    os.makedirs(engine_dir, exist_ok=True)
+    os.replace(str(exported), engine_path)
+    return engine_path
+
+
+def load_model(
+    model_path: str,
+    device: str = "cpu",
+    fp16: bool = False,
+    engine_dir: Optional[str] = None
+):
+    """
+    Load DocLayout-YOLO model
+    
+    Args:
+        model_path: Path to model weights (.pt file)
+        device: Device to run on ("cpu" or "cuda")
+        fp16: Use half-precision (FP16) for faster inference
+        engine_dir: Directory of TensorRT engines built by
+            export_tensorrt_engine (optional). On CUDA, a matching engine is
+            used instead of the PyTorch weights when present.
+    
+    Returns:
+        Loaded YOLO model
+    
+    Raises:
+        ImportError: If doclayout_yolo is not installed
+        FileNotFoundError: If model file doesn't exist
+    """
+    YOLO = _import_yolo()
+    
+    # Prefer a prebuilt TensorRT engine for this GPU
+    if engine_dir and device == "cuda":
+        engine_path = tensorrt_engine_path(model_path, engine_dir, fp16)
+        if engine_path and os.path.exists(engine_path):
+            try:
+                model = YOLO(engine_path, task="detect")
+                print(f"Using TensorRT engine {engine_path}")
+                return model
+            except Exception as e:
+                print(f"Warning: Failed to load TensorRT engine, using PyTorch weights: {e}")
     
     # Check model file exists
     if not os.path.exists(model_path):
@@ -114,15 +195,22 @@ def detect_layout(
             boxes = result.boxes
             
             if boxes is not None and len(boxes) > 0:
-                for i, box in enumerate(boxes):
+                # Filter on the device, then copy each small tensor to the
+                # host once instead of syncing per box and field
+                keep = boxes.conf >= conf_threshold
+                xyxy = boxes.xyxy[keep].cpu().numpy()
+                confidences = boxes.conf[keep].cpu().numpy()
+                class_ids = boxes.cls[keep].cpu().numpy()
+                
+                for i in range(len(xyxy)):
                     # Extract box coordinates (xyxy format)
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+                    x1, y1, x2, y2 = xyxy[i]
                     
                     # Extract confidence
-                    confidence = float(box.conf[0].cpu().numpy())
+                    confidence = float(confidences[i])
                     
                     # Extract class
-                    class_id = int(box.cls[0].cpu().numpy())
+                    class_id = int(class_ids[i])
                     class_name = class_names.get(class_id, f"Unknown_{class_id}")
                     
                     # Create region
@@ -6,6 +6,7 @@ Language understanding and normalization with IndicBERT
 import os
 import yaml
 import time
+import threading
 from typing import Dict, List, Optional, Any
 
 from .language_detector import LanguageDetector
@@ -47,6 +48,7 @@ class KLinguaPipeline:
         self.confidence_scorer = None
         
         self.initialized = False
+        self._init_lock = threading.Lock()
     
     def _load_config(self, config_path: str) -> dict:
         """Load configuration from YAML file"""
@@ -113,53 +115,58 @@ class KLinguaPipeline:
         if self.initialized:
             return
         
-        print("Initializing K-Lingua v2.0 pipeline...")
-        
-        # Initialize language detector
-        lang_config = self.config.get('language_detection', {})
-        indicbert_config = self.config.get('models', {}).get('indicbert', {})
-        self.language_detector = LanguageDetector(
-            model_name=indicbert_config.get('model_name', 'models/lingua/indicbert'),
-            device=indicbert_config.get('device', 'cpu'),
-            confidence_threshold=lang_config.get('primary_threshold', 0.60)
-        )
+        # Concurrent callers (e.g. a thread pool over regions) load models once
+        with self._init_lock:
+            if self.initialized:
+                return
+            
+            print("Initializing K-Lingua v2.0 pipeline...")
+        
+            # Initialize language detector
+            lang_config = self.config.get('language_detection', {})
+            indicbert_config = self.config.get('models', {}).get('indicbert', {})
+            self.language_detector = LanguageDetector(
+                model_name=indicbert_config.get('model_name', 'models/lingua/indicbert'),
+                device=indicbert_config.get('device', 'cpu'),
+                confidence_threshold=lang_config.get('primary_threshold', 0.60)
+            )
         
-        # Initialize error corrector
-        error_config = self.config.get('error_correction', {})
-        self.error_corrector = ErrorCorrector(
-            mlm_model_name=indicbert_config.get('model_name', 'models/lingua/indicbert'), # Assuming mlm_model_name defaults to the same as model_name if not specified
-            device=indicbert_config.get('device', 'cpu'),
-            confidence_threshold=error_config.get('confidence_threshold', 0.75),
-            mlm_prediction_threshold=error_config.get('mlm_prediction_threshold', 0.85),
-            dictionaries_dir=error_config.get('dictionary_path', 'dictionaries')
-        )
+            # Initialize error corrector
+            error_config = self.config.get('error_correction', {})
+            self.error_corrector = ErrorCorrector(
+                mlm_model_name=indicbert_config.get('model_name', 'models/lingua/indicbert'), # Assuming mlm_model_name defaults to the same as model_name if not specified
+                device=indicbert_config.get('device', 'cpu'),
+                confidence_threshold=error_config.get('confidence_threshold', 0.75),
+                mlm_prediction_threshold=error_config.get('mlm_prediction_threshold', 0.85),
+                dictionaries_dir=error_config.get('dictionary_path', 'dictionaries')
+            )
         
-        # Initialize transliterator
-        self.transliterator = Transliterator(
-            model_name=self.config.get('models', {}).get('transliterator', {}).get('model_name', 'ai4bharat/IndicXlit'),
-            preserve_bilingual=self.config.get('transliteration', {}).get('preserve_bilingual', True)
-        )
+            # Initialize transliterator
+            self.transliterator = Transliterator(
+                model_name=self.config.get('models', {}).get('transliterator', {}).get('model_name', 'ai4bharat/IndicXlit'),
+                preserve_bilingual=self.config.get('transliteration', {}).get('preserve_bilingual', True)
+            )
         
-        # Initialize normalizer (will be created per-domain)
-        self.normalizer = None
+            # Initialize normalizer (will be created per-domain)
+            self.normalizer = None
         
-        # Initialize code-mixer handler
-        code_mix_config = self.config.get('code_mixing', {})
-        self.code_mixer_handler = CodeMixerHandler(
-            preserve_original=code_mix_config.get('preserve_original', True)
-        )
+            # Initialize code-mixer handler
+            code_mix_config = self.config.get('code_mixing', {})
+            self.code_mixer_handler = CodeMixerHandler(
+                preserve_original=code_mix_config.get('preserve_original', True)
+            )
         
-        # Initialize consistency checker
-        self.consistency_checker = ConsistencyChecker()
+            # Initialize consistency checker
+            self.consistency_checker = ConsistencyChecker()
         
-        # Initialize confidence scorer
-        scoring_config = self.config.get('confidence_scoring', {})
-        self.confidence_scorer = ConfidenceScorer(
-            weights=scoring_config.get('weights')
-        )
+            # Initialize confidence scorer
+            scoring_config = self.config.get('confidence_scoring', {})
+            self.confidence_scorer = ConfidenceScorer(
+                weights=scoring_config.get('weights')
+            )
         
-        self.initialized = True
-        print("K-Lingua v2.0 pipeline initialized successfully")
+            self.initialized = True
+            print("K-Lingua v2.0 pipeline initialized successfully")
     
     def process_text(
         self,
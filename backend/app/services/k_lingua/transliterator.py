@@ -3,6 +3,7 @@ K-Lingua v2.0 - Transliterator
 Script conversion using Aksharantar/IndicXlit
 """
 
+import threading
 from typing import Dict, Optional
 
 
@@ -26,29 +27,37 @@ class Transliterator:
         self.model_name = model_name
         self.preserve_bilingual = preserve_bilingual
         
-        # Model will be loaded lazily
+        # Model will be loaded lazily, at most once
         self.model = None
         self.tokenizer = None
+        self._load_attempted = False
+        self._load_lock = threading.Lock()
         
         # Transliteration mappings (simplified)
         self.devanagari_to_roman = self._get_devanagari_mappings()
     
     def _load_model(self):
-        """Load IndicXlit model lazily"""
-        if self.model is not None:
+        """Load IndicXlit model lazily (attempted once, not on every call)"""
+        if self._load_attempted:
             return
         
-        try:
-            # IndicXlit model loading
-            # Note: This is a placeholder - actual implementation would use
-            # the specific IndicXlit model from AI4Bharat
-            print(f"Loading IndicXlit model: {self.model_name}")
-            # self.model = load_indicxlit_model(self.model_name)
-            print("IndicXlit model loaded successfully")
+        with self._load_lock:
+            if self._load_attempted:
+                return
             
-        except Exception as e:
-            print(f"Failed to load IndicXlit model: {e}")
-            print("Using rule-based transliteration")
+            try:
+                # IndicXlit model loading
+                # Note: This is a placeholder - actual implementation would use
+                # the specific IndicXlit model from AI4Bharat
+                print(f"Loading IndicXlit model: {self.model_name}")
+                # self.model = load_indicxlit_model(self.model_name)
+                print("IndicXlit model loaded successfully")
+                
+            except Exception as e:
+                print(f"Failed to load IndicXlit model: {e}")
+                print("Using rule-based transliteration")
+            
+            self._load_attempted = True
     
     def transliterate(
         self,
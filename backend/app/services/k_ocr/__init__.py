@@ -7,7 +7,7 @@ import os
 import yaml
 import time
 import numpy as np
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 
 from .text_classifier import classify_text_type
 from .trocr_engine import TrOCREngine
@@ -112,32 +112,42 @@ class MultiTrackOCRPipeline:
         device = printed_config.get('device', 'cpu')
         fp16 = printed_config.get('fp16', False)
         
-        self.trocr_engine = TrOCREngine(device=device, fp16=fp16)
+        decoding_config = self.config.get('decoding', {})
         
-        # Load models
-        try:
-            self.trocr_engine.load_printed_model(
-                model_name=printed_config.get('model_name', 'microsoft/trocr-base-printed'),
-                model_path=printed_config.get('model_path')
-            )
-        except Exception as e:
-            print(f"Warning: Failed to load printed model: {e}")
+        self.trocr_engine = TrOCREngine(
+            device=device,
+            fp16=fp16,
+            bf16=printed_config.get('bf16', False),
+            compile_encoder=printed_config.get('compile_encoder', False),
+            num_beams=decoding_config.get('num_beams', 4),
+            early_stop_confidence=decoding_config.get('early_stop_confidence'),
+            model_cache_mb=self.config.get('performance', {}).get('model_cache_mb')
+        )
         
-        try:
-            self.trocr_engine.load_handwritten_model(
-                model_name=handwritten_config.get('model_name', 'microsoft/trocr-large-handwritten'),
-                model_path=handwritten_config.get('model_path')
-            )
-        except Exception as e:
-            print(f"Warning: Failed to load handwritten model: {e}")
+        # Register models; each is loaded on first use so single-text-type
+        # documents never page in the other model
+        self.trocr_engine.register_model(
+            'printed',
+            model_name=printed_config.get('model_name', 'microsoft/trocr-base-printed'),
+            model_path=printed_config.get('model_path')
+        )
+        self.trocr_engine.register_model(
+            'handwritten',
+            model_name=handwritten_config.get('model_name', 'microsoft/trocr-large-handwritten'),
+            model_path=handwritten_config.get('model_path')
+        )
         
         # Initialize multi-track OCR
         multi_track_config = self.config.get('multi_track', {})
         self.multi_track_ocr = MultiTrackOCR(
             trocr_engine=self.trocr_engine,
             confidence_threshold=multi_track_config.get('confidence_threshold', 0.70),
+            text_type_detection_threshold=multi_track_config.get('text_type_detection_threshold', 0.75),
+            certain_type_threshold=multi_track_config.get('certain_type_threshold', 0.95),
             fallback_enabled=multi_track_config.get('fallback_enabled', True),
-            log_switches=multi_track_config.get('log_model_switches', True)
+            log_switches=multi_track_config.get('log_model_switches', True),
+            cache_size=multi_track_config.get('cache_size', 512),
+            max_workers=multi_track_config.get('max_workers', 1)
         )
         
         # Initialize post-processor
@@ -191,6 +201,59 @@ class MultiTrackOCRPipeline:
         # Stage 1-4: Multi-track OCR (handles text classification internally)
         ocr_result = self.multi_track_ocr.process_region(image)
         
+        return self._finalize_region(ocr_result, field_type, region_id, start_time)
+    
+    def process_region_batch(
+        self,
+        images: List[np.ndarray],
+        region_ids: Optional[List[str]] = None,
+        field_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several regions in one call
+        
+        OCR for all regions goes through MultiTrackOCR.process_regions, which
+        prepares the next region while the current one is in the model (or
+        runs regions concurrently when multi_track.max_workers > 1).
+        
+        Args:
+            images: List of RGB uint8 numpy arrays
+            region_ids: Optional region IDs, one per image
+            field_type: Optional field type for pattern validation
+        
+        Returns:
+            List of result dicts (same format as process_region), in input order
+        """
+        if not images:
+            return []
+        
+        # Initialize components if needed
+        self._initialize_components()
+        
+        start_time = time.time()
+        
+        if region_ids is None:
+            base = int(start_time * 1000)
+            region_ids = [f"region_{base}_{i}" for i in range(len(images))]
+        
+        print(f"Processing {len(images)} region(s) in batch...")
+        
+        # Stage 1-4: Multi-track OCR for all regions
+        ocr_results = self.multi_track_ocr.process_regions(images)
+        
+        return [
+            self._finalize_region(ocr_result, field_type, region_id, start_time)
+            for ocr_result, region_id in zip(ocr_results, region_ids)
+        ]
+    
+    def _finalize_region(
+        self,
+        ocr_result: Dict[str, Any],
+        field_type: Optional[str],
+        region_id: str,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Post-process and score a multi-track OCR result (stages 5-6)"""
         # Stage 5: Post-processing
         post_proc_result = self.post_processor.process(
             text=ocr_result['text'],
@@ -4,7 +4,11 @@ Coordinates model selection, fallback logic, and intelligent routing
 """
 
 import time
-from typing import Tuple, Optional, Dict, Any
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Optional, Dict, Any, List
 import numpy as np
 
 from .text_classifier import classify_text_type
@@ -21,9 +25,12 @@ class MultiTrackOCR:
         trocr_engine: TrOCREngine,
         confidence_threshold: float = 0.70,
         text_type_detection_threshold: float = 0.75,
+        certain_type_threshold: float = 0.95,
         fallback_enabled: bool = True,
         model_priority: str = "printed",
-        log_switches: bool = True
+        log_switches: bool = True,
+        cache_size: int = 512,
+        max_workers: int = 1
     ):
         """
         Initialize multi-track OCR
@@ -32,16 +39,29 @@ class MultiTrackOCR:
             trocr_engine: TrOCR engine instance
             confidence_threshold: Threshold for attempting fallback
             text_type_detection_threshold: Threshold for committing to one model
+            certain_type_threshold: Classification confidence above which the
+                alternate model is never tried
             fallback_enabled: Enable fallback to alternate model
             model_priority: Which model to try first if uncertain ("printed" or "handwritten")
             log_switches: Log model switch events
+            cache_size: Max cached inference results (0 disables the cache)
+            max_workers: Regions processed concurrently by process_regions
         """
         self.trocr_engine = trocr_engine
         self.confidence_threshold = confidence_threshold
         self.text_type_detection_threshold = text_type_detection_threshold
+        self.certain_type_threshold = certain_type_threshold
         self.fallback_enabled = fallback_enabled
         self.model_priority = model_priority
         self.log_switches = log_switches
+        self.max_workers = max_workers
+        
+        # LRU cache of inference results keyed by (image hash, model type)
+        self.cache_size = cache_size
+        self._inference_cache = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_lock = threading.Lock()
     
     def process_region(
         self,
@@ -58,6 +78,77 @@ class MultiTrackOCR:
         Returns:
             Dict with OCR results and metadata
         """
+        prepared = self._prepare_region(image, classifier_config)
+        return self._run_prepared_region(prepared)
+    
+    def process_regions(
+        self,
+        images: List[np.ndarray],
+        classifier_config: Optional[Dict] = None,
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Process multiple regions
+        
+        With a single worker, regions run in order and the next region is
+        prepared (classification, hashing, preprocessing) on a background
+        thread while the current one runs through the model. With more
+        workers, whole regions run concurrently on a thread pool sharing
+        this instance's models.
+        
+        Args:
+            images: List of RGB uint8 numpy arrays
+            classifier_config: Text classifier configuration
+            max_workers: Concurrent regions (defaults to self.max_workers)
+        
+        Returns:
+            List of result dicts (same format as process_region), in input order
+        """
+        if not images:
+            return []
+        
+        if max_workers is None:
+            max_workers = self.max_workers
+        
+        if max_workers > 1 and len(images) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(images))) as pool:
+                return list(pool.map(
+                    lambda image: self.process_region(image, classifier_config),
+                    images
+                ))
+        
+        results = []
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = prefetcher.submit(self._prepare_region, images[0], classifier_config)
+            
+            for index in range(len(images)):
+                prepared = pending.result()
+                
+                if index + 1 < len(images):
+                    pending = prefetcher.submit(
+                        self._prepare_region, images[index + 1], classifier_config
+                    )
+                
+                results.append(self._run_prepared_region(prepared))
+        
+        return results
+    
+    def _prepare_region(
+        self,
+        image: np.ndarray,
+        classifier_config: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the CPU-side stages for a region: text type classification,
+        primary model selection and input preprocessing
+        
+        Args:
+            image: RGB uint8 numpy array
+            classifier_config: Text classifier configuration
+        
+        Returns:
+            Dict consumed by _run_prepared_region
+        """
         start_time = time.time()
         
         # Stage 1: Text type classification
@@ -66,14 +157,59 @@ class MultiTrackOCR:
         
         text_type, type_confidence = classify_text_type(image, **classifier_config)
         
+        # Hash once, shared by primary and fallback cache lookups
+        image_hash = self._image_hash(image)
+        
         # Stage 2: Select primary model
         primary_model = self._select_primary_model(text_type, type_confidence)
         
+        # Preprocess for the primary model unless the result is cached;
+        # failures are left for run_inference to report
+        pixel_values = None
+        if (image_hash, primary_model) not in self._inference_cache:
+            try:
+                pixel_values = self.trocr_engine.preprocess(image, primary_model)
+            except Exception:
+                pixel_values = None
+        
+        return {
+            'image': image,
+            'image_hash': image_hash,
+            'text_type': text_type,
+            'type_confidence': type_confidence,
+            'primary_model': primary_model,
+            'pixel_values': pixel_values,
+            'start_time': start_time
+        }
+    
+    def _run_prepared_region(self, prepared: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run model inference and fallback for a prepared region
+        
+        Args:
+            prepared: Output of _prepare_region
+        
+        Returns:
+            Dict with OCR results and metadata
+        """
+        image = prepared['image']
+        image_hash = prepared['image_hash']
+        text_type = prepared['text_type']
+        type_confidence = prepared['type_confidence']
+        primary_model = prepared['primary_model']
+        start_time = prepared['start_time']
+        
+        # Identical encoders: one encoder pass (computed on first cache
+        # miss) feeds both primary and fallback decoders
+        encoder_state = {} if self.fallback_enabled and self.trocr_engine.encoders_shared() else None
+        
         # Stage 3: Run primary model
-        primary_text, primary_conf, primary_tokens = self.trocr_engine.run_inference(
+        primary_text, primary_conf, primary_tokens = self._cached_inference(
             image,
-            model_type=primary_model,
-            return_token_confidences=True
+            image_hash,
+            primary_model,
+            pixel_values=prepared['pixel_values'],
+            encoder_state=encoder_state
         )
         
         # Stage 4: Fallback decision
@@ -82,14 +218,21 @@ class MultiTrackOCR:
         fallback_conf = None
         final_model = primary_model
         
-        if self.fallback_enabled and primary_conf < self.confidence_threshold:
+        # Skip fallback when the classifier is near-certain of the text type
+        type_is_certain = (
+            type_confidence >= self.certain_type_threshold
+            and text_type in ("printed", "handwritten")
+        )
+        
+        if self.fallback_enabled and not type_is_certain and primary_conf < self.confidence_threshold:
             # Try alternate model
             alternate_model = "handwritten" if primary_model == "printed" else "printed"
             
-            fallback_text, fallback_conf, fallback_tokens = self.trocr_engine.run_inference(
+            fallback_text, fallback_conf, fallback_tokens = self._cached_inference(
                 image,
-                model_type=alternate_model,
-                return_token_confidences=True
+                image_hash,
+                alternate_model,
+                encoder_state=encoder_state
             )
             
             # Compare and select better result
@@ -131,6 +274,103 @@ class MultiTrackOCR:
             'processing_time_ms': processing_time
         }
     
+    def _cached_inference(
+        self,
+        image: np.ndarray,
+        image_hash: str,
+        model_type: str,
+        pixel_values=None,
+        encoder_state: Optional[Dict] = None
+    ) -> Tuple[str, float, Optional[List[Dict]]]:
+        """
+        Run TrOCR inference, reusing cached results for identical crops
+        
+        Args:
+            image: RGB uint8 numpy array
+            image_hash: Content hash of image (see _image_hash)
+            model_type: "printed" or "handwritten"
+            pixel_values: Preprocessed input tensor for model_type (optional)
+            encoder_state: Per-region dict holding shared encoder outputs,
+                filled on first use (None when encoders aren't shared)
+        
+        Returns:
+            Tuple of (text, confidence, tokens)
+        """
+        key = (image_hash, model_type)
+        with self._cache_lock:
+            cached = self._inference_cache.get(key)
+            if cached is not None:
+                self._inference_cache.move_to_end(key)
+                self._cache_hits += 1
+                return cached
+            self._cache_misses += 1
+        
+        encoder_outputs = None
+        if encoder_state is not None:
+            if 'outputs' not in encoder_state:
+                try:
+                    encoder_state['outputs'] = self.trocr_engine.encode(image, model_type, pixel_values)
+                except Exception as e:
+                    print(f"Shared encoder pass failed: {e}")
+                    encoder_state['outputs'] = None
+            encoder_outputs = encoder_state['outputs']
+        
+        result = self.trocr_engine.run_inference(
+            image,
+            model_type=model_type,
+            return_token_confidences=True,
+            pixel_values=pixel_values,
+            encoder_outputs=encoder_outputs
+        )
+        
+        # Don't cache failed inference (engine returns 0.0 confidence on error)
+        if self.cache_size > 0 and result[1] > 0.0:
+            with self._cache_lock:
+                self._inference_cache[key] = result
+                if len(self._inference_cache) > self.cache_size:
+                    self._inference_cache.popitem(last=False)
+        
+        return result
+    
+    @staticmethod
+    def _image_hash(image: np.ndarray) -> str:
+        """
+        Compute content hash of image for cache lookups
+        
+        Args:
+            image: numpy array
+        
+        Returns:
+            Hex digest covering shape, dtype and pixel data
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"{image.shape}{image.dtype}".encode())
+        hasher.update(memoryview(np.ascontiguousarray(image)).cast('B'))
+        return hasher.hexdigest()
+    
+    def clear_cache(self):
+        """Clear cached inference results and reset statistics"""
+        with self._cache_lock:
+            self._inference_cache.clear()
+            self._cache_hits = 0
+            self._cache_misses = 0
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get inference cache statistics
+        
+        Returns:
+            Dict with size, capacity, hits, misses and hit rate
+        """
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            'size': len(self._inference_cache),
+            'max_size': self.cache_size,
+            'hits': self._cache_hits,
+            'misses': self._cache_misses,
+            'hit_rate': self._cache_hits / lookups if lookups else 0.0
+        }
+    
     def _select_primary_model(
         self,
         text_type: str,
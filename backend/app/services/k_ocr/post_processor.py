@@ -5,7 +5,34 @@ Handles error correction, Hinglish normalization, and domain-specific correction
 
 import os
 import re
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+
+# Parsed dictionary files shared across PostProcessor instances,
+# keyed by (absolute path, mtime) so edited files are re-read
+_DICTIONARY_CACHE: Dict[Tuple[str, float], FrozenSet[str]] = {}
+
+
+def _read_dictionary(filepath: str) -> FrozenSet[str]:
+    """
+    Read a dictionary file (one term per line), reusing cached parses
+    
+    Args:
+        filepath: Path to dictionary file
+    
+    Returns:
+        Frozenset of lowercased terms
+    """
+    key = (os.path.abspath(filepath), os.path.getmtime(filepath))
+    words = _DICTIONARY_CACHE.get(key)
+    if words is None:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        words = frozenset(
+            line.strip() for line in content.lower().splitlines() if line.strip()
+        )
+        _DICTIONARY_CACHE[key] = words
+    return words
 
 
 class PostProcessor:
@@ -31,10 +58,49 @@ class PostProcessor:
         self.domain_corrections = domain_corrections or {}
         self.hinglish_enabled = hinglish_enabled
         
+        # Compile domain abbreviations into a single alternation
+        self._abbrev_map, self._abbrev_re, self._abbrev_re_ci = self._compile_domain_corrections()
+        
         # Load dictionaries
         self.dictionaries = self._load_dictionaries()
+        
+        # Combined vocabulary for dictionary match scoring
+        self._all_words = frozenset().union(*self.dictionaries.values())
+    
+    def _compile_domain_corrections(
+        self
+    ) -> Tuple[Dict[str, Tuple[str, str]], Optional[re.Pattern], Optional[re.Pattern]]:
+        """
+        Build abbreviation lookup and combined regexes from domain corrections
+        
+        Returns:
+            Tuple of (abbrev_map, pattern, pattern_ci)
+            abbrev_map: lowercased abbreviation -> (expansion, correction label)
+            pattern: Alternation matched against lowercased text
+            pattern_ci: Case-insensitive alternation, for text whose length
+                changes when lowercased
+            Both patterns are None if there are no abbreviations
+        """
+        abbrev_map = {}
+        
+        # Medical first so it takes precedence over logistics on conflicts
+        for domain in ('medical', 'logistics'):
+            domain_abbrev = self.domain_corrections.get(domain, {}).get('abbreviations', {})
+            for abbrev, expansion in domain_abbrev.items():
+                abbrev_map.setdefault(abbrev.lower(), (expansion, f"{domain}_abbrev_{abbrev}"))
+        
+        if not abbrev_map:
+            return abbrev_map, None, None
+        
+        # Longest first so overlapping terms prefer the longer match
+        alternation = '|'.join(
+            re.escape(abbrev) for abbrev in sorted(abbrev_map, key=len, reverse=True)
+        )
+        pattern = r'\b(?:' + alternation + r')\b'
+        
+        return abbrev_map, re.compile(pattern), re.compile(pattern, re.IGNORECASE)
     
-    def _load_dictionaries(self) -> Dict[str, Set[str]]:
+    def _load_dictionaries(self) -> Dict[str, FrozenSet[str]]:
         """Load all dictionary files"""
         dictionaries = {}
         
@@ -50,15 +116,14 @@ class PostProcessor:
             filepath = os.path.join(self.dictionaries_dir, filename)
             if os.path.exists(filepath):
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        words = set(line.strip().lower() for line in f if line.strip())
+                    words = _read_dictionary(filepath)
                     dictionaries[dict_name] = words
                     print(f"Loaded {len(words)} words from {dict_name}")
                 except Exception as e:
                     print(f"Failed to load {dict_name}: {e}")
-                    dictionaries[dict_name] = set()
+                    dictionaries[dict_name] = frozenset()
             else:
-                dictionaries[dict_name] = set()
+                dictionaries[dict_name] = frozenset()
         
         return dictionaries
     
@@ -138,26 +203,38 @@ class PostProcessor:
         Returns:
             Tuple of (corrected_text, corrections_applied)
         """
-        corrected = text
+        if self._abbrev_re is None:
+            return text, []
+        
         corrections = []
         
-        # Medical abbreviations
-        medical_abbrev = self.domain_corrections.get('medical', {}).get('abbreviations', {})
-        for abbrev, expansion in medical_abbrev.items():
-            pattern = r'\b' + re.escape(abbrev) + r'\b'
-            if re.search(pattern, corrected, re.IGNORECASE):
-                corrected = re.sub(pattern, expansion, corrected, flags=re.IGNORECASE)
-                corrections.append(f"medical_abbrev_{abbrev}")
-        
-        # Logistics abbreviations
-        logistics_abbrev = self.domain_corrections.get('logistics', {}).get('abbreviations', {})
-        for abbrev, expansion in logistics_abbrev.items():
-            pattern = r'\b' + re.escape(abbrev) + r'\b'
-            if re.search(pattern, corrected, re.IGNORECASE):
-                corrected = re.sub(pattern, expansion, corrected, flags=re.IGNORECASE)
-                corrections.append(f"logistics_abbrev_{abbrev}")
-        
-        return corrected, corrections
+        # Match against text lowercased once; spans map straight back to the
+        # original as long as lowercasing didn't change its length
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            def _expand(match: re.Match) -> str:
+                expansion, label = self._abbrev_map[match.group(0).lower()]
+                if label not in corrections:
+                    corrections.append(label)
+                return expansion
+            
+            return self._abbrev_re_ci.sub(_expand, text), corrections
+        
+        pieces = []
+        last_end = 0
+        for match in self._abbrev_re.finditer(lowered):
+            expansion, label = self._abbrev_map[match.group(0)]
+            if label not in corrections:
+                corrections.append(label)
+            pieces.append(text[last_end:match.start()])
+            pieces.append(expansion)
+            last_end = match.end()
+        
+        if not pieces:
+            return text, corrections
+        
+        pieces.append(text[last_end:])
+        return ''.join(pieces), corrections
     
     def _normalize_hinglish(self, text: str) -> str:
         """
@@ -192,12 +269,7 @@ class PostProcessor:
         if not words:
             return 0.0
         
-        # Combine all dictionaries
-        all_words = set()
-        for dict_words in self.dictionaries.values():
-            all_words.update(dict_words)
-        
-        # Count matches
-        matched = sum(1 for word in words if word in all_words)
+        # Count matches (every occurrence counts; membership test runs in C)
+        matched = sum(map(self._all_words.__contains__, words))
         
         return matched / len(words)
@@ -3,9 +3,26 @@ K-OCR v2.0 - Text Type Classifier
 Distinguishes between printed, handwritten, and mixed text
 """
 
+import threading
 import cv2
 import numpy as np
-from typing import Tuple
+from typing import Optional, Tuple
+
+# Numba is optional; without it the NumPy implementations are used
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# Stroke width statistics don't need full resolution; larger crops are
+# downsampled to roughly this many pixels before the distance transform
+STROKE_MAX_PIXELS = 65536
+
+# Per-thread Canny output buffers keyed by crop shape, so recurring crop
+# sizes don't allocate; bounded since arbitrary crops vary in shape
+_edge_buffers = threading.local()
+EDGE_BUFFER_SHAPES = 32
 
 
 def classify_text_type(
@@ -35,47 +52,43 @@ def classify_text_type(
         else:
             gray = image
         
+        # Binarize once, shared by stroke and vertical features
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        
         # Calculate features
         edge_density = _calculate_edge_density(gray)
-        stroke_variance = _calculate_stroke_variance(gray)
-        vertical_variance = _calculate_vertical_variance(gray)
+        stroke_variance = _calculate_stroke_variance(gray, binary)
+        vertical_variance = _calculate_vertical_variance(gray, binary)
         
-        # Decision logic
-        scores = {
-            'printed': 0.0,
-            'handwritten': 0.0,
-            'mixed': 0.0
-        }
+        # Decision logic (plain scalar accumulators; 'mixed' never scores)
+        printed_score = 0.0
+        handwritten_score = 0.0
         
         # Edge density: printed text has higher edge density
         if edge_density > edge_density_threshold:
-            scores['printed'] += 0.4
+            printed_score += 0.4
         else:
-            scores['handwritten'] += 0.4
+            handwritten_score += 0.4
         
         # Stroke variance: handwritten has higher variance
         if stroke_variance > stroke_variance_threshold:
-            scores['handwritten'] += 0.3
+            handwritten_score += 0.3
         else:
-            scores['printed'] += 0.3
+            printed_score += 0.3
         
         # Vertical variance: handwritten has higher variance
         if vertical_variance > vertical_variance_threshold:
-            scores['handwritten'] += 0.3
+            handwritten_score += 0.3
         else:
-            scores['printed'] += 0.3
-        
-        # Determine text type
-        text_type = max(scores, key=scores.get)
-        confidence = scores[text_type]
+            printed_score += 0.3
         
         # If scores are close, classify as mixed
-        sorted_scores = sorted(scores.values(), reverse=True)
-        if sorted_scores[0] - sorted_scores[1] < 0.2:
-            text_type = 'mixed'
-            confidence = 0.6
+        if abs(printed_score - handwritten_score) < 0.2:
+            return 'mixed', 0.6
         
-        return text_type, confidence
+        if printed_score >= handwritten_score:
+            return 'printed', printed_score
+        return 'handwritten', handwritten_score
         
     except Exception as e:
         print(f"Text classification failed: {e}")
@@ -93,12 +106,20 @@ def _calculate_edge_density(gray: np.ndarray) -> float:
         Edge density (0.0-1.0)
     """
     try:
-        # Canny edge detection
-        edges = cv2.Canny(gray, 50, 150)
+        # Canny edge detection into a reused buffer
+        buffers = getattr(_edge_buffers, 'by_shape', None)
+        if buffers is None:
+            buffers = _edge_buffers.by_shape = {}
+        edges = buffers.get(gray.shape)
+        if edges is None:
+            if len(buffers) >= EDGE_BUFFER_SHAPES:
+                buffers.clear()
+            edges = buffers[gray.shape] = np.empty(gray.shape, dtype=np.uint8)
+        cv2.Canny(gray, 50, 150, edges=edges)
         
         # Calculate density
         total_pixels = edges.size
-        edge_pixels = np.count_nonzero(edges)
+        edge_pixels = cv2.countNonZero(edges)
         density = edge_pixels / total_pixels if total_pixels > 0 else 0.0
         
         return density
@@ -108,19 +129,33 @@ def _calculate_edge_density(gray: np.ndarray) -> float:
         return 0.0
 
 
-def _calculate_stroke_variance(gray: np.ndarray) -> float:
+def _calculate_stroke_variance(gray: np.ndarray, binary: Optional[np.ndarray] = None) -> float:
     """
     Calculate stroke width variance
     
     Args:
         gray: Grayscale image
+        binary: Precomputed inverted Otsu binarization of gray (optional)
     
     Returns:
         Stroke width variance
     """
     try:
         # Binarize
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        if binary is None:
+            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        
+        # Downsample large crops
+        scale = 1.0
+        if binary.size > STROKE_MAX_PIXELS:
+            scale = (STROKE_MAX_PIXELS / binary.size) ** 0.5
+            height, width = binary.shape[:2]
+            binary = cv2.resize(
+                binary,
+                (max(1, int(width * scale)), max(1, int(height * scale))),
+                interpolation=cv2.INTER_AREA
+            )
+            _, binary = cv2.threshold(binary, 127, 255, cv2.THRESH_BINARY)
         
         # Distance transform to estimate stroke widths
         dist_transform = cv2.distanceTransform(binary, cv2.DIST_L2, 5)
@@ -131,8 +166,9 @@ def _calculate_stroke_variance(gray: np.ndarray) -> float:
         if len(stroke_widths) == 0:
             return 0.0
         
-        # Calculate variance
-        variance = np.var(stroke_widths)
+        # Calculate variance, rescaled to full-resolution pixel units
+        # so stroke_variance_threshold keeps its meaning
+        variance = np.var(stroke_widths) / (scale * scale)
         
         return float(variance)
         
@@ -141,43 +177,85 @@ def _calculate_stroke_variance(gray: np.ndarray) -> float:
         return 0.0
 
 
-def _calculate_vertical_variance(gray: np.ndarray) -> float:
+def _calculate_vertical_variance(gray: np.ndarray, binary: Optional[np.ndarray] = None) -> float:
     """
     Calculate vertical alignment variance
     
     Args:
         gray: Grayscale image
+        binary: Precomputed inverted Otsu binarization of gray (optional)
     
     Returns:
         Vertical variance
     """
     try:
         # Binarize
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        if binary is None:
+            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
         
         # Horizontal projection
         projection = np.sum(binary, axis=1)
         
-        # Find text line positions (peaks in projection)
-        threshold = np.max(projection) * 0.3
-        line_positions = np.where(projection > threshold)[0]
-        
-        if len(line_positions) < 2:
-            return 0.0
-        
-        # Calculate differences between consecutive line positions
-        diffs = np.diff(line_positions)
-        
-        # Calculate variance of differences
-        variance = np.var(diffs) if len(diffs) > 0 else 0.0
-        
-        return float(variance)
+        return float(_line_gap_variance(projection))
         
     except Exception as e:
         print(f"Vertical variance calculation failed: {e}")
         return 0.0
 
 
+def _line_gap_variance_numpy(projection: np.ndarray) -> float:
+    """
+    Variance of gaps between text line rows in a horizontal projection
+    
+    Args:
+        projection: Per-row ink sums
+    
+    Returns:
+        Population variance of gaps between rows above 30% of the peak
+    """
+    # Find text line positions (peaks in projection)
+    threshold = np.max(projection) * 0.3
+    line_positions = np.where(projection > threshold)[0]
+    
+    if len(line_positions) < 2:
+        return 0.0
+    
+    # Variance of differences between consecutive line positions
+    return float(np.var(np.diff(line_positions)))
+
+
+def _line_gap_variance_scan(projection: np.ndarray) -> float:
+    """
+    Single-pass equivalent of _line_gap_variance_numpy (Welford's algorithm),
+    written as a scalar loop for Numba compilation
+    """
+    threshold = projection.max() * 0.3
+    previous = -1
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    
+    for row in range(projection.shape[0]):
+        if projection[row] > threshold:
+            if previous >= 0:
+                gap = row - previous
+                count += 1
+                delta = gap - mean
+                mean += delta / count
+                m2 += delta * (gap - mean)
+            previous = row
+    
+    if count == 0:
+        return 0.0
+    return m2 / count
+
+
+if njit is not None:
+    _line_gap_variance = njit(cache=True)(_line_gap_variance_scan)
+else:
+    _line_gap_variance = _line_gap_variance_numpy
+
+
 # CNN-based classifier (placeholder for future implementation)
 class CNNTextClassifier:
     """
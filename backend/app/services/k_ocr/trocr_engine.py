@@ -4,11 +4,69 @@ Handles TrOCR model loading and inference
 """
 
 import os
+import threading
+from collections import OrderedDict
+import cv2
 import torch
 import numpy as np
 from PIL import Image
 from typing import Tuple, List, Dict, Optional
-from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+from transformers import (
+    TrOCRProcessor,
+    VisionEncoderDecoderModel,
+    LogitsProcessor,
+    LogitsProcessorList,
+    StoppingCriteria,
+    StoppingCriteriaList
+)
+
+
+# Maximum generated sequence length
+MAX_LENGTH = 128
+
+
+class _TokenConfidenceRecorder(LogitsProcessor):
+    """
+    Records the probability of the greedily chosen token at each decoding
+    step into a preallocated device buffer, so confidences are ready as
+    soon as generate() returns without keeping the full score tensors
+    """
+    
+    def __init__(self, max_steps: int):
+        self.max_steps = max_steps
+        self.confidences = None
+        self.steps = 0
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        if self.confidences is None:
+            self.confidences = torch.zeros(self.max_steps, dtype=torch.float32, device=scores.device)
+        
+        # Greedy decoding picks the argmax, so its probability is the max
+        if self.steps < self.max_steps:
+            self.confidences[self.steps] = scores[0].float().softmax(dim=-1).max()
+        self.steps += 1
+        
+        return scores
+
+
+class _LowConfidenceStop(StoppingCriteria):
+    """
+    Stops decoding once the running mean token confidence drops below a
+    threshold; such lines are routed to the fallback model anyway
+    """
+    
+    def __init__(self, recorder: _TokenConfidenceRecorder, threshold: float, min_tokens: int = 3):
+        self.recorder = recorder
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs):
+        steps = min(self.recorder.steps, self.recorder.max_steps)
+        stop = (
+            steps >= self.min_tokens
+            and self.recorder.confidences[:steps].mean().item() < self.threshold
+        )
+        return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
 
 
 class TrOCREngine:
@@ -16,22 +74,105 @@ class TrOCREngine:
     TrOCR model inference engine
     """
     
-    def __init__(self, device: str = "cpu", fp16: bool = False):
+    def __init__(
+        self,
+        device: str = "cpu",
+        fp16: bool = False,
+        bf16: bool = False,
+        compile_encoder: bool = False,
+        num_beams: int = 4,
+        early_stop_confidence: Optional[float] = None,
+        model_cache_mb: Optional[float] = None
+    ):
         """
         Initialize TrOCR engine
         
         Args:
             device: Device to run on ("cpu" or "cuda")
             fp16: Use half-precision (FP16) for faster inference
+            bf16: Use bfloat16 instead, on GPUs that support it (compute
+                capability 8.0+); otherwise fp16 applies
+            compile_encoder: Compile the vision encoder with torch.compile
+                (CUDA only; its input shape is fixed, so it compiles once)
+            num_beams: Beam width; 1 (greedy) records token confidences
+                while decoding instead of post-processing stored scores
+            early_stop_confidence: With greedy decoding, stop once the running
+                mean token confidence falls below this (None disables)
+            model_cache_mb: Memory budget for loaded models; least recently
+                used models are unloaded past it and reloaded on next use
+                (None keeps every loaded model resident)
         """
         self.device = device
-        self.fp16 = fp16 and device == "cuda"
+        self.dtype = self._select_dtype(device, fp16, bf16)
+        self.fp16 = self.dtype == torch.float16
+        self.compile_encoder = compile_encoder and device == "cuda" and hasattr(torch, 'compile')
+        self.num_beams = num_beams
+        self.early_stop_confidence = early_stop_confidence
         
-        # Model caches
-        self.printed_processor = None
-        self.printed_model = None
-        self.handwritten_processor = None
-        self.handwritten_model = None
+        # Loaded models in least- to most-recently-used order:
+        # model_type -> (processor, model), with parameter sizes in bytes
+        self._models = OrderedDict()
+        self._model_bytes = {}
+        self._models_lock = threading.Lock()
+        self._budget_bytes = model_cache_mb * 1024 * 1024 if model_cache_mb else None
+        
+        # Image transforms extracted from each processor, keyed by model type
+        self._image_transforms = {}
+        
+        # Registered (model_name, model_path) for lazy loading on first use,
+        # and the sources of loaded models so evicted ones can be reloaded
+        self._model_sources = {}
+        self._loaded_sources = {}
+        self._load_lock = threading.Lock()
+        
+        # Whether both models share identical encoders (None = not checked)
+        self._encoders_shared = None
+    
+    @staticmethod
+    def _select_dtype(device: str, fp16: bool, bf16: bool) -> Optional[torch.dtype]:
+        """Reduced-precision dtype for weights and inputs (None keeps fp32)"""
+        if device != "cuda":
+            return None
+        if bf16 and torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 8:
+            return torch.bfloat16
+        if fp16 or bf16:
+            return torch.float16
+        return None
+    
+    @property
+    def printed_processor(self) -> Optional[TrOCRProcessor]:
+        return self._models.get("printed", (None, None))[0]
+    
+    @property
+    def printed_model(self) -> Optional[VisionEncoderDecoderModel]:
+        return self._models.get("printed", (None, None))[1]
+    
+    @property
+    def handwritten_processor(self) -> Optional[TrOCRProcessor]:
+        return self._models.get("handwritten", (None, None))[0]
+    
+    @property
+    def handwritten_model(self) -> Optional[VisionEncoderDecoderModel]:
+        return self._models.get("handwritten", (None, None))[1]
+    
+    def register_model(
+        self,
+        model_type: str,
+        model_name: str,
+        model_path: Optional[str] = None
+    ):
+        """
+        Register a model to be loaded on first use instead of upfront
+        
+        Args:
+            model_type: "printed" or "handwritten"
+            model_name: Hugging Face model name
+            model_path: Local model path (optional)
+        """
+        if model_type not in ("printed", "handwritten"):
+            raise ValueError(f"Invalid model_type: {model_type}")
+        
+        self._model_sources[model_type] = (model_name, model_path)
     
     def load_printed_model(
         self,
@@ -45,29 +186,7 @@ class TrOCREngine:
             model_name: Hugging Face model name
             model_path: Local model path (optional)
         """
-        try:
-            # Load from local path if exists, otherwise from Hugging Face
-            load_path = model_path if model_path and os.path.exists(model_path) else model_name
-            
-            print(f"Loading TrOCR printed model from {load_path}...")
-            self.printed_processor = TrOCRProcessor.from_pretrained(load_path)
-            self.printed_model = VisionEncoderDecoderModel.from_pretrained(load_path)
-            
-            # Move to device
-            self.printed_model.to(self.device)
-            
-            # Enable FP16 if requested
-            if self.fp16:
-                self.printed_model.half()
-            
-            # Set to eval mode
-            self.printed_model.eval()
-            
-            print(f"TrOCR printed model loaded successfully on {self.device}")
-            
-        except Exception as e:
-            print(f"Failed to load TrOCR printed model: {e}")
-            raise
+        self._load_model("printed", model_name, model_path)
     
     def load_handwritten_model(
         self,
@@ -81,35 +200,297 @@ class TrOCREngine:
             model_name: Hugging Face model name
             model_path: Local model path (optional)
         """
+        self._load_model("handwritten", model_name, model_path)
+    
+    def _load_model(
+        self,
+        model_type: str,
+        model_name: str,
+        model_path: Optional[str] = None
+    ):
+        """
+        Load TrOCR model into the model cache
+        
+        Args:
+            model_type: "printed" or "handwritten"
+            model_name: Hugging Face model name
+            model_path: Local model path (optional)
+        """
         try:
             # Load from local path if exists, otherwise from Hugging Face
             load_path = model_path if model_path and os.path.exists(model_path) else model_name
             
-            print(f"Loading TrOCR handwritten model from {load_path}...")
-            self.handwritten_processor = TrOCRProcessor.from_pretrained(load_path)
-            self.handwritten_model = VisionEncoderDecoderModel.from_pretrained(load_path)
+            print(f"Loading TrOCR {model_type} model from {load_path}...")
+            processor = TrOCRProcessor.from_pretrained(load_path)
+            model = VisionEncoderDecoderModel.from_pretrained(load_path)
             
             # Move to device
-            self.handwritten_model.to(self.device)
+            model.to(self.device)
             
-            # Enable FP16 if requested
-            if self.fp16:
-                self.handwritten_model.half()
+            # Enable FP16/BF16 if requested
+            if self.dtype is not None:
+                model.to(dtype=self.dtype)
             
             # Set to eval mode
-            self.handwritten_model.eval()
+            model.eval()
+            
+            # The encoder always sees one fixed-size image, so it compiles
+            # once; the decoder's growing sequence length would recompile
+            if self.compile_encoder:
+                try:
+                    model.encoder.forward = torch.compile(model.encoder.forward, mode="reduce-overhead")
+                except Exception as e:
+                    print(f"torch.compile unavailable for TrOCR encoder: {e}")
             
-            print(f"TrOCR handwritten model loaded successfully on {self.device}")
+            self._image_transforms[model_type] = self._build_image_transform(processor)
+            
+            with self._models_lock:
+                self._models[model_type] = (processor, model)
+                self._models.move_to_end(model_type)
+                self._model_bytes[model_type] = sum(
+                    param.numel() * param.element_size() for param in model.parameters()
+                )
+                self._loaded_sources[model_type] = (model_name, model_path)
+                self._encoders_shared = None
+            
+            print(f"TrOCR {model_type} model loaded successfully on {self.device}")
+            
+            self._evict_over_budget()
             
         except Exception as e:
-            print(f"Failed to load TrOCR handwritten model: {e}")
+            print(f"Failed to load TrOCR {model_type} model: {e}")
             raise
     
+    def _evict_over_budget(self):
+        """Unload least recently used models until within the memory budget"""
+        if self._budget_bytes is None:
+            return
+        
+        evicted = []
+        with self._models_lock:
+            # Always keep the most recently used model, even if over budget
+            while len(self._models) > 1 and sum(self._model_bytes.values()) > self._budget_bytes:
+                model_type, _ = self._models.popitem(last=False)
+                self._model_bytes.pop(model_type, None)
+                self._image_transforms.pop(model_type, None)
+                self._encoders_shared = None
+                
+                # Reload lazily on next use; in-flight inference keeps its
+                # own reference until it finishes
+                self._model_sources[model_type] = self._loaded_sources[model_type]
+                evicted.append(model_type)
+        
+        if evicted:
+            print(f"Unloaded TrOCR models over memory budget: {', '.join(evicted)}")
+            if self.device.startswith("cuda"):
+                torch.cuda.empty_cache()
+    
+    def _build_image_transform(self, processor: TrOCRProcessor) -> Optional[Dict]:
+        """
+        Extract resize and normalization parameters from processor so
+        preprocessing can bypass the per-call PIL pipeline
+        
+        Args:
+            processor: TrOCR processor
+        
+        Returns:
+            Dict with target size and per-channel scale/offset, or None if
+            the image processor config isn't the expected resize+normalize
+        """
+        try:
+            image_processor = processor.image_processor
+            
+            size = image_processor.size
+            if isinstance(size, dict):
+                height, width = size.get('height'), size.get('width')
+            else:
+                height = width = int(size)
+            if not height or not width or not image_processor.do_resize:
+                return None
+            
+            rescale = image_processor.rescale_factor if image_processor.do_rescale else 1.0
+            if image_processor.do_normalize:
+                mean = np.asarray(image_processor.image_mean, dtype=np.float32)
+                std = np.asarray(image_processor.image_std, dtype=np.float32)
+            else:
+                mean = np.zeros(3, dtype=np.float32)
+                std = np.ones(3, dtype=np.float32)
+            
+            # Fold rescale and normalize into one multiply-add per channel:
+            # (x * rescale - mean) / std == x * scale + offset
+            return {
+                'size': (int(width), int(height)),
+                'scale': (rescale / std).astype(np.float32),
+                'offset': (-mean / std).astype(np.float32)
+            }
+            
+        except Exception as e:
+            print(f"Falling back to processor image pipeline: {e}")
+            return None
+    
+    def _get_model(self, model_type: str) -> Tuple[TrOCRProcessor, VisionEncoderDecoderModel]:
+        """
+        Get processor and model for model type, loading it if registered
+        
+        Args:
+            model_type: "printed" or "handwritten"
+        
+        Returns:
+            Tuple of (processor, model)
+        """
+        if model_type not in ("printed", "handwritten"):
+            raise ValueError(f"Invalid model_type: {model_type}")
+        
+        with self._models_lock:
+            processor, model = self._models.get(model_type, (None, None))
+            if model is not None:
+                self._models.move_to_end(model_type)
+        
+        if processor is None or model is None:
+            with self._load_lock:
+                # Single attempt per registration; a concurrent caller may
+                # already have loaded it while we waited on the lock
+                source = self._model_sources.pop(model_type, None)
+                if source is not None:
+                    try:
+                        self._load_model(model_type, model_name=source[0], model_path=source[1])
+                    except Exception:
+                        pass  # Failure already logged by the loader
+            
+            processor, model = self._models.get(model_type, (None, None))
+        
+        if processor is None or model is None:
+            raise RuntimeError(f"{model_type} model not loaded")
+        
+        return processor, model
+    
+    def preprocess(self, image: np.ndarray, model_type: str = "printed") -> torch.Tensor:
+        """
+        Convert image to model input tensor (CPU-only work, safe to run
+        on a background thread while another region is on the device)
+        
+        Args:
+            image: RGB uint8 numpy array
+            model_type: "printed" or "handwritten"
+        
+        Returns:
+            pixel_values tensor of shape (1, 3, H, W)
+        """
+        processor, _ = self._get_model(model_type)
+        pin = self.device.startswith("cuda")
+        
+        transform = self._image_transforms.get(model_type)
+        if transform is None:
+            # Convert numpy array to PIL Image
+            pil_image = Image.fromarray(image)
+            pixel_values = processor(pil_image, return_tensors="pt").pixel_values
+            
+            # Page-locked memory lets the host-to-device copy run asynchronously
+            return pixel_values.pin_memory() if pin else pixel_values
+        
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2RGB)
+        
+        width, height = transform['size']
+        shrinking = image.shape[0] > height or image.shape[1] > width
+        resized = cv2.resize(
+            image,
+            (width, height),
+            interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR
+        )
+        
+        # Normalize straight into the final (pinned on CUDA) CHW buffer
+        pixel_values = torch.empty((1, 3, height, width), dtype=torch.float32, pin_memory=pin)
+        out = pixel_values.numpy()
+        for channel in range(3):
+            np.multiply(resized[:, :, channel], transform['scale'][channel], out=out[0, channel])
+            out[0, channel] += transform['offset'][channel]
+        
+        return pixel_values
+    
+    def encoders_shared(self) -> bool:
+        """
+        Check whether the printed and handwritten models have identical
+        encoders (weights and image preprocessing), e.g. two decoders
+        fine-tuned over one frozen encoder. Only then can a single encoder
+        pass feed both decoders without changing results.
+        
+        Returns:
+            True if both models are loaded and their encoders are identical
+        """
+        if self.printed_model is None or self.handwritten_model is None:
+            return False
+        
+        if self._encoders_shared is None:
+            self._encoders_shared = self._compare_encoders()
+        
+        return self._encoders_shared
+    
+    def _compare_encoders(self) -> bool:
+        """Compare encoder weights and image transforms of both loaded models"""
+        try:
+            printed_transform = self._image_transforms.get('printed')
+            handwritten_transform = self._image_transforms.get('handwritten')
+            if printed_transform is None or handwritten_transform is None:
+                return False
+            if (printed_transform['size'] != handwritten_transform['size']
+                    or not np.array_equal(printed_transform['scale'], handwritten_transform['scale'])
+                    or not np.array_equal(printed_transform['offset'], handwritten_transform['offset'])):
+                return False
+            
+            printed_state = self.printed_model.encoder.state_dict()
+            handwritten_state = self.handwritten_model.encoder.state_dict()
+            if printed_state.keys() != handwritten_state.keys():
+                return False
+            
+            return all(
+                printed_state[name].shape == handwritten_state[name].shape
+                and torch.equal(printed_state[name], handwritten_state[name])
+                for name in printed_state
+            )
+            
+        except Exception as e:
+            print(f"Encoder comparison failed: {e}")
+            return False
+    
+    def encode(
+        self,
+        image: np.ndarray,
+        model_type: str = "printed",
+        pixel_values: Optional[torch.Tensor] = None
+    ):
+        """
+        Run only the vision encoder, for reuse across decoders via
+        run_inference(encoder_outputs=...) when encoders_shared() is True
+        
+        Args:
+            image: RGB uint8 numpy array
+            model_type: "printed" or "handwritten"
+            pixel_values: Input tensor from preprocess() (optional)
+        
+        Returns:
+            Encoder outputs (transformers BaseModelOutput)
+        """
+        _, model = self._get_model(model_type)
+        
+        if pixel_values is None:
+            pixel_values = self.preprocess(image, model_type)
+        pixel_values = pixel_values.to(self.device, non_blocking=True)
+        if self.dtype is not None:
+            pixel_values = pixel_values.to(self.dtype)
+        
+        with torch.inference_mode():
+            return model.encoder(pixel_values=pixel_values, return_dict=True)
+    
     def run_inference(
         self,
         image: np.ndarray,
         model_type: str = "printed",
-        return_token_confidences: bool = True
+        return_token_confidences: bool = True,
+        pixel_values: Optional[torch.Tensor] = None,
+        encoder_outputs=None
     ) -> Tuple[str, float, Optional[List[Dict]]]:
         """
         Run TrOCR inference on image
@@ -118,6 +499,10 @@ class TrOCREngine:
             image: RGB uint8 numpy array
             model_type: "printed" or "handwritten"
             return_token_confidences: Return per-token confidences
+            pixel_values: Input tensor from preprocess() for this image and
+                model_type (optional, computed from image if omitted)
+            encoder_outputs: Output of encode() to skip the encoder pass
+                (optional, only valid when encoders_shared() is True)
         
         Returns:
             Tuple of (text, confidence, tokens)
@@ -127,33 +512,40 @@ class TrOCREngine:
         """
         try:
             # Select model and processor
-            if model_type == "printed":
-                processor = self.printed_processor
-                model = self.printed_model
-            elif model_type == "handwritten":
-                processor = self.handwritten_processor
-                model = self.handwritten_model
-            else:
-                raise ValueError(f"Invalid model_type: {model_type}")
+            processor, model = self._get_model(model_type)
             
-            if processor is None or model is None:
-                raise RuntimeError(f"{model_type} model not loaded")
-            
-            # Convert numpy array to PIL Image
-            pil_image = Image.fromarray(image)
+            if encoder_outputs is not None:
+                # Encoder already run; generate only decodes
+                model_inputs = {'encoder_outputs': encoder_outputs}
+            else:
+                # Process image (unless already done by the caller)
+                if pixel_values is None:
+                    pixel_values = self.preprocess(image, model_type)
+                pixel_values = pixel_values.to(self.device, non_blocking=True)
+                if self.dtype is not None:
+                    pixel_values = pixel_values.to(self.dtype)
+                model_inputs = {'pixel_values': pixel_values}
             
-            # Process image
-            pixel_values = processor(pil_image, return_tensors="pt").pixel_values
-            pixel_values = pixel_values.to(self.device)
+            # Greedy decoding records confidences step by step; beam search
+            # keeps the scores for post-hoc extraction
+            recorder = None
+            if self.num_beams > 1:
+                model_inputs['early_stopping'] = True
+            elif return_token_confidences:
+                recorder = _TokenConfidenceRecorder(MAX_LENGTH)
+                model_inputs['logits_processor'] = LogitsProcessorList([recorder])
+                if self.early_stop_confidence is not None:
+                    model_inputs['stopping_criteria'] = StoppingCriteriaList([
+                        _LowConfidenceStop(recorder, self.early_stop_confidence)
+                    ])
             
-            # Run inference
-            with torch.no_grad():
+            # Run inference (inference_mode also skips autograd version tracking)
+            with torch.inference_mode():
                 outputs = model.generate(
-                    pixel_values,
-                    max_length=128,
-                    num_beams=4,
-                    early_stopping=True,
-                    output_scores=True,
+                    **model_inputs,
+                    max_length=MAX_LENGTH,
+                    num_beams=self.num_beams,
+                    output_scores=recorder is None,
                     return_dict_in_generate=True
                 )
             
@@ -162,7 +554,13 @@ class TrOCREngine:
             generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
             
             # Calculate confidence from scores
-            if return_token_confidences and hasattr(outputs, 'scores') and outputs.scores:
+            if recorder is not None and recorder.steps > 0:
+                tokens, avg_confidence = self._recorded_token_confidences(
+                    recorder,
+                    generated_ids[0],
+                    processor
+                )
+            elif return_token_confidences and getattr(outputs, 'scores', None):
                 tokens, avg_confidence = self._extract_token_confidences(
                     outputs.scores,
                     generated_ids[0],
@@ -179,6 +577,43 @@ class TrOCREngine:
             print(f"TrOCR inference failed: {e}")
             return "", 0.0, None
     
+    def _recorded_token_confidences(
+        self,
+        recorder: _TokenConfidenceRecorder,
+        generated_ids: torch.Tensor,
+        processor: TrOCRProcessor
+    ) -> Tuple[List[Dict], float]:
+        """
+        Build per-token confidences from a decoding-time recorder
+        
+        Args:
+            recorder: Recorder passed to generate()
+            generated_ids: Generated token IDs
+            processor: TrOCR processor
+        
+        Returns:
+            Tuple of (tokens, avg_confidence)
+        """
+        try:
+            steps = min(recorder.steps, recorder.max_steps, len(generated_ids) - 1)
+            if steps <= 0:
+                return [], 0.0
+            
+            confidences = recorder.confidences[:steps].cpu().tolist()
+            token_ids = generated_ids[1:steps + 1].tolist()
+            token_texts = processor.tokenizer.batch_decode([[token_id] for token_id in token_ids])
+            
+            tokens = [
+                {'character': token_text, 'confidence': confidence}
+                for token_text, confidence in zip(token_texts, confidences)
+            ]
+            
+            return tokens, sum(confidences) / len(confidences)
+            
+        except Exception as e:
+            print(f"Token confidence extraction failed: {e}")
+            return [], 0.0
+    
     def _extract_token_confidences(
         self,
         scores: Tuple[torch.Tensor],
@@ -197,31 +632,27 @@ class TrOCREngine:
             Tuple of (tokens, avg_confidence)
         """
         try:
-            tokens = []
-            confidences = []
+            # Step i scores predict generated_ids[i + 1] (index 0 is the start token)
+            steps = min(len(scores), len(generated_ids) - 1)
+            if steps <= 0:
+                return [], 0.0
             
-            for i, score in enumerate(scores):
-                # Get probabilities
-                probs = torch.softmax(score[0], dim=-1)
-                
-                # Get predicted token ID
-                if i + 1 < len(generated_ids):
-                    token_id = generated_ids[i + 1].item()
-                    
-                    # Get confidence for this token
-                    confidence = probs[token_id].item()
-                    
-                    # Decode token
-                    token_text = processor.tokenizer.decode([token_id])
-                    
-                    tokens.append({
-                        'character': token_text,
-                        'confidence': confidence
-                    })
-                    confidences.append(confidence)
+            # One log-softmax over all steps, gather chosen tokens, single sync
+            stacked = torch.stack([score[0] for score in scores[:steps]]).float()
+            token_ids = generated_ids[1:steps + 1].to(stacked.device)
+            log_probs = stacked.log_softmax(dim=-1)
+            confidences = log_probs.gather(1, token_ids.unsqueeze(1)).squeeze(1).exp().cpu().tolist()
+            
+            # Decode all tokens in one call
+            token_texts = processor.tokenizer.batch_decode([[token_id] for token_id in token_ids.tolist()])
+            
+            tokens = [
+                {'character': token_text, 'confidence': confidence}
+                for token_text, confidence in zip(token_texts, confidences)
+            ]
             
             # Calculate average confidence
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+            avg_confidence = sum(confidences) / len(confidences)
             
             return tokens, avg_confidence
             
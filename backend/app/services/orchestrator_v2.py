@@ -3,13 +3,16 @@ Orchestrator V2 - Document Processing Pipeline
 Uses K-Ingest, K-OCR, K-Lingua, and K-Eval modules
 """
 
+import logging
 import os
-import json
 import time
+import threading
 import fitz  # PyMuPDF
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from app.services.k_ingest import KIngestPipeline
@@ -18,6 +21,54 @@ from app.services.k_lingua import KLinguaPipeline
 from app.services.k_eval import KEvalPipeline
 from app.services.pii_detection import PIIDetectionService
 from app.services.pdf_redaction import create_redacted_pdf
+from app.utils import write_json
+
+logger = logging.getLogger(__name__)
+
+# Concurrent regions in Stage 3 (K-Lingua + PII detection)
+LINGUA_WORKERS = int(os.getenv("LINGUA_WORKERS", "4"))
+
+# Long-lived job workers sharing the loaded processor (see submit_job)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+
+
+@dataclass(slots=True)
+class RegionState:
+    """Per-region state filled in by Stage 2 (K-OCR) and Stage 3 (K-Lingua + PII)"""
+    region_id: str
+    page: int
+    bbox: List[int]
+    label: str
+    raw_text: str
+    text: str
+    ocr_conf: float
+    trust_score: float
+    model_used: str
+    text_type: str
+    normalized_text: Optional[str] = None
+    language: Optional[str] = None
+    language_confidence: Optional[float] = None
+    trans_conf: Optional[float] = None
+    pii: List[Dict[str, Any]] = field(default_factory=list)
+    
+    def to_field(self) -> Dict[str, Any]:
+        """Serialize as a result.json field"""
+        return {
+            'region_id': self.region_id,
+            'page': self.page,
+            'bbox': self.bbox,
+            'label': self.label,
+            'raw_text': self.raw_text,
+            'normalized_text': self.normalized_text,
+            'language': self.language,
+            'language_confidence': self.language_confidence,
+            'ocr_conf': self.ocr_conf,
+            'trans_conf': self.trans_conf,
+            'pii': self.pii,
+            'trust_score': self.trust_score,
+            'human_verified': False,
+            'verified_value': None
+        }
 
 
 class DocumentProcessorV2:
@@ -55,19 +106,21 @@ class DocumentProcessorV2:
         
         print(f"  ✓ Detected {len(ingest_result.regions)} regions across {ingest_result.num_pages} page(s)")
         
-        # Load PDF for region extraction
-        doc = fitz.open(pdf_path)
-        page = doc[0]  # Process first page
-        pix = page.get_pixmap(dpi=300)
-        img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
-        if pix.n == 4:  # RGBA to RGB
-            img_array = img_array[:, :, :3]
+        # Render all pages for region extraction
+        page_images = self._render_pages(pdf_path)
         
         # Stage 2: K-OCR - Text Recognition
         print("🔍 Stage 2: K-OCR - Text Recognition")
         ocr_results = []
         
-        for i, region in enumerate(ingest_result.regions, 1):
+        # Collect all non-empty crops, then OCR them in one batch
+        crop_regions = []
+        crops = []
+        for region in ingest_result.regions:
+            if not 1 <= region.page_number <= len(page_images):
+                continue
+            img_array = page_images[region.page_number - 1]
+            
             # Extract cropped region
             x1, y1, x2, y2 = region.bbox.x1, region.bbox.y1, region.bbox.x2, region.bbox.y2
             cropped = img_array[y1:y2, x1:x2]
@@ -75,59 +128,40 @@ class DocumentProcessorV2:
             if cropped.size == 0:
                 continue
             
-            # Run OCR
-            ocr_result = self.k_ocr.process_region(
-                image=cropped,
-                region_id=region.region_id
-            )
-            
-            ocr_results.append({
-                'region_id': region.region_id,
-                'page': region.page_number,
-                'bbox': [x1, y1, x2, y2],
-                'label': region.class_name,
-                'raw_text': ocr_result['raw_text'],
-                'text': ocr_result['text'],
-                'ocr_conf': ocr_result['confidence'],
-                'trust_score': ocr_result['trust_score'],
-                'model_used': ocr_result['model_used'],
-                'text_type': ocr_result['text_type']
-            })
+            crop_regions.append(region)
+            crops.append(cropped)
+        
+        # Run OCR
+        batch_results = self.k_ocr.process_region_batch(
+            crops,
+            region_ids=[region.region_id for region in crop_regions]
+        )
+        
+        for region, ocr_result in zip(crop_regions, batch_results):
+            bbox = region.bbox
+            ocr_results.append(RegionState(
+                region_id=region.region_id,
+                page=region.page_number,
+                bbox=[bbox.x1, bbox.y1, bbox.x2, bbox.y2],
+                label=region.class_name,
+                raw_text=ocr_result['raw_text'],
+                text=ocr_result['text'],
+                ocr_conf=ocr_result['confidence'],
+                trust_score=ocr_result['trust_score'],
+                model_used=ocr_result['model_used'],
+                text_type=ocr_result['text_type']
+            ))
         
         print(f"  ✓ Extracted text from {len(ocr_results)} regions")
         
         # Stage 3: K-Lingua - Language Understanding & Normalization
         print("🌐 Stage 3: K-Lingua - Language Understanding")
-        lingua_results = []
+        # Regions are independent here, so run them concurrently; each task
+        # fills in its own region's state
+        with ThreadPoolExecutor(max_workers=LINGUA_WORKERS) as executor:
+            list(executor.map(self._process_lingua, ocr_results))
         
-        for ocr_result in ocr_results:
-            lingua_result = self.k_lingua.process_text(
-                text=ocr_result['text'],
-                ocr_confidence=ocr_result['ocr_conf'],
-                domain="medical",
-                region_id=ocr_result['region_id']
-            )
-            
-            # Detect PII
-            pii_result = self.pii_detector.detect_pii(lingua_result['normalized_text'])
-            pii_entities = self._transform_pii_entities(pii_result.get('entities', []))
-            
-            lingua_results.append({
-                'region_id': ocr_result['region_id'],
-                'page': ocr_result['page'],
-                'bbox': ocr_result['bbox'],
-                'label': ocr_result['label'],
-                'raw_text': ocr_result['raw_text'],
-                'normalized_text': lingua_result['normalized_text'],
-                'language': lingua_result['language'],
-                'language_confidence': lingua_result['language_confidence'],
-                'ocr_conf': ocr_result['ocr_conf'],
-                'trans_conf': lingua_result['confidence_score'],
-                'pii': pii_entities,
-                'trust_score': ocr_result['trust_score'],
-                'human_verified': False,
-                'verified_value': None
-            })
+        lingua_results = [state.to_field() for state in ocr_results]
         
         print(f"  ✓ Processed {len(lingua_results)} texts")
         
@@ -177,15 +211,57 @@ class DocumentProcessorV2:
         
         # Save result
         result_path = os.path.join(job_dir, "result.json")
-        with open(result_path, 'w') as f:
-            json.dump(result, f, indent=2)
-        
-        doc.close()
+        write_json(result_path, result)
         
         print(f"✅ [V2] Processing complete in {total_time:.0f}ms")
         
         return result
     
+    def _process_lingua(self, state: RegionState):
+        """Run K-Lingua and PII detection for one region, updating its state"""
+        lingua_result = self.k_lingua.process_text(
+            text=state.text,
+            ocr_confidence=state.ocr_conf,
+            domain="medical",
+            region_id=state.region_id
+        )
+        
+        # Detect PII
+        pii_result = self.pii_detector.detect_pii(lingua_result['normalized_text'])
+        
+        state.normalized_text = lingua_result['normalized_text']
+        state.language = lingua_result['language']
+        state.language_confidence = lingua_result['language_confidence']
+        state.trans_conf = lingua_result['confidence_score']
+        state.pii = self._transform_pii_entities(pii_result.get('entities', []))
+    
+    @staticmethod
+    def _render_page(pdf_path: str, page_idx: int, dpi: int) -> np.ndarray:
+        """Render one page as an RGB array (no alpha channel to strip)"""
+        with fitz.open(pdf_path) as doc:
+            pix = doc[page_idx].get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+            return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+    
+    def _render_pages(self, pdf_path: str, dpi: int = 300) -> List[np.ndarray]:
+        """
+        Render every page of the PDF in parallel, in page order
+        
+        Each worker opens its own document handle, since fitz documents
+        must not be shared across threads.
+        """
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+        
+        if page_count <= 1:
+            return [self._render_page(pdf_path, 0, dpi)] if page_count else []
+        
+        max_workers = min(page_count, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda page_idx: self._render_page(pdf_path, page_idx, dpi),
+                range(page_count)
+            ))
+    
     def _transform_pii_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform PII entities to match schema"""
         transformed = []
@@ -198,6 +274,73 @@ class DocumentProcessorV2:
         return transformed
 
 
+_PROCESSOR = None
+_PROCESSOR_LOCK = threading.Lock()
+
+
+def _get_processor() -> DocumentProcessorV2:
+    """Return the shared processor, loading pipeline models on first use"""
+    global _PROCESSOR
+    if _PROCESSOR is None:
+        with _PROCESSOR_LOCK:
+            if _PROCESSOR is None:
+                _PROCESSOR = DocumentProcessorV2()
+    return _PROCESSOR
+
+
+_JOB_EXECUTOR = None
+
+
+def _get_job_executor() -> ThreadPoolExecutor:
+    """Return the persistent job executor, starting it on first use"""
+    global _JOB_EXECUTOR
+    if _JOB_EXECUTOR is None:
+        with _PROCESSOR_LOCK:
+            if _JOB_EXECUTOR is None:
+                _JOB_EXECUTOR = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="v2-job")
+    return _JOB_EXECUTOR
+
+
+def _record_job_failure(job_id: str, job_dir: str, future: Future):
+    """
+    Log a failed job and write a failed result.json, so GET /jobs/{job_id}
+    reports the failure instead of "processing"
+    """
+    exc = future.exception()
+    if exc is None:
+        return
+    logger.exception("[V2] Job %s failed", job_id, exc_info=exc)
+    try:
+        write_json(os.path.join(job_dir, "result.json"), {
+            "job_id": job_id,
+            "status": "failed",
+            "error": str(exc),
+            "created_at": datetime.now().isoformat()
+        })
+    except Exception:
+        logger.exception("[V2] Could not record failure of job %s", job_id)
+
+
+def submit_job(job_id: str, job_dir: str) -> Future:
+    """
+    Queue a job on the persistent worker pool
+    
+    Workers live for the whole process and reuse the shared processor, so
+    queued jobs never reload models; callers can await the returned future
+    or poll for result.json (status "failed" if the job raised).
+    
+    Args:
+        job_id: Unique job identifier
+        job_dir: Job directory containing original.pdf
+        
+    Returns:
+        Future resolving to the processing result dictionary
+    """
+    future = _get_job_executor().submit(process_job, job_id, job_dir)
+    future.add_done_callback(lambda done: _record_job_failure(job_id, job_dir, done))
+    return future
+
+
 def process_job(job_id: str, job_dir: str) -> dict:
     """
     Main entry point for document processing (V2)
@@ -214,5 +357,5 @@ def process_job(job_id: str, job_dir: str) -> dict:
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
     
-    processor = DocumentProcessorV2()
+    processor = _get_processor()
     return processor.process_document(pdf_path, job_id, job_dir)
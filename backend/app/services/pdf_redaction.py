@@ -1,34 +1,54 @@
 import os
-import json
+import shutil
+import hashlib
 from typing import List, Dict, Any
-from PyPDF2 import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.colors import black
-from io import BytesIO
+import fitz  # PyMuPDF
 
-def create_redacted_pdf(job_id: str, job_dir: str, fields: List[Dict[str, Any]]):
+from app.utils import read_jsonl, write_jsonl
+
+def _copy_original(original_pdf_path: str, redacted_pdf_path: str):
+    """
+    Place the original PDF at the redacted path without reading it into memory:
+    hardlink where possible, otherwise a kernel-side file copy
+    """
+    try:
+        os.link(original_pdf_path, redacted_pdf_path)
+    except OSError:
+        shutil.copyfile(original_pdf_path, redacted_pdf_path)
+
+def _redaction_rect(page: "fitz.Page", bbox: List[float], dpi: int) -> "fitz.Rect":
+    """
+    Convert a pixel bbox from a page rendered at dpi into a PDF rect on page
+    """
+    scale = 72.0 / dpi
+    x1, y1, x2, y2 = bbox
+    rect = fitz.Rect(x1 * scale, y1 * scale, x2 * scale, y2 * scale)
+    # Renders follow the page's display rotation; annotations use unrotated space
+    return (rect * page.derotation_matrix) & page.mediabox
+
+def create_redacted_pdf(job_id: str, job_dir: str, fields: List[Dict[str, Any]], dpi: int = 300):
     """
     Create redacted PDF with PII areas blacked out
+
+    Regions holding high-confidence PII are redacted with PyMuPDF: the
+    underlying text and images are removed, not just covered. bbox values
+    are pixel coordinates of pages rendered at dpi.
     """
     original_pdf_path = os.path.join(job_dir, "original.pdf")
     redacted_pdf_path = os.path.join(job_dir, "redacted.pdf")
     audit_path = os.path.join(job_dir, "audit.jsonl")
 
     try:
-        # For now, create a simple redaction by copying the original
-        # TODO: Implement proper PDF redaction with overlays
-        with open(original_pdf_path, "rb") as f:
-            pdf_data = f.read()
-        with open(redacted_pdf_path, "wb") as f:
-            f.write(pdf_data)
-
-        # Collect audit metadata for PII that would be redacted
+        # Collect PII regions to redact and their audit metadata
         redaction_metadata = []
+        redaction_boxes = []
         for field in fields:
             if field.get('pii'):
+                text_hash = hashlib.sha1(field.get('raw_text', '').encode()).digest()[:6].hex()
+                redact_field = False
                 for pii_entity in field['pii']:
-                    if pii_entity.get('confidence', 0) > 0.6:  # Only audit high-confidence PII
+                    if pii_entity.get('confidence', 0) > 0.6:  # Only redact high-confidence PII
+                        redact_field = True
                         redaction_metadata.append({
                             'job_id': job_id,
                             'region_id': field['region_id'],
@@ -36,68 +56,48 @@ def create_redacted_pdf(job_id: str, job_dir: str, fields: List[Dict[str, Any]])
                             'bbox': field.get('bbox', []),
                             'entity_type': pii_entity.get('type', 'unknown'),
                             'confidence': pii_entity.get('confidence', 0),
-                            'original_text_hash': hash(field.get('raw_text', '')) % 1000000,  # Simple hash
-                            'redaction_method': 'placeholder'  # Not actually redacted yet
+                            'original_text_hash': text_hash,
+                            'redaction_method': 'pymupdf_redact'
                         })
+                if redact_field and len(field.get('bbox', [])) == 4:
+                    redaction_boxes.append((field.get('page', 1), field['bbox']))
+
+        # Never write through an earlier hardlink to the original
+        if os.path.lexists(redacted_pdf_path):
+            os.remove(redacted_pdf_path)
+
+        if redaction_boxes:
+            with fitz.open(original_pdf_path) as doc:
+                redacted_pages = set()
+                for page_num, bbox in redaction_boxes:
+                    if not 1 <= page_num <= doc.page_count:
+                        continue
+                    page = doc[page_num - 1]
+                    page.add_redact_annot(_redaction_rect(page, bbox, dpi), fill=(0, 0, 0))
+                    redacted_pages.add(page_num - 1)
+
+                for page_idx in redacted_pages:
+                    doc[page_idx].apply_redactions()
+
+                doc.save(redacted_pdf_path, garbage=3, deflate=True)
+        else:
+            _copy_original(original_pdf_path, redacted_pdf_path)
 
         # Write audit metadata
-        with open(audit_path, 'w') as f:
-            for entry in redaction_metadata:
-                f.write(json.dumps(entry) + '\n')
+        write_jsonl(audit_path, redaction_metadata)
 
-        print(f"PDF redaction placeholder created with {len(redaction_metadata)} potential redactions")
+        print(f"PDF redaction created with {len(redaction_boxes)} redacted region(s)")
 
     except Exception as e:
         print(f"PDF redaction failed: {e}")
         # Fallback: copy original
         try:
-            with open(original_pdf_path, "rb") as f:
-                pdf_data = f.read()
-            with open(redacted_pdf_path, "wb") as f:
-                f.write(pdf_data)
+            if os.path.lexists(redacted_pdf_path):
+                os.remove(redacted_pdf_path)
+            _copy_original(original_pdf_path, redacted_pdf_path)
         except Exception as e2:
             print(f"Fallback copy failed: {e2}")
 
-def create_redaction_overlay(fields: List[Dict[str, Any]], page_width: float, page_height: float, page_num: int) -> BytesIO:
-    """
-    Create PDF overlay with redaction rectangles
-    """
-    try:
-        buffer = BytesIO()
-
-        # Create canvas for overlay
-        c = canvas.Canvas(buffer, pagesize=(page_width, page_height))
-
-        for field in fields:
-            if not field.get('pii'):
-                continue
-
-            bbox = field.get('bbox', [])
-            if len(bbox) != 4:
-                continue
-
-            # Convert normalized coordinates to actual coordinates
-            # Assuming bbox is [x1, y1, x2, y2] in pixels
-            x1, y1, x2, y2 = bbox
-
-            # Convert to PDF coordinates (bottom-left origin)
-            pdf_x1 = x1
-            pdf_y1 = page_height - y2  # Flip Y coordinate
-            pdf_width = x2 - x1
-            pdf_height = y2 - y1
-
-            # Draw black rectangle for redaction
-            c.setFillColor(black)
-            c.rect(pdf_x1, pdf_y1, pdf_width, pdf_height, fill=1, stroke=0)
-
-        c.save()
-        buffer.seek(0)
-        return buffer
-
-    except Exception as e:
-        print(f"Failed to create redaction overlay: {e}")
-        return None
-
 def get_redaction_metadata(job_id: str, job_dir: str) -> List[Dict[str, Any]]:
     """
     Get redaction audit metadata
@@ -107,10 +107,7 @@ def get_redaction_metadata(job_id: str, job_dir: str) -> List[Dict[str, Any]]:
 
     if os.path.exists(audit_path):
         try:
-            with open(audit_path, 'r') as f:
-                for line in f:
-                    entry = json.loads(line)
-                    metadata.append(entry)
+            metadata = read_jsonl(audit_path)
         except Exception as e:
             print(f"Failed to read audit metadata: {e}")
 
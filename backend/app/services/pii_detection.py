@@ -1,29 +1,217 @@
+import os
 import re
-from typing import Dict, Any, List
-from presidio_analyzer import AnalyzerEngine
-from presidio_anonymizer import AnonymizerEngine
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import repeat
+from operator import attrgetter
+from typing import Dict, Any, List, Optional, Union
+import numpy as np
+
+# RE2 scans in linear time (no backtracking); stdlib re is the fallback
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Hyperscan (optional) prefilters texts: one SIMD pass tells whether any
+# pattern can match, so texts without PII skip the regex scan entirely
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Numba is optional; without it the list-based dedup sweep is used
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# The compiled dedup sweep only pays off over the array conversion cost
+# once a text yields this many entities
+DEDUP_JIT_MIN_ENTITIES = 128
+
+# Worker threads shared by every PIIDetectionService (regex and model code
+# release the GIL): the texts of batch_detect_pii, and the model backends
+# within one detect_pii call. Services are created per request, so a pool per
+# instance would leak threads
+_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="pii")
+
+# Language for each 128-codepoint Indic script block from U+0900, in block
+# order (Devanagari text is taken as Hindi; Odia has no IndicNER mapping)
+INDIC_SCRIPT_LANGUAGES = ('hindi', 'bengali', 'punjabi', 'gujarati', None,
+                          'tamil', 'telugu', 'kannada', 'malayalam')
+
+# \uXXXX escapes are Python-only; RE2 spells them \x{XXXX}
+_UNICODE_ESCAPE = re.compile(r'\\u([0-9A-Fa-f]{4})')
+
+
+# Services are created per request; compiled patterns are shared by all of them
+@lru_cache(maxsize=None)
+def _compile_pattern(pattern: Union[str, bytes], flags: int = 0):
+    """
+    Compile pattern (str, or bytes for a byte regex) with RE2 when available,
+    otherwise with stdlib re (also used for any pattern RE2 does not support)
+    """
+    if re2 is not None:
+        # RE2 takes flags inline rather than as an argument
+        inline = ''.join(
+            letter for flag, letter in ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'))
+            if flags & flag
+        )
+        prefix = f'(?{inline})' if inline else ''
+        try:
+            if isinstance(pattern, bytes):
+                return re2.compile(prefix.encode('ascii') + pattern)
+            return re2.compile(prefix + _UNICODE_ESCAPE.sub(r'\\x{\1}', pattern))
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
+
+# Luhn: a doubled digit d contributes the digit sum of 2*d
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def _luhn_valid(number: str) -> bool:
+    """
+    Whether the digits in number pass the Luhn checksum (card numbers do)
+    """
+    digits = [int(char) for char in number if char.isdigit()]
+    total = sum(digits[-1::-2]) + sum(_LUHN_DOUBLED[digit] for digit in digits[-2::-2])
+    return total % 10 == 0
+
+
+def _sweep_dedup_scan(starts: np.ndarray, ends: np.ndarray, confs: np.ndarray) -> np.ndarray:
+    """
+    Array form of the _deduplicate_entities sweep over entities pre-sorted
+    by start, written as a scalar loop for Numba compilation. Returns the
+    mask of entities to keep
+    """
+    n = starts.shape[0]
+    kept = np.empty(n, dtype=np.int64)
+    top = 0
+
+    for i in range(n):
+        first_overlap = top
+        while first_overlap > 0 and ends[kept[first_overlap - 1]] > starts[i]:
+            first_overlap -= 1
+
+        winner = -1
+        for index in range(first_overlap, top):
+            if confs[kept[index]] >= confs[i]:
+                winner = index
+                break
+
+        if winner >= 0:
+            shift = winner - first_overlap
+            if shift > 0:
+                for index in range(winner, top):
+                    kept[index - shift] = kept[index]
+                top -= shift
+        else:
+            kept[first_overlap] = i
+            top = first_overlap + 1
+
+    keep = np.zeros(n, dtype=np.bool_)
+    for index in range(top):
+        keep[kept[index]] = True
+    return keep
+
+
+if njit is not None:
+    _sweep_dedup = njit(cache=True)(_sweep_dedup_scan)
+else:
+    _sweep_dedup = None
+
+
+@dataclass(slots=True)
+class Entity:
+    """A detected PII span; the matched text is sliced only for entities kept"""
+    entity_type: str
+    start: int
+    end: int
+    confidence: float
+    source: str
+    language: Optional[str] = None
+    description: Optional[str] = None
+
+    def to_dict(self, text: str) -> Dict[str, Any]:
+        """Serialize as a detect_pii entity, slicing its text from text"""
+        entity = {
+            'entity_type': self.entity_type,
+            'start': self.start,
+            'end': self.end,
+            'text': text[self.start:self.end],
+            'confidence': self.confidence,
+            'source': self.source
+        }
+        if self.language is not None:
+            entity['language'] = self.language
+        if self.description is not None:
+            entity['description'] = self.description
+        return entity
+
+
+def _build_presidio() -> Optional[Dict[str, Any]]:
+    """
+    Import Presidio and build its engines (loads the spaCy model);
+    None if Presidio is unavailable
+    """
+    try:
+        from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
+        from presidio_anonymizer import AnonymizerEngine
+        analyzer = AnalyzerEngine()
+        engines = {
+            'analyzer': analyzer,
+            'batch_analyzer': BatchAnalyzerEngine(analyzer_engine=analyzer),
+            'anonymizer': AnonymizerEngine()
+        }
+        print("Presidio loaded successfully")
+        return engines
+    except ImportError as e:
+        print(f"Presidio not available: {e}")
+    except Exception as e:
+        print(f"Failed to initialize Presidio: {e}")
+    return None
+
 
+_PRESIDIO = None
+_PRESIDIO_LOADED = False
+_PRESIDIO_LOCK = threading.Lock()
+
+
+def _load_presidio() -> Optional[Dict[str, Any]]:
+    """Return the shared Presidio engines, building them on first use"""
+    global _PRESIDIO, _PRESIDIO_LOADED
+    if not _PRESIDIO_LOADED:
+        with _PRESIDIO_LOCK:
+            if not _PRESIDIO_LOADED:
+                _PRESIDIO = _build_presidio()
+                _PRESIDIO_LOADED = True
+    return _PRESIDIO
 
 
 class PIIDetectionService:
+    # Entity types requested from Presidio
+    PRESIDIO_ENTITIES = ['PERSON', 'EMAIL_ADDRESS', 'PHONE_NUMBER', 'IBAN_CODE',
+                         'CREDIT_CARD', 'IP_ADDRESS', 'LOCATION', 'DATE_TIME',
+                         'NRP', 'URL', 'US_SSN', 'UK_NHS', 'IT_FISCAL_CODE']
+
+    # Redaction character per entity type
+    _REDACTION_CHARS = {
+        'EMAIL_ADDRESS': '@',
+        'URL': '@',
+        'PHONE_NUMBER': '*',
+        'INDIAN_PHONE': '*'
+    }
+    _DEFAULT_REDACTION = '█'
+
     def __init__(self):
-        self.presidio_loaded = False
         self.indic_ner_loaded = False
 
-        try:
-            from presidio_analyzer import AnalyzerEngine
-            from presidio_anonymizer import AnonymizerEngine
-            self.analyzer = AnalyzerEngine()
-            self.anonymizer = AnonymizerEngine()
-            self.presidio_loaded = True
-            print("Presidio loaded successfully")
-        except ImportError as e:
-            print(f"Presidio not available: {e}")
-            self.presidio_loaded = False
-        except Exception as e:
-            print(f"Failed to initialize Presidio: {e}")
-            self.presidio_loaded = False
-
         # Custom regex patterns for Indic languages and specific patterns
         self.custom_patterns = {
             # Indian patterns
@@ -70,6 +258,24 @@ class PIIDetectionService:
             }
         }
 
+        # Compile each pattern once; the 'regex' string is kept for reference.
+        # ASCII text is scanned as bytes (offsets are the same) with the
+        # patterns that can match ASCII, i.e. those without \\u escapes
+        for pattern_info in self.custom_patterns.values():
+            regex = pattern_info['regex']
+            pattern_info['compiled'] = _compile_pattern(regex, re.IGNORECASE | re.MULTILINE)
+            pattern_info['compiled_ascii'] = (
+                None if _UNICODE_ESCAPE.search(regex)
+                else _compile_pattern(regex.encode('ascii'), re.IGNORECASE | re.MULTILINE)
+            )
+
+        self._hs_db = self._build_hyperscan_prefilter()
+        self._hs_local = threading.local()
+
+        # Any character from the Indic script blocks (Devanagari .. Malayalam)
+        # The Indic script blocks are contiguous (U+0900-U+0D7F)
+        self._indic_script_re = _compile_pattern(r'[\u0900-\u0D7F]')
+
         # Language codes for IndicNER
         self.indic_lang_codes = {
             'hindi': 'hi',
@@ -83,9 +289,38 @@ class PIIDetectionService:
             'malayalam': 'ml'
         }
 
-    def detect_pii(self, text: str) -> Dict[str, Any]:
+    @property
+    def presidio_loaded(self) -> bool:
+        """Whether Presidio is available (loads it on first access)"""
+        return _load_presidio() is not None
+
+    @property
+    def analyzer(self):
+        return _load_presidio()['analyzer']
+
+    @property
+    def batch_analyzer(self):
+        return _load_presidio()['batch_analyzer']
+
+    @property
+    def anonymizer(self):
+        return _load_presidio()['anonymizer']
+
+    def detect_pii(self, text: str, presidio_results: Optional[List[Any]] = None) -> Dict[str, Any]:
         """
         Detect PII in the given text
+
+        presidio_results: Presidio analyzer results already computed for text
+        (as batch_detect_pii does), instead of analyzing it here
+        """
+        return self._detect_pii(text, presidio_results, _POOL)
+
+    def _detect_pii(self, text: str, presidio_results: Optional[List[Any]],
+                    pool: Optional[ThreadPoolExecutor]) -> Dict[str, Any]:
+        """
+        detect_pii, running the model backends on pool, or on this thread if
+        pool is None (batch texts already run on the pool, and waiting there
+        for more pool tasks could exhaust it)
         """
         if not text or not text.strip():
             return {
@@ -97,16 +332,31 @@ class PIIDetectionService:
         entities = []
 
         try:
+            # The backends are independent: Presidio (unless its results were
+            # passed in) and IndicNER run on worker threads while the custom
+            # patterns run here
+            presidio_future = indic_future = None
+
             # Use Presidio if available
-            if self.presidio_loaded:
-                entities.extend(self._detect_with_presidio(text))
+            if pool is not None and self.presidio_loaded and presidio_results is None:
+                presidio_future = pool.submit(self._detect_with_presidio, text)
 
             # Use IndicNER for Indic languages
-            if self.indic_ner_loaded:
-                entities.extend(self._detect_with_indic_ner(text))
+            if pool is not None and self.indic_ner_loaded:
+                indic_future = pool.submit(self._detect_with_indic_ner, text)
 
             # Always use custom patterns for Indian context
-            entities.extend(self._detect_with_custom_patterns(text))
+            custom_entities = self._detect_with_custom_patterns(text)
+
+            if presidio_future is not None:
+                entities.extend(presidio_future.result())
+            elif self.presidio_loaded:
+                entities.extend(self._detect_with_presidio(text, presidio_results))
+            if indic_future is not None:
+                entities.extend(indic_future.result())
+            elif self.indic_ner_loaded:
+                entities.extend(self._detect_with_indic_ner(text))
+            entities.extend(custom_entities)
 
             # Remove duplicates and sort by position
             entities = self._deduplicate_entities(entities)
@@ -114,10 +364,10 @@ class PIIDetectionService:
             # Calculate total confidence
             total_confidence = 0.0
             if entities:
-                total_confidence = sum(entity['confidence'] for entity in entities) / len(entities)
+                total_confidence = sum(entity.confidence for entity in entities) / len(entities)
 
             return {
-                'entities': entities,
+                'entities': [entity.to_dict(text) for entity in entities],
                 'has_pii': len(entities) > 0,
                 'total_confidence': total_confidence,
                 'entity_count': len(entities)
@@ -132,38 +382,30 @@ class PIIDetectionService:
                 'error': str(e)
             }
 
-    def _detect_with_presidio(self, text: str) -> List[Dict[str, Any]]:
+    def _detect_with_presidio(self, text: str, results: Optional[List[Any]] = None) -> List[Entity]:
         """
         Use Presidio to detect PII entities with short-token filtering
         """
         entities = []
         try:
-            results = self.analyzer.analyze(
-                text=text,
-                language='en',
-                entities=['PERSON', 'EMAIL_ADDRESS', 'PHONE_NUMBER', 'IBAN_CODE',
-                         'CREDIT_CARD', 'IP_ADDRESS', 'LOCATION', 'DATE_TIME',
-                         'NRP', 'URL', 'US_SSN', 'UK_NHS', 'IT_FISCAL_CODE']
-            )
+            if results is None:
+                results = self.analyzer.analyze(
+                    text=text,
+                    language='en',
+                    entities=self.PRESIDIO_ENTITIES
+                )
 
             for result in results:
-                entity_text = text[result.start:result.end]
                 confidence = result.score
 
                 # Apply short-token filtering for PERSON entities
                 if result.entity_type == 'PERSON':
+                    entity_text = text[result.start:result.end]
                     confidence = self._adjust_person_confidence(entity_text, confidence, text, result.start, result.end)
 
                 # Only include if confidence is above threshold
                 if confidence >= 0.3:  # Minimum threshold
-                    entities.append({
-                        'entity_type': result.entity_type,
-                        'start': result.start,
-                        'end': result.end,
-                        'text': entity_text,
-                        'confidence': confidence,
-                        'source': 'presidio'
-                    })
+                    entities.append(Entity(result.entity_type, result.start, result.end, confidence, 'presidio'))
 
         except Exception as e:
             print(f"Presidio detection failed: {e}")
@@ -207,21 +449,16 @@ class PIIDetectionService:
         else:
             return base_confidence
 
-    def _detect_with_indic_ner(self, text: str) -> List[Dict[str, Any]]:
+    def _detect_with_indic_ner(self, text: str) -> List[Entity]:
         """
         Use IndicNER to detect named entities in Indic languages
         """
         entities = []
         try:
-            # Detect language (simplified - check for Indic scripts)
-            detected_lang = None
-            for lang, pattern in self.indic_lang_codes.items():
-                if re.search(r'[\u0900-\u097F\u0980-\u09FF\u0A00-\u0A7F\u0A80-\u0AFF\u0B00-\u0B7F\u0B80-\u0BFF\u0C00-\u0C7F\u0C80-\u0CFF\u0D00-\u0D7F]', text):
-                    detected_lang = lang
-                    break
-
-            if not detected_lang:
+            # Detect language from the Indic script with the most characters
+            if not self._indic_script_re.search(text):
                 return entities
+            detected_lang = self._detect_indic_language(text)
 
             lang_code = self.indic_lang_codes.get(detected_lang, 'hi')
 
@@ -234,51 +471,120 @@ class PIIDetectionService:
                     entity_type = 'PERSON' if 'PER' in result['prediction'] else 'LOCATION'
                     confidence = result.get('confidence', 0.8)
 
-                    entities.append({
-                        'entity_type': entity_type,
-                        'start': result['start'],
-                        'end': result['end'],
-                        'text': text[result['start']:result['end']],
-                        'confidence': confidence,
-                        'source': 'indic_ner',
-                        'language': detected_lang
-                    })
+                    entities.append(Entity(entity_type, result['start'], result['end'], confidence,
+                                           'indic_ner', language=detected_lang))
 
         except Exception as e:
             print(f"IndicNER detection failed: {e}")
 
         return entities
 
-    def _detect_with_custom_patterns(self, text: str) -> List[Dict[str, Any]]:
+    def _detect_indic_language(self, text: str) -> str:
+        """
+        Pick the language of the dominant Indic script in a single pass,
+        counting characters per 128-codepoint script block
+        """
+        counts = array('I', [0] * len(INDIC_SCRIPT_LANGUAGES))
+        for char in text:
+            code = ord(char)
+            if 0x0900 <= code <= 0x0D7F:
+                counts[(code - 0x0900) >> 7] += 1
+
+        language = INDIC_SCRIPT_LANGUAGES[max(range(len(counts)), key=counts.__getitem__)]
+        return language or 'hindi'
+
+    def _build_hyperscan_prefilter(self):
+        """
+        Compile all custom patterns into a Hyperscan database (None if unavailable)
+
+        PREFILTER mode may over-match but never misses a match of the
+        original pattern, so it is only used to skip texts, never to report
+        entities.
+        """
+        if hyperscan is None:
+            return None
+
+        try:
+            flags = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE
+                     | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8
+                     | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_PREFILTER)
+            expressions = [
+                _UNICODE_ESCAPE.sub(r'\\x{\1}', pattern_info['regex']).encode('utf-8')
+                for pattern_info in self.custom_patterns.values()
+            ]
+            database = hyperscan.Database()
+            database.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=[flags] * len(expressions)
+            )
+            return database
+        except Exception as e:
+            print(f"Hyperscan prefilter unavailable: {e}")
+            return None
+
+    def _may_contain_custom_pii(self, data: bytes) -> bool:
+        """
+        Whether any custom pattern could match the UTF-8 encoded text
+        (always True without Hyperscan)
+        """
+        if self._hs_db is None:
+            return True
+
+        # Scratch space is per thread; a database may be scanned concurrently
+        scratch = getattr(self._hs_local, 'scratch', None)
+        if scratch is None:
+            scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+
+        try:
+            # Returning True from the handler stops at the first match
+            self._hs_db.scan(data, match_event_handler=lambda *args: True, scratch=scratch)
+        except hyperscan.ScanTerminated:
+            return True
+        except Exception as e:
+            print(f"Hyperscan scan failed: {e}")
+            return True
+        return False
+
+    def _detect_with_custom_patterns(self, text: str) -> List[Entity]:
         """
         Use custom regex patterns to detect PII
         """
         entities = []
+        data = text.encode('utf-8')
+        if not self._may_contain_custom_pii(data):
+            return entities
+
+        # Pure ASCII text (one byte per character) is scanned as bytes
+        ascii_text = len(data) == len(text)
+        subject = data if ascii_text else text
+        compiled_key = 'compiled_ascii' if ascii_text else 'compiled'
+
+        # Each pattern is scanned on its own so overlapping matches of
+        # different patterns all reach deduplication
         for entity_type, pattern_info in self.custom_patterns.items():
+            compiled = pattern_info[compiled_key]
+            if compiled is None:
+                continue
             try:
-                matches = re.finditer(
-                    pattern_info['regex'],
-                    text,
-                    re.IGNORECASE | re.MULTILINE
-                )
+                for match in compiled.finditer(subject):
+                    # Random 16-digit runs are not card numbers; keep Luhn-valid ones
+                    if entity_type == 'CREDIT_CARD':
+                        number = match.group()
+                        if not _luhn_valid(number.decode('ascii') if ascii_text else number):
+                            continue
 
-                for match in matches:
-                    entities.append({
-                        'entity_type': entity_type,
-                        'start': match.start(),
-                        'end': match.end(),
-                        'text': match.group(),
-                        'confidence': pattern_info['confidence'],
-                        'source': 'custom_regex',
-                        'description': pattern_info['description']
-                    })
+                    start, end = match.span()
+                    entities.append(Entity(entity_type, start, end, pattern_info['confidence'],
+                                           'custom_regex', description=pattern_info['description']))
 
             except Exception as e:
                 print(f"Custom pattern {entity_type} failed: {e}")
 
         return entities
 
-    def _deduplicate_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _deduplicate_entities(self, entities: List[Entity]) -> List[Entity]:
         """
         Remove duplicate entities and sort by position
         """
@@ -286,24 +592,33 @@ class PIIDetectionService:
             return entities
 
         # Sort by start position
-        entities.sort(key=lambda x: x['start'])
-
-        # Remove overlapping entities (keep higher confidence ones)
+        entities.sort(key=attrgetter('start'))
+
+        if _sweep_dedup is not None and len(entities) >= DEDUP_JIT_MIN_ENTITIES:
+            count = len(entities)
+            starts = np.fromiter((e.start for e in entities), dtype=np.int64, count=count)
+            ends = np.fromiter((e.end for e in entities), dtype=np.int64, count=count)
+            confs = np.fromiter((e.confidence for e in entities), dtype=np.float64, count=count)
+            keep = _sweep_dedup(starts, ends, confs)
+            return [entity for entity, kept in zip(entities, keep) if kept]
+
+        # Remove overlapping entities (keep higher confidence ones). Kept
+        # entities never overlap each other, so the ones overlapping the
+        # current entity are always a run at the tail of the list
         deduplicated = []
         for entity in entities:
-            should_add = True
-            for existing in deduplicated:
-                # Check if entities overlap
-                if (entity['start'] < existing['end'] and
-                    entity['end'] > existing['start']):
-                    # Keep the one with higher confidence
-                    if entity['confidence'] > existing['confidence']:
-                        deduplicated.remove(existing)
-                    else:
-                        should_add = False
-                        break
-
-            if should_add:
+            first_overlap = len(deduplicated)
+            while first_overlap > 0 and deduplicated[first_overlap - 1].end > entity.start:
+                first_overlap -= 1
+
+            # Earlier overlapping entities with lower confidence give way until
+            # one with at least this confidence is found, which wins instead
+            for index in range(first_overlap, len(deduplicated)):
+                if deduplicated[index].confidence >= entity.confidence:
+                    del deduplicated[first_overlap:index]
+                    break
+            else:
+                del deduplicated[first_overlap:]
                 deduplicated.append(entity)
 
         return deduplicated
@@ -315,28 +630,31 @@ class PIIDetectionService:
         if not entities:
             return text
 
-        # Sort entities by start position in reverse order to avoid index shifting
-        sorted_entities = sorted(entities, key=lambda x: x['start'], reverse=True)
+        # Build the output once from slices. Where entities overlap, the one
+        # starting first keeps the overlap (among equal starts, the later one)
+        order = sorted(range(len(entities)), key=lambda i: (entities[i]['start'], -i))
 
-        redacted_text = text
-        for entity in sorted_entities:
-            start = entity['start']
+        redaction_chars = self._REDACTION_CHARS
+        parts = []
+        cursor = 0
+        for i in order:
+            entity = entities[i]
+            start = max(entity['start'], cursor)
             end = entity['end']
-            redaction_char = self._get_redaction_char(entity['entity_type'])
-            redacted_text = redacted_text[:start] + redaction_char * (end - start) + redacted_text[end:]
+            if end <= start:
+                continue
+            parts.append(text[cursor:start])
+            parts.append(redaction_chars.get(entity['entity_type'], self._DEFAULT_REDACTION) * (end - start))
+            cursor = end
+        parts.append(text[cursor:])
 
-        return redacted_text
+        return ''.join(parts)
 
     def _get_redaction_char(self, entity_type: str) -> str:
         """
         Get appropriate redaction character based on entity type
         """
-        if entity_type in ['EMAIL_ADDRESS', 'URL']:
-            return '@'
-        elif entity_type in ['PHONE_NUMBER', 'INDIAN_PHONE']:
-            return '*'
-        else:
-            return '█'
+        return self._REDACTION_CHARS.get(entity_type, self._DEFAULT_REDACTION)
 
     def get_redaction_metadata(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -359,8 +677,19 @@ class PIIDetectionService:
         """
         Detect PII in multiple texts
         """
-        results = []
-        for text in texts:
-            result = self.detect_pii(text)
-            results.append(result)
-        return results
+        if len(texts) <= 1:
+            return [self.detect_pii(text) for text in texts]
+
+        # Presidio analyzes the whole batch at once (spaCy nlp.pipe)
+        presidio_results = [None] * len(texts)
+        if self.presidio_loaded:
+            try:
+                presidio_results = list(self.batch_analyzer.analyze_iterator(
+                    texts,
+                    language='en',
+                    entities=self.PRESIDIO_ENTITIES
+                ))
+            except Exception as e:
+                print(f"Presidio batch analysis failed, analyzing per text: {e}")
+
+        return list(_POOL.map(self._detect_pii, texts, presidio_results, repeat(None)))
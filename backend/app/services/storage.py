@@ -1,30 +1,77 @@
+import io
 import os
+import errno
+import mimetypes
+import mmap
+import shutil
+import threading
+from functools import cached_property
+from cachetools import TTLCache
 import requests
-import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from app.core.config import settings
 
 
+# Chunk size for streamed downloads
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# S3 transfers above 8 MB go multipart, with parts moved on 8 threads
+S3_MULTIPART_SIZE = 8 * 1024 * 1024
+S3_MAX_CONCURRENCY = 8
+
+# Remote existence checks are remembered briefly (uploads and deletes
+# through this service invalidate their key immediately)
+EXISTS_CACHE_SIZE = 4096
+EXISTS_CACHE_TTL = 30
+
+
 class StorageService:
     def __init__(self):
         # For testing: Force local storage to avoid Supabase storage issues
         self.use_supabase = False
         self.use_s3 = False
 
+        # Shared session so Supabase calls reuse pooled keep-alive connections
+        # instead of a new TCP+TLS handshake per operation. Retry only covers
+        # idempotent methods (urllib3 default), so uploads are never replayed
+        self._session = requests.Session()
+        self._session.headers['Connection'] = 'keep-alive'
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        ))
+
+        self._exists_cache = TTLCache(maxsize=EXISTS_CACHE_SIZE, ttl=EXISTS_CACHE_TTL)
+        self._exists_lock = threading.Lock()
+
         # Use local storage for testing
         self.local_storage_path = settings.LOCAL_STORAGE_PATH
         os.makedirs(self.local_storage_path, exist_ok=True)
         print("Using local storage (testing mode)")
 
+    @cached_property
+    def _s3_transfer_config(self):
+        """Multipart settings for S3 transfers (boto3 is only imported on first S3 use)"""
+        from boto3.s3.transfer import TransferConfig
+        return TransferConfig(
+            multipart_threshold=S3_MULTIPART_SIZE,
+            multipart_chunksize=S3_MULTIPART_SIZE,
+            max_concurrency=S3_MAX_CONCURRENCY,
+            use_threads=True
+        )
+
     def upload_file_obj(self, file_obj, key: str):
         """Upload file object to storage"""
+        self._forget_exists(key)
         if self.use_supabase:
             try:
                 # Create storage path with bucket
                 storage_path = f"{self.bucket_name}/{key}"
                 url = f"{self.storage_url}/object/{storage_path}"
 
-                response = requests.post(
+                response = self._session.post(
                     url,
                     files={'file': (key, file_obj)},
                     headers=self.headers
@@ -37,7 +84,7 @@ class StorageService:
                     # Try to create bucket first
                     self._create_bucket_if_not_exists()
                     # Retry upload
-                    response = requests.post(
+                    response = self._session.post(
                         url,
                         files={'file': (key, file_obj)},
                         headers=self.headers
@@ -54,10 +101,12 @@ class StorageService:
 
         if self.use_s3:
             try:
-                self.s3_client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=key,
-                    Body=file_obj
+                body = io.BytesIO(file_obj) if isinstance(file_obj, (bytes, bytearray)) else file_obj
+                self.s3_client.upload_fileobj(
+                    body,
+                    self.bucket_name,
+                    key,
+                    Config=self._s3_transfer_config
                 )
                 return key
             except Exception as e:
@@ -76,7 +125,7 @@ class StorageService:
         """Create Supabase bucket if it doesn't exist"""
         try:
             url = f"{self.storage_url}/bucket/{self.bucket_name}"
-            response = requests.post(
+            response = self._session.post(
                 url,
                 json={
                     "name": self.bucket_name,
@@ -93,16 +142,20 @@ class StorageService:
 
     def upload_file(self, file_path: str, key: str):
         """Upload local file to storage"""
+        self._forget_exists(key)
         if self.use_supabase:
             try:
                 storage_path = f"{self.bucket_name}/{key}"
                 url = f"{self.storage_url}/object/{storage_path}"
 
+                # Send the file as the raw request body: requests streams an
+                # open file object, where a multipart body is built in memory
+                content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
                 with open(file_path, 'rb') as f:
-                    response = requests.post(
+                    response = self._session.post(
                         url,
-                        files={'file': (key, f)},
-                        headers=self.headers
+                        data=f,
+                        headers={**self.headers, 'Content-Type': content_type}
                     )
 
                 if response.status_code in [200, 201]:
@@ -119,7 +172,8 @@ class StorageService:
                 self.s3_client.upload_file(
                     file_path,
                     self.bucket_name,
-                    key
+                    key,
+                    Config=self._s3_transfer_config
                 )
                 return key
             except Exception as e:
@@ -129,7 +183,13 @@ class StorageService:
         # Local storage fallback
         dest_path = self.get_file_path(key)
         os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-        os.rename(file_path, dest_path)
+        try:
+            os.replace(file_path, dest_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Storage is on another filesystem: copy (sendfile) and unlink
+            shutil.move(file_path, dest_path)
         return key
 
     def get_file_path(self, key: str) -> str:
@@ -171,15 +231,16 @@ class StorageService:
                     storage_path = f"{self.bucket_name}/{key}"
 
                 url = f"{self.storage_url}/object/{storage_path}"
-                response = requests.get(url, headers=self.headers)
-
-                if response.status_code == 200:
-                    os.makedirs(os.path.dirname(local_path), exist_ok=True)
-                    with open(local_path, 'wb') as f:
-                        f.write(response.content)
-                    return local_path
-                else:
-                    raise Exception(f"Supabase download failed: {response.status_code}")
+                # Stream the body to disk so memory stays at one chunk
+                with self._session.get(url, headers=self.headers, stream=True) as response:
+                    if response.status_code == 200:
+                        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                        with open(local_path, 'wb') as f:
+                            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                                f.write(chunk)
+                        return local_path
+                    else:
+                        raise Exception(f"Supabase download failed: {response.status_code}")
 
             except Exception as e:
                 print(f"Supabase download failed: {e}")
@@ -190,7 +251,8 @@ class StorageService:
                 self.s3_client.download_file(
                     self.bucket_name,
                     key,
-                    local_path
+                    local_path,
+                    Config=self._s3_transfer_config
                 )
                 return local_path
             except Exception as e:
@@ -202,14 +264,27 @@ class StorageService:
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
         if os.path.exists(source_path):
             if source_path != local_path:
-                import shutil
+                # copy2 copies in the kernel via os.sendfile on Linux
                 shutil.copy2(source_path, local_path)
             return local_path
         else:
             raise FileNotFoundError(f"File not found: {key}")
 
+    def mmap_file(self, key: str) -> mmap.mmap:
+        """
+        Map a locally stored file read-only (shares the page cache instead
+        of copying the contents into the process); caller closes the map
+        """
+        file_path = os.path.join(self.local_storage_path, key)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {key}")
+        with open(file_path, 'rb') as f:
+            # The map keeps its own handle, so the file can be closed here
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
     def delete_file(self, key: str):
         """Delete file from storage"""
+        self._forget_exists(key)
         if self.use_supabase:
             try:
                 # Determine storage path
@@ -219,7 +294,7 @@ class StorageService:
                     storage_path = f"{self.bucket_name}/{key}"
 
                 url = f"{self.storage_url}/object/{storage_path}"
-                response = requests.delete(url, headers=self.headers)
+                response = self._session.delete(url, headers=self.headers)
 
                 if response.status_code not in [200, 204]:
                     print(f"Supabase delete failed: {response.text}")
@@ -245,8 +320,26 @@ class StorageService:
         if os.path.exists(file_path):
             os.remove(file_path)
 
+    def _forget_exists(self, key: str):
+        with self._exists_lock:
+            self._exists_cache.pop(key, None)
+
     def file_exists(self, key: str) -> bool:
         """Check if file exists in storage"""
+        if not (self.use_supabase or self.use_s3):
+            return os.path.exists(self.get_file_path(key))
+
+        # Remote lookups cost a round trip; serve repeats from the TTL cache
+        with self._exists_lock:
+            exists = self._exists_cache.get(key)
+        if exists is None:
+            exists = self._remote_file_exists(key)
+            with self._exists_lock:
+                self._exists_cache[key] = exists
+        return exists
+
+    def _remote_file_exists(self, key: str) -> bool:
+        """Check if file exists in Supabase or S3"""
         if self.use_supabase:
             try:
                 # Determine storage path
@@ -256,7 +349,7 @@ class StorageService:
                     storage_path = f"{self.bucket_name}/{key}"
 
                 url = f"{self.storage_url}/object/{storage_path}"
-                response = requests.head(url, headers=self.headers)
+                response = self._session.head(url, headers=self.headers)
                 return response.status_code == 200
             except:
                 return False
@@ -269,5 +362,4 @@ class StorageService:
                 return True
             except:
                 return False
-        else:
-            return os.path.exists(self.get_file_path(key))
+        return False
@@ -1,112 +1,185 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 import cv2
+import fitz  # PyMuPDF
 import numpy as np
-from typing import List, Dict, Any, Optional
+import pandas as pd
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 
-class TableExtractionService:
-    def __init__(self):
-        self.camelot_available = False
-        self.tabula_available = False
+# Whole-document extraction is split into tasks of this many pages
+PAGES_PER_TASK = 4
 
-        try:
-            import camelot
-            self.camelot_available = True
-            print("Camelot loaded successfully")
-        except ImportError:
-            print("Camelot not available, table extraction will be limited")
+# Cells narrower or shorter than this (pixels) are ruling artifacts
+MIN_CELL_SIZE = 8
 
-        try:
-            import tabula
-            self.tabula_available = True
-            print("Tabula loaded successfully")
-        except ImportError:
-            print("Tabula not available, table extraction will be limited")
 
-    def extract_tables_from_image(self, image: np.ndarray) -> List[Dict[str, Any]]:
-        """
-        Extract tables from image using Camelot/Tabula
-        """
-        tables = []
+def _page_chunks(pdf_path: str) -> List[str]:
+    """Page ranges ('1-4', '5-8', ...) covering the whole PDF"""
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    return [
+        f"{first}-{min(first + PAGES_PER_TASK - 1, page_count)}"
+        for first in range(1, page_count + 1, PAGES_PER_TASK)
+    ]
 
-        try:
-            # Save image temporarily for table extraction tools
-            import tempfile
-            import os
 
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_path = temp_file.name
-                cv2.imwrite(temp_path, image)
+class TableResult(dict):
+    """
+    A table extraction result: a plain dict of the table's fields, with
+    'data' (the records) and 'shape' taken from its DataFrame
+    """
 
-            try:
-                # Try Camelot first (better for complex tables)
-                if self.camelot_available:
-                    tables.extend(self._extract_with_camelot(temp_path))
+    def __init__(self, df: pd.DataFrame, **fields):
+        super().__init__(data=df.to_dict('records'), shape=df.shape, **fields)
 
-                # Fallback to Tabula if Camelot fails or not available
-                if not tables and self.tabula_available:
-                    tables.extend(self._extract_with_tabula(temp_path))
 
-            finally:
-                # Clean up temp file
-                os.unlink(temp_path)
+def _line_positions(profile: np.ndarray, min_count: float) -> List[int]:
+    """
+    Centers of the runs of consecutive indices where profile reaches
+    min_count (one position per ruling line, however thick)
+    """
+    indices = np.flatnonzero(profile >= min_count)
+    if indices.size == 0:
+        return []
+    runs = np.split(indices, np.flatnonzero(np.diff(indices) > 1) + 1)
+    return [int(run.mean()) for run in runs]
 
-        except Exception as e:
-            print(f"Table extraction from image failed: {e}")
 
-        return tables
+def _camelot_entries(tables_data, page_number: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Convert a Camelot TableList into table results"""
+    tables = []
+    for table in tables_data:
+        df = table.df
+        tables.append(TableResult(
+            df,
+            method='camelot_pdf',
+            confidence=0.9,
+            bbox=table._bbox if hasattr(table, '_bbox') else None,
+            page=page_number or table.page
+        ))
+    return tables
 
-    def _extract_with_camelot(self, image_path: str) -> List[Dict[str, Any]]:
+
+def _read_camelot_pages(pdf_path: str, pages: str) -> List[Dict[str, Any]]:
+    """Process pool task: Camelot over a page range, returned as table results"""
+    import camelot
+    return _camelot_entries(camelot.read_pdf(pdf_path, pages=pages))
+
+
+class TableExtractionService:
+    def __init__(self, ocr: Optional[Callable[[np.ndarray], Tuple[str, float]]] = None):
         """
-        Extract tables using Camelot
+        ocr: reads a cell image, returning (text, confidence); image tables
+        are only extracted when it is given
         """
-        tables = []
+        self.ocr = ocr
 
-        try:
-            # Camelot works with PDFs, but we can try with images
-            # Note: Camelot is primarily designed for PDFs
-            # This is a simplified implementation
-            tables_data = camelot.read_pdf(image_path, flavor='lattice')
-
-            for table in tables_data:
-                df = table.df
-                tables.append({
-                    'data': df.to_dict('records'),
-                    'shape': df.shape,
-                    'method': 'camelot',
-                    'confidence': 0.8,
-                    'bbox': table._bbox if hasattr(table, '_bbox') else None
-                })
+        # Camelot (pdfminer, ghostscript) and Tabula (JVM) are imported on
+        # first PDF extraction; None until then
+        self.camelot_available = None
+        self.tabula_available = None
 
-        except Exception as e:
-            print(f"Camelot extraction failed: {e}")
+        # Per-thread image buffers for the ruling-line masks, reused across
+        # same-sized pages
+        self._buffers = threading.local()
 
-        return tables
+    def _ensure_camelot(self) -> bool:
+        """Import Camelot on first use"""
+        if self.camelot_available is None:
+            try:
+                import camelot
+                self.camelot = camelot
+                self.camelot_available = True
+                print("Camelot loaded successfully")
+            except ImportError:
+                self.camelot_available = False
+                print("Camelot not available, table extraction will be limited")
+        return self.camelot_available
+
+    def _ensure_tabula(self) -> bool:
+        """Import Tabula on first use"""
+        if self.tabula_available is None:
+            try:
+                import tabula
+                self.tabula = tabula
+                self.tabula_available = True
+                print("Tabula loaded successfully")
+            except ImportError:
+                self.tabula_available = False
+                print("Tabula not available, table extraction will be limited")
+        return self.tabula_available
 
-    def _extract_with_tabula(self, image_path: str) -> List[Dict[str, Any]]:
+    def extract_tables_from_image(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """
-        Extract tables using Tabula
+        Extract tables from image: cells are located from the ruling lines
+        and read with the OCR callable
         """
         tables = []
 
+        # Camelot/Tabula read a PDF's text layer, which an image doesn't have
+        if self.ocr is None:
+            return tables
+
         try:
-            # Tabula also works with PDFs, but we can try with images
-            # This is a simplified implementation
-            dfs = tabula.read_pdf(image_path, pages='all', multiple_tables=True)
-
-            for df in dfs:
-                tables.append({
-                    'data': df.to_dict('records'),
-                    'shape': df.shape,
-                    'method': 'tabula',
-                    'confidence': 0.7,
-                    'bbox': None  # Tabula doesn't provide bbox info
-                })
+            horizontal, vertical = self._ruling_masks(image)
+            grid = cv2.bitwise_or(horizontal, vertical, dst=self._buffer('grid', horizontal.shape))
+
+            for region in self._regions_from_grid(grid):
+                x1, y1, x2, y2 = region['bbox']
+                table = self._read_table_cells(
+                    image[y1:y2, x1:x2], horizontal[y1:y2, x1:x2], vertical[y1:y2, x1:x2]
+                )
+                if table is not None:
+                    df, confidence = table
+                    tables.append(TableResult(
+                        df,
+                        method='opencv_ocr',
+                        confidence=confidence,
+                        bbox=region['bbox']
+                    ))
 
         except Exception as e:
-            print(f"Tabula extraction failed: {e}")
+            print(f"Table extraction from image failed: {e}")
 
         return tables
 
+    def _read_table_cells(self, image: np.ndarray, horizontal: np.ndarray,
+                          vertical: np.ndarray) -> Optional[Tuple[pd.DataFrame, float]]:
+        """
+        OCR every cell between the ruling lines of one table region; None if
+        the rulings don't form a grid
+        """
+        height, width = horizontal.shape
+
+        # Rows/columns that are mostly ruling ink are the grid lines
+        row_lines = _line_positions(np.count_nonzero(horizontal, axis=1), width * 0.5)
+        column_lines = _line_positions(np.count_nonzero(vertical, axis=0), height * 0.5)
+        if len(row_lines) < 2 or len(column_lines) < 2:
+            return None
+
+        rows = []
+        confidences = []
+        for top, bottom in zip(row_lines, row_lines[1:]):
+            if bottom - top < MIN_CELL_SIZE:
+                continue
+            row = []
+            for left, right in zip(column_lines, column_lines[1:]):
+                if right - left < MIN_CELL_SIZE:
+                    continue
+                text, confidence = self.ocr(image[top:bottom, left:right])
+                text = text.strip()
+                row.append(text)
+                if text:
+                    confidences.append(confidence)
+            rows.append(row)
+
+        if not rows:
+            return None
+        return pd.DataFrame(rows), float(np.mean(confidences)) if confidences else 0.0
+
     def extract_tables_from_pdf(self, pdf_path: str, page_number: int = None) -> List[Dict[str, Any]]:
         """
         Extract tables directly from PDF (preferred method)
@@ -115,11 +188,11 @@ class TableExtractionService:
 
         try:
             # Try Camelot first
-            if self.camelot_available:
+            if self._ensure_camelot():
                 tables.extend(self._extract_from_pdf_camelot(pdf_path, page_number))
 
             # Fallback to Tabula
-            if not tables and self.tabula_available:
+            if not tables and self._ensure_tabula():
                 tables.extend(self._extract_from_pdf_tabula(pdf_path, page_number))
 
         except Exception as e:
@@ -132,24 +205,25 @@ class TableExtractionService:
         Extract tables from PDF using Camelot
         """
         tables = []
+        if not self._ensure_camelot():
+            return tables
 
         try:
             # Read tables from PDF
             if page_number:
-                tables_data = camelot.read_pdf(pdf_path, pages=str(page_number))
+                tables_data = self.camelot.read_pdf(pdf_path, pages=str(page_number))
+                tables.extend(_camelot_entries(tables_data, page_number))
             else:
-                tables_data = camelot.read_pdf(pdf_path, pages='all')
-
-            for table in tables_data:
-                df = table.df
-                tables.append({
-                    'data': df.to_dict('records'),
-                    'shape': df.shape,
-                    'method': 'camelot_pdf',
-                    'confidence': 0.9,
-                    'bbox': table._bbox if hasattr(table, '_bbox') else None,
-                    'page': page_number or table.page
-                })
+                chunks = _page_chunks(pdf_path)
+                if len(chunks) <= 1:
+                    tables.extend(_camelot_entries(self.camelot.read_pdf(pdf_path, pages='all')))
+                else:
+                    # Camelot (pdfminer) is pure Python and holds the GIL, so
+                    # page ranges are parsed in separate processes
+                    workers = min(len(chunks), os.cpu_count() or 1)
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        for chunk_tables in executor.map(_read_camelot_pages, repeat(pdf_path), chunks):
+                            tables.extend(chunk_tables)
 
         except Exception as e:
             print(f"Camelot PDF extraction failed: {e}")
@@ -161,23 +235,35 @@ class TableExtractionService:
         Extract tables from PDF using Tabula
         """
         tables = []
+        if not self._ensure_tabula():
+            return tables
 
         try:
             # Read tables from PDF
             if page_number:
-                dfs = tabula.read_pdf(pdf_path, pages=page_number, multiple_tables=True)
+                dfs = self.tabula.read_pdf(pdf_path, pages=page_number, multiple_tables=True)
             else:
-                dfs = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
+                chunks = _page_chunks(pdf_path)
+                if len(chunks) <= 1:
+                    dfs = self.tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
+                else:
+                    # Tabula does its work in Java, so threads are enough to
+                    # run page ranges concurrently
+                    def read_chunk(pages: str):
+                        return self.tabula.read_pdf(pdf_path, pages=pages, multiple_tables=True, silent=True)
+
+                    workers = min(len(chunks), os.cpu_count() or 1)
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        dfs = [df for chunk_dfs in executor.map(read_chunk, chunks) for df in chunk_dfs]
 
             for i, df in enumerate(dfs):
-                tables.append({
-                    'data': df.to_dict('records'),
-                    'shape': df.shape,
-                    'method': 'tabula_pdf',
-                    'confidence': 0.8,
-                    'bbox': None,
-                    'page': page_number or (i + 1)
-                })
+                tables.append(TableResult(
+                    df,
+                    method='tabula_pdf',
+                    confidence=0.8,
+                    bbox=None,
+                    page=page_number or (i + 1)
+                ))
 
         except Exception as e:
             print(f"Tabula PDF extraction failed: {e}")
@@ -188,46 +274,96 @@ class TableExtractionService:
         """
         Detect table regions in an image using computer vision
         """
-        table_regions = []
-
         try:
-            # Convert to grayscale
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image
+            horizontal, vertical = self._ruling_masks(image)
 
-            # Apply morphological operations to detect table structure
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 25))
-            morph = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
+            # The ruling grid (built in place); its outer contour bounds the table
+            grid = cv2.bitwise_or(horizontal, vertical, dst=horizontal)
+            return self._regions_from_grid(grid)
 
-            # Find contours
-            contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        except Exception as e:
+            print(f"Table region detection failed: {e}")
+            return []
 
-            height, width = gray.shape
+    def _ruling_masks(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Masks of the long horizontal and vertical strokes (table rulings),
+        in this thread's scratch buffers
+        """
+        height, width = image.shape[:2]
+
+        # Convert to grayscale
+        if len(image.shape) == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._buffer('gray', (height, width)))
+        else:
+            gray = image
+
+        # Binarize (ink = 255), then keep only long horizontal and vertical
+        # strokes: openings with thin line kernels, which cost far less
+        # than a square kernel and pick out table rulings, not text blobs
+        binary = cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, -2,
+            dst=self._buffer('binary', (height, width))
+        )
+        h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(width // 30, 1), 1))
+        v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(height // 30, 1)))
+        horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN, h_kernel,
+                                      dst=self._buffer('horizontal', (height, width)))
+        vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN, v_kernel,
+                                    dst=self._buffer('vertical', (height, width)))
+        return horizontal, vertical
+
+    def _regions_from_grid(self, grid: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Table-like regions among the outer contours of the ruling grid
+        """
+        table_regions = []
+        height, width = grid.shape
 
-            for contour in contours:
-                x, y, w, h = cv2.boundingRect(contour)
-                area = cv2.contourArea(contour)
-                aspect_ratio = w / h
+        # Find contours
+        contours, _ = cv2.findContours(grid, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-                # Filter for table-like regions
-                if (area > (width * height * 0.05) and  # At least 5% of image area
-                    aspect_ratio > 1.5 and  # Wider than tall
-                    w > 100 and h > 50):   # Minimum size
+        min_area = width * height * 0.05  # At least 5% of image area
 
-                    table_regions.append({
-                        'bbox': [x, y, x + w, y + h],
-                        'confidence': 0.6,
-                        'area': area,
-                        'aspect_ratio': aspect_ratio
-                    })
+        # Filter for table-like regions, cheapest checks first: the
+        # bounding box bounds the contour area, so small boxes are
+        # rejected before contourArea is computed
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w <= 100 or h <= 50:  # Minimum size
+                continue
 
-        except Exception as e:
-            print(f"Table region detection failed: {e}")
+            aspect_ratio = w / h
+            if aspect_ratio <= 1.5:  # Wider than tall
+                continue
+
+            if w * h <= min_area:
+                continue
+
+            area = cv2.contourArea(contour)
+            if area <= min_area:
+                continue
+
+            table_regions.append({
+                'bbox': [x, y, x + w, y + h],
+                'confidence': 0.6,
+                'area': area,
+                'aspect_ratio': aspect_ratio
+            })
 
         return table_regions
 
+    def _buffer(self, name: str, shape) -> np.ndarray:
+        """
+        This thread's uint8 scratch buffer called name, reallocated only when
+        the shape changes
+        """
+        buffer = getattr(self._buffers, name, None)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            setattr(self._buffers, name, buffer)
+        return buffer
+
     def merge_table_data(self, tables: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Merge multiple table extractions into a single result
@@ -235,16 +371,27 @@ class TableExtractionService:
         if not tables:
             return {'tables': [], 'summary': {}}
 
-        # For now, return the table with highest confidence
-        best_table = max(tables, key=lambda x: x.get('confidence', 0))
+        # For now, return the table with highest confidence (the first one
+        # on ties); summary values are gathered in the same pass
+        best_table = None
+        best_confidence = None
+        methods_used = set()
+        total_confidence = 0.0
+        for table in tables:
+            confidence = table.get('confidence', 0)
+            total_confidence += confidence
+            methods_used.add(table['method'])
+            if best_table is None or confidence > best_confidence:
+                best_table = table
+                best_confidence = confidence
 
         return {
             'tables': tables,
             'best_table': best_table,
             'summary': {
                 'total_tables': len(tables),
-                'methods_used': list(set(t['method'] for t in tables)),
-                'avg_confidence': sum(t.get('confidence', 0) for t in tables) / len(tables)
+                'methods_used': list(methods_used),
+                'avg_confidence': total_confidence / len(tables)
             }
         }
 
@@ -1,6 +1,23 @@
 import re
+import threading
+from collections import OrderedDict
+import numpy as np
 import torch
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+
+# Patterns compiled once at import instead of looked up per call
+_WS_RE = re.compile(r'\s+')
+_STRIP_RE = re.compile(r'[^\w\s\-\.,;:!?()[\]{}"\'/\\]')
+_INDIC_SCRIPT_RE = re.compile(r'[\u0900-\u0D7F]')
+
+# Batches of OCR snippets shorter than this many words are translated with
+# greedy decoding; beam search costs ~num_beams times more for no gain there
+GREEDY_MAX_WORDS = 8
+
+# Normalization results kept for repeated inputs (headers, column names,
+# numbers recur across pages), least recently used evicted first
+NORMALIZE_CACHE_SIZE = 4096
 
 
 class TextNormalizationService:
@@ -11,6 +28,9 @@ class TextNormalizationService:
         self.en_indic_model = None
         self.indic_en_model = None
 
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
         # Skip Google Translate for now due to compatibility issues
         self.translator_loaded = False
         print("Google Translate skipped (compatibility issues)")
@@ -27,6 +47,22 @@ class TextNormalizationService:
             '५': '5', '६': '6', '७': '7', '८': '8', '९': '9'
         }
 
+        # Bengali digit mapping
+        self.bengali_digits = {
+            '০': '0', '১': '1', '২': '2', '৩': '3', '৪': '4',
+            '৫': '5', '৬': '6', '৭': '7', '৮': '8', '৯': '9'
+        }
+
+        # Both mappings as one translate table (a single C-level pass)
+        self._digit_table = str.maketrans({**self.devanagari_digits, **self.bengali_digits})
+
+        # Common OCR confusions in English text, applied in one translate pass
+        self._ocr_corrections = str.maketrans({
+            '1': 'l',  # Lowercase l might be confused with 1
+            '|': 'l',  # or with |
+            '0': 'O'   # Uppercase O might be confused with 0
+        })
+
         # Common Indic language patterns
         self.indic_patterns = {
             'hindi': r'[\u0900-\u097F]',
@@ -40,6 +76,30 @@ class TextNormalizationService:
             'malayalam': r'[\u0D00-\u0D7F]'
         }
 
+        # First codepoint of each language's script block above
+        self.indic_block_starts = {
+            'hindi': 0x0900,
+            'bengali': 0x0980,
+            'tamil': 0x0B80,
+            'telugu': 0x0C00,
+            'marathi': 0x0900,
+            'gujarati': 0x0A80,
+            'kannada': 0x0C80,
+            'punjabi': 0x0A00,
+            'malayalam': 0x0D00
+        }
+
+        # (language, block index) in detection order; a language sharing an
+        # earlier language's block (Marathi uses Devanagari) can never be
+        # detected, so it isn't checked
+        self._detection_blocks = []
+        seen_blocks = set()
+        for lang, block_start in self.indic_block_starts.items():
+            block = (block_start - 0x0900) >> 7
+            if block not in seen_blocks:
+                seen_blocks.add(block)
+                self._detection_blocks.append((lang, block))
+
         # Language codes for IndicTrans2
         self.lang_codes = {
             'hindi': 'hin_Deva',
@@ -65,6 +125,10 @@ class TextNormalizationService:
                 'original_language': 'unknown'
             }
 
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+
         try:
             # Clean the text first
             cleaned_text = self._clean_text(text)
@@ -78,6 +142,7 @@ class TextNormalizationService:
             else:
                 normalized_result = self._normalize_english_text(cleaned_text)
 
+            self._cache_put(text, normalized_result)
             return normalized_result
 
         except Exception as e:
@@ -90,15 +155,39 @@ class TextNormalizationService:
                 'error': str(e)
             }
 
+    def _cache_get(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached result for text (a copy, so callers may modify it), or None
+        """
+        with self._cache_lock:
+            result = self._cache.get(text)
+            if result is None:
+                return None
+            self._cache.move_to_end(text)
+        return dict(result)
+
+    def _cache_put(self, text: str, result: Dict[str, Any]):
+        """
+        Cache result for text, unless it is a fallback after a failure (it
+        carries an 'error'), so a transient failure isn't repeated from cache
+        """
+        if 'error' in result:
+            return
+        with self._cache_lock:
+            self._cache[text] = dict(result)
+            self._cache.move_to_end(text)
+            if len(self._cache) > NORMALIZE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
     def _clean_text(self, text: str) -> str:
         """
         Clean and preprocess text
         """
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WS_RE.sub(' ', text)
 
         # Remove special characters but keep important punctuation
-        text = re.sub(r'[^\w\s\-\.,;:!?()[\]{}"\'/\\]', '', text)
+        text = _STRIP_RE.sub('', text)
 
         # Strip leading/trailing whitespace
         text = text.strip()
@@ -109,10 +198,20 @@ class TextNormalizationService:
         """
         Detect the language of the text
         """
-        # Check for Indic languages first
-        for lang, pattern in self.indic_patterns.items():
-            if re.search(pattern, text):
-                return lang
+        # Pure ASCII (most English OCR output) can't contain Indic script
+        if text.isascii():
+            return 'english'
+
+        # Check for Indic languages first; one scan rules them all out
+        if _INDIC_SCRIPT_RE.search(text):
+            # One vectorized pass marks which script blocks occur; languages
+            # are then checked in their usual order
+            codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+            blocks = (codepoints - 0x0900) >> 7
+            present = np.bincount(blocks[blocks < 9], minlength=9)
+            for lang, block in self._detection_blocks:
+                if present[block]:
+                    return lang
 
         # Default to English if no Indic characters found
         return 'english'
@@ -121,24 +220,35 @@ class TextNormalizationService:
         """
         Normalize Indic language text using IndicTrans2
         """
+        return self._normalize_indic_batch([text], language)[0]
+
+    def _normalize_indic_batch(self, texts: List[str], language: str) -> List[Dict[str, Any]]:
+        """
+        Normalize Indic texts of one language using IndicTrans2, translating
+        the whole batch with a single generate call
+        """
         try:
             # Preprocess using IndicProcessor
             if self.indic_processor:
-                processed_text = self.indic_processor.preprocess_batch([text])[0]
+                processed_texts = self.indic_processor.preprocess_batch(texts)
             else:
-                processed_text = text
+                processed_texts = list(texts)
 
             # Apply language-specific normalization rules
             if language == 'hindi':
-                processed_text = self._normalize_hindi(processed_text)
+                processed_texts = [self._normalize_hindi(text) for text in processed_texts]
             elif language == 'bengali':
-                processed_text = self._normalize_bengali(processed_text)
+                processed_texts = [self._normalize_bengali(text) for text in processed_texts]
 
             # Transliterate to English using IndicTrans2
-            transliterated_text = processed_text
-            translation_confidence = 0.8
+            transliterated_texts = processed_texts
+            confidences = [0.8] * len(texts)
+            errors = [None] * len(texts)
 
-            if self.indictrans2_loaded and language in self.lang_codes and len(processed_text.strip()) > 0:
+            # Empty texts are left out of the batch
+            to_translate = [i for i, text in enumerate(processed_texts) if len(text.strip()) > 0]
+
+            if self.indictrans2_loaded and language in self.lang_codes and to_translate:
                 try:
                     # Use Indic to English model (most common for OCR)
                     src_lang = self.lang_codes[language]
@@ -146,55 +256,83 @@ class TextNormalizationService:
 
                     # Tokenize
                     inputs = self.indic_en_tokenizer(
-                        [processed_text],
+                        [processed_texts[i] for i in to_translate],
                         truncation=True,
                         padding="longest",
                         return_tensors="pt"
                     )
+                    inputs = {name: tensor.to(self.indic_en_model.device) for name, tensor in inputs.items()}
+
+                    longest = max(len(processed_texts[i].split()) for i in to_translate)
+                    num_beams = 1 if longest < GREEDY_MAX_WORDS else 5
 
                     # Generate translation
-                    with torch.no_grad():
+                    with torch.inference_mode():
                         generated_tokens = self.indic_en_model.generate(
                             **inputs,
                             max_length=256,
-                            num_beams=5,
+                            num_beams=num_beams,
                             num_return_sequences=1,
+                            use_cache=True,
                         )
 
                     # Decode
-                    transliterated_text = self.indic_en_tokenizer.batch_decode(
+                    decoded = self.indic_en_tokenizer.batch_decode(
                         generated_tokens, skip_special_tokens=True
-                    )[0]
+                    )
+                    transliterated_texts = list(processed_texts)
+                    for i, translation in zip(to_translate, decoded):
+                        transliterated_texts[i] = translation
 
-                    translation_confidence = 0.95  # High confidence for IndicTrans2
+                    for i in to_translate:
+                        confidences[i] = 0.95  # High confidence for IndicTrans2
 
                 except Exception as e:
                     print(f"IndicTrans2 translation failed: {e}")
-                    transliterated_text = processed_text
-                    translation_confidence = 0.3
+                    transliterated_texts = processed_texts
+                    for i in to_translate:
+                        confidences[i] = 0.3
+                        errors[i] = str(e)
 
             # Postprocess if IndicProcessor available
-            if self.indic_processor and transliterated_text != processed_text:
-                try:
-                    transliterated_text = self.indic_processor.postprocess_batch([transliterated_text])[0]
-                except Exception as e:
-                    print(f"Postprocessing failed: {e}")
-
-            return {
-                'normalized_text': transliterated_text,
-                'confidence': translation_confidence,
-                'detected_language': language,
-                'original_language': language
-            }
+            if self.indic_processor and transliterated_texts is not processed_texts:
+                changed = [i for i in range(len(texts)) if transliterated_texts[i] != processed_texts[i]]
+                if changed:
+                    try:
+                        postprocessed = self.indic_processor.postprocess_batch(
+                            [transliterated_texts[i] for i in changed]
+                        )
+                        for i, text in zip(changed, postprocessed):
+                            transliterated_texts[i] = text
+                    except Exception as e:
+                        print(f"Postprocessing failed: {e}")
+
+            results = [
+                {
+                    'normalized_text': text,
+                    'confidence': confidence,
+                    'detected_language': language,
+                    'original_language': language
+                }
+                for text, confidence in zip(transliterated_texts, confidences)
+            ]
+            for result, error in zip(results, errors):
+                if error is not None:
+                    result['error'] = error
+            return results
 
         except Exception as e:
             print(f"Indic text normalization failed: {e}")
-            return {
-                'normalized_text': text,
-                'confidence': 0.2,
-                'detected_language': language,
-                'original_language': language
-            }
+            return [
+                {
+                    'normalized_text': text,
+                    'confidence': 0.2,
+                    'detected_language': language,
+                    'original_language': language,
+                    'error': str(e)
+                }
+                for text in texts
+            ]
 
     def _normalize_english_text(self, text: str) -> Dict[str, Any]:
         """
@@ -203,18 +341,8 @@ class TextNormalizationService:
         # Standard English normalization
         normalized = text.strip()
 
-        # Fix common OCR errors
-        corrections = {
-            'l': ['1', '|'],  # Lowercase l might be confused with 1 or |
-            'O': ['0'],       # Uppercase O might be confused with 0
-            'I': ['1', '|'],  # Uppercase I might be confused with 1 or |
-        }
-
-        # Apply basic corrections (this is a simplified approach)
-        for correct, incorrect_list in corrections.items():
-            for incorrect in incorrect_list:
-                # Only replace if it makes sense in context
-                normalized = self._contextual_replace(normalized, incorrect, correct)
+        # Fix common OCR errors (this is a simplified approach)
+        normalized = normalized.translate(self._ocr_corrections)
 
         return {
             'normalized_text': normalized,
@@ -229,29 +357,57 @@ class TextNormalizationService:
         """
         # Add Hindi-specific normalization rules here
         # For example: handling different vowel signs, conjunct consonants, etc.
-        return text
+        return self._normalize_digits(text)
 
     def _normalize_bengali(self, text: str) -> str:
         """
         Bengali-specific normalization
         """
         # Add Bengali-specific normalization rules here
-        return text
+        return self._normalize_digits(text)
 
-    def _contextual_replace(self, text: str, old_char: str, new_char: str) -> str:
+    def _normalize_digits(self, text: str) -> str:
         """
-        Context-aware character replacement
+        Convert Devanagari and Bengali digits to ASCII digits
         """
-        # This is a simplified implementation
-        # In practice, you'd want more sophisticated context analysis
-        return text.replace(old_char, new_char)
+        return text.translate(self._digit_table)
 
     def batch_normalize(self, texts: List[str]) -> List[Dict[str, Any]]:
         """
         Normalize multiple texts
         """
-        results = []
-        for text in texts:
-            result = self.normalize_text(text)
-            results.append(result)
+        results = [None] * len(texts)
+
+        # Clean and detect every text first, then normalize each Indic
+        # language as one batch (one IndicTrans2 generate per language)
+        indic_batches = {}
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results[i] = self.normalize_text(text)
+                continue
+
+            cached = self._cache_get(text)
+            if cached is not None:
+                results[i] = cached
+                continue
+
+            try:
+                cleaned_text = self._clean_text(text)
+                detected_language = self._detect_language(cleaned_text)
+            except Exception:
+                results[i] = self.normalize_text(text)
+                continue
+
+            if detected_language in self.indic_patterns:
+                indic_batches.setdefault(detected_language, []).append((i, cleaned_text))
+            else:
+                results[i] = self._normalize_english_text(cleaned_text)
+                self._cache_put(text, results[i])
+
+        for language, batch in indic_batches.items():
+            normalized = self._normalize_indic_batch([text for _, text in batch], language)
+            for (i, _), result in zip(batch, normalized):
+                results[i] = result
+                self._cache_put(texts[i], result)
+
         return results
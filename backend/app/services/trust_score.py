@@ -1,8 +1,67 @@
+import logging
+from functools import lru_cache
 from typing import Dict, Any, List
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+# Numba is optional; without it batches are scored with NumPy array ops
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Explanations each service remembers for recent (score, confidences) pairs
+EXPLANATION_CACHE_SIZE = 1024
+
+# Stands in for a component missing from confidences in explanation cache keys
+_MISSING = object()
+
+
+def _score_batch_scan(values: np.ndarray, thresholds: np.ndarray, weights: np.ndarray,
+                      factors: np.ndarray) -> np.ndarray:
+    """
+    Trust scores for a batch in one pass: values is (components, n), factors
+    is (n, k) penalty multipliers padded with 1.0. Accumulates in the same
+    order as TrustScoreService.calculate_trust_score
+    """
+    n = values.shape[1]
+    scores = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        score = 0.0
+        for c in range(values.shape[0]):
+            value = values[c, i]
+            if value < thresholds[c]:
+                value = thresholds[c]
+            score += value * weights[c]
+        for k in range(factors.shape[1]):
+            score *= factors[i, k]
+        scores[i] = min(1.0, max(0.0, score))
+    return scores
+
+
+if njit is not None:
+    _score_batch = njit(cache=True)(_score_batch_scan)
+else:
+    _score_batch = None
+
 
 class TrustScoreService:
+    # Confidence components, and their defaults when missing
+    COMPONENTS = ('ocr_confidence', 'translation_confidence', 'pii_confidence', 'layout_confidence')
+    COMPONENT_DEFAULTS = (0.5, 0.5, 1.0, 0.8)  # PII defaults to high if no PII
+
+    # One batch row of component confidences, packed by np.fromiter
+    CONFIDENCE_ROW = np.dtype([(component, np.float64) for component in COMPONENTS])
+
+    # Explanation entry (name, description) for each of COMPONENTS
+    EXPLANATION_COMPONENTS = (
+        ('ocr_quality', 'Text extraction quality from OCR'),
+        ('text_normalization', 'Text normalization and transliteration quality'),
+        ('pii_detection', 'Confidence in PII detection results'),
+        ('layout_analysis', 'Layout detection and region identification'),
+    )
+
     def __init__(self):
         # Weight configuration for different confidence sources
         # These weights can be tuned based on empirical data
@@ -31,10 +90,37 @@ class TrustScoreService:
             'mixed_languages': 0.2      # Mixed language content
         }
 
+        self._refresh_vectors()
+
+    def _refresh_vectors(self):
+        """
+        Cache weights/thresholds in COMPONENTS order and penalty multipliers,
+        so scoring doesn't go through the dicts; rebuilt whenever they change
+        """
+        self._weight_vec = tuple(self.weights[c] for c in self.COMPONENTS)
+        self._thresh_vec = tuple(self.thresholds[c] for c in self.COMPONENTS)
+        self._pen_mult = {name: 1 - value for name, value in self.penalties.items()}
+        self._weight_array = np.array(self._weight_vec, dtype=np.float64)
+        self._thresh_array = np.array(self._thresh_vec, dtype=np.float64)
+
+        # Score of empty confidences (every component at its default)
+        empty_score = sum(
+            max(default, threshold) * weight
+            for default, threshold, weight in zip(self.COMPONENT_DEFAULTS, self._thresh_vec, self._weight_vec)
+        )
+        self._empty_score = round(max(0.0, min(1.0, empty_score)), 3)
+
+        # Explanations include the weights, so cached ones are dropped too
+        self._cached_explanation = lru_cache(maxsize=EXPLANATION_CACHE_SIZE)(self._build_explanation)
+
     def calculate_trust_score(self, confidences: Dict[str, Any]) -> float:
         """
         Calculate overall trust score from component confidences
         """
+        # Nothing reported (e.g. a failed service): the all-defaults score
+        if isinstance(confidences, dict) and not confidences:
+            return self._empty_score
+
         try:
             # Extract individual confidence scores
             ocr_conf = confidences.get('ocr_confidence', 0.5)
@@ -43,39 +129,107 @@ class TrustScoreService:
             layout_conf = confidences.get('layout_confidence', 0.8)
 
             # Apply minimum thresholds
-            ocr_conf = max(ocr_conf, self.thresholds['ocr_confidence'])
-            translation_conf = max(translation_conf, self.thresholds['translation_confidence'])
-            pii_conf = max(pii_conf, self.thresholds['pii_confidence'])
-            layout_conf = max(layout_conf, self.thresholds['layout_confidence'])
+            ocr_t, translation_t, pii_t, layout_t = self._thresh_vec
+            if ocr_conf < ocr_t:
+                ocr_conf = ocr_t
+            if translation_conf < translation_t:
+                translation_conf = translation_t
+            if pii_conf < pii_t:
+                pii_conf = pii_t
+            if layout_conf < layout_t:
+                layout_conf = layout_t
 
             # Calculate weighted average
+            ocr_w, translation_w, pii_w, layout_w = self._weight_vec
             weighted_score = (
-                ocr_conf * self.weights['ocr_confidence'] +
-                translation_conf * self.weights['translation_confidence'] +
-                pii_conf * self.weights['pii_confidence'] +
-                layout_conf * self.weights['layout_confidence']
+                ocr_conf * ocr_w +
+                translation_conf * translation_w +
+                pii_conf * pii_w +
+                layout_conf * layout_w
             )
 
-            # Apply any contextual penalties
-            penalties = confidences.get('penalties', [])
-            for penalty in penalties:
-                if penalty in self.penalties:
-                    weighted_score *= (1 - self.penalties[penalty])
+            # Apply any contextual penalties (usually none)
+            penalties = confidences.get('penalties')
+            if penalties:
+                pen_mult = self._pen_mult
+                for penalty in penalties:
+                    factor = pen_mult.get(penalty)
+                    if factor is not None:
+                        weighted_score *= factor
 
             # Ensure score is between 0 and 1
             trust_score = max(0.0, min(1.0, weighted_score))
 
             return round(trust_score, 3)
 
-        except Exception as e:
-            print(f"Trust score calculation failed: {e}")
+        except Exception:
+            logger.exception("Trust score calculation failed")
             return 0.5  # Default to medium confidence
 
     def calculate_batch_trust_scores(self, confidences_list: List[Dict[str, Any]]) -> List[float]:
         """
-        Calculate trust scores for a batch of confidences
+        Calculate trust scores for a batch of confidences; the same formula
+        as calculate_trust_score, evaluated over the whole batch with NumPy
+        (or a compiled kernel when Numba is installed)
         """
-        return [self.calculate_trust_score(confidences) for confidences in confidences_list]
+        if not confidences_list:
+            return []
+
+        pen_mult = self._pen_mult
+        ocr_key, translation_key, pii_key, layout_key = self.COMPONENTS
+        ocr_default, translation_default, pii_default, layout_default = self.COMPONENT_DEFAULTS
+
+        try:
+            # Confidences packed row by row straight into a preallocated
+            # array, viewed as one column per component; and per item the
+            # factors of the penalties it lists (in order)
+            n = len(confidences_list)
+            rows = np.fromiter((
+                (confidences.get(ocr_key, ocr_default),
+                 confidences.get(translation_key, translation_default),
+                 confidences.get(pii_key, pii_default),
+                 confidences.get(layout_key, layout_default))
+                for confidences in confidences_list
+            ), dtype=self.CONFIDENCE_ROW, count=n)
+            values = rows.view(np.float64).reshape(n, len(self.COMPONENTS)).T
+            penalty_factors = [
+                [pen_mult[penalty] for penalty in penalties if penalty in pen_mult]
+                if (penalties := confidences.get('penalties')) else []
+                for confidences in confidences_list
+            ]
+        except (TypeError, ValueError, AttributeError):
+            # Malformed items get calculate_trust_score's fallback handling
+            return [self.calculate_trust_score(confidences) for confidences in confidences_list]
+
+        if np.isnan(values).any():
+            # None confidences became NaN; handle those items one by one
+            return [self.calculate_trust_score(confidences) for confidences in confidences_list]
+
+        max_penalties = max(map(len, penalty_factors))
+        factors = np.ones((len(penalty_factors), max_penalties), dtype=np.float64)
+        if max_penalties:
+            for i, row in enumerate(penalty_factors):
+                factors[i, :len(row)] = row
+
+        if _score_batch is not None:
+            scores = _score_batch(values, self._thresh_array, self._weight_array, factors)
+            return [round(score, 3) for score in scores.tolist()]
+
+        # Apply minimum thresholds
+        np.maximum(values, self._thresh_array[:, None], out=values)
+
+        # Weighted sum and penalty factors, accumulated in the same order as
+        # calculate_trust_score so both give identical (rounded) scores
+        weights = self._weight_vec
+        scores = values[0] * weights[0]
+        for j in range(1, len(weights)):
+            scores += values[j] * weights[j]
+        for k in range(max_penalties):
+            scores *= factors[:, k]
+
+        np.clip(scores, 0.0, 1.0, out=scores)
+
+        return [round(score, 3) for score in scores.tolist()]
 
     def get_trust_score_distribution(self, trust_scores: List[float]) -> Dict[str, Any]:
         """
@@ -84,23 +238,29 @@ class TrustScoreService:
         if not trust_scores:
             return {}
 
-        scores = np.array(trust_scores)
+        scores = np.asarray(trust_scores, dtype=np.float64)
+
+        # One partition for all quartiles; the median is q2
+        q1, q2, q3 = np.percentile(scores, [25, 50, 75])
+
+        # Low (< 0.3), medium and high (>= 0.7) trust counts in one pass
+        low, medium, high = np.bincount(np.digitize(scores, [0.3, 0.7]), minlength=3)
 
         return {
-            'mean': float(np.mean(scores)),
-            'median': float(np.median(scores)),
-            'std': float(np.std(scores)),
-            'min': float(np.min(scores)),
-            'max': float(np.max(scores)),
+            'mean': float(scores.mean()),
+            'median': float(q2),
+            'std': float(scores.std()),
+            'min': float(scores.min()),
+            'max': float(scores.max()),
             'quartiles': {
-                'q1': float(np.percentile(scores, 25)),
-                'q2': float(np.percentile(scores, 50)),
-                'q3': float(np.percentile(scores, 75))
+                'q1': float(q1),
+                'q2': float(q2),
+                'q3': float(q3)
             },
             'distribution': {
-                'low_trust': int(np.sum(scores < 0.3)),
-                'medium_trust': int(np.sum((scores >= 0.3) & (scores < 0.7))),
-                'high_trust': int(np.sum(scores >= 0.7))
+                'low_trust': int(low),
+                'medium_trust': int(medium),
+                'high_trust': int(high)
             }
         }
 
@@ -123,31 +283,42 @@ class TrustScoreService:
     def get_trust_score_explanation(self, trust_score: float, confidences: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate human-readable explanation of trust score
+
+        Explanations are memoized on the score and the component confidences;
+        the returned dict is shared, so callers must not modify it
         """
+        component_values = tuple(confidences.get(component, _MISSING) for component in self.COMPONENTS)
+        try:
+            hash(component_values)
+        except TypeError:
+            # Unhashable confidence values can't be a cache key
+            build = self._build_explanation
+        else:
+            build = self._cached_explanation
+        return build(trust_score, component_values)
+
+    def _build_explanation(self, trust_score: float, component_values: tuple) -> Dict[str, Any]:
+        """
+        Explanation for trust_score and the COMPONENTS confidences
+        (_MISSING where not reported)
+        """
+        confidences = {
+            component: value
+            for component, value in zip(self.COMPONENTS, component_values)
+            if value is not _MISSING
+        }
         explanation = {
             'overall_score': trust_score,
             'confidence_level': self._get_confidence_level(trust_score),
             'component_scores': {
-                'ocr_quality': {
-                    'score': confidences.get('ocr_confidence', 0.5),
-                    'weight': self.weights['ocr_confidence'],
-                    'description': 'Text extraction quality from OCR'
-                },
-                'text_normalization': {
-                    'score': confidences.get('translation_confidence', 0.5),
-                    'weight': self.weights['translation_confidence'],
-                    'description': 'Text normalization and transliteration quality'
-                },
-                'pii_detection': {
-                    'score': confidences.get('pii_confidence', 1.0),
-                    'weight': self.weights['pii_confidence'],
-                    'description': 'Confidence in PII detection results'
-                },
-                'layout_analysis': {
-                    'score': confidences.get('layout_confidence', 0.8),
-                    'weight': self.weights['layout_confidence'],
-                    'description': 'Layout detection and region identification'
+                name: {
+                    'score': confidences.get(component, default),
+                    'weight': weight,
+                    'description': description
                 }
+                for (name, description), component, default, weight in zip(
+                    self.EXPLANATION_COMPONENTS, self.COMPONENTS, self.COMPONENT_DEFAULTS, self._weight_vec
+                )
             },
             'recommendations': self._get_recommendations(trust_score, confidences)
         }
@@ -205,6 +376,7 @@ class TrustScoreService:
             for key in self.weights:
                 if key in new_weights:
                     self.weights[key] = new_weights[key] / total_weight
+            self._refresh_vectors()
 
     def calibrate_thresholds(self, calibration_data: List[Dict[str, Any]]):
         """
@@ -212,9 +384,16 @@ class TrustScoreService:
         """
         # This would typically use machine learning to optimize thresholds
         # For now, provide a simple heuristic approach
-        for component in self.thresholds:
-            accuracies = [item.get(f'{component}_accuracy', 0.5) for item in calibration_data]
-            if accuracies:
-                avg_accuracy = sum(accuracies) / len(accuracies)
+        if calibration_data:
+            # Accuracy totals for every component in one pass over the data
+            accuracy_keys = [(component, f'{component}_accuracy') for component in self.thresholds]
+            totals = dict.fromkeys(self.thresholds, 0.0)
+            for item in calibration_data:
+                for component, key in accuracy_keys:
+                    totals[component] += item.get(key, 0.5)
+
+            for component, total in totals.items():
+                avg_accuracy = total / len(calibration_data)
                 # Set threshold slightly below average accuracy
-                self.thresholds[component] = max(0.1, avg_accuracy - 0.1)
\ No newline at end of file
+                self.thresholds[component] = max(0.1, avg_accuracy - 0.1)
+        self._refresh_vectors()
\ No newline at end of file
@@ -1,6 +1,52 @@
 # Placeholder for async worker
 # For MVP, processing is synchronous
 
+from rq import SimpleWorker, Worker
+
+
+class PreloadingWorker(SimpleWorker):
+    """
+    SimpleWorker that loads the pipeline's models before taking jobs. Jobs
+    run in the worker process itself, so a job that crashes or leaks takes
+    the worker down or bloats it, and RQ's job timeout cannot kill a
+    runaway job
+    """
+
+    def work(self, *args, **kwargs):
+        preload_services()
+        return super().work(*args, **kwargs)
+
+def run_worker(queues=('yantra-ai-queue',)):
+    """
+    Run RQ workers for the job queues: a WorkerPool of
+    settings.WORKER_CONCURRENCY worker processes, or a single worker
+
+    By default these are standard RQ Workers, which fork a work horse per
+    job: jobs are isolated and killed on timeout, but each loads the models
+    again. With settings.WORKER_PRELOAD they are PreloadingWorkers instead,
+    which load the models once and keep them (and the worker pools the
+    pipeline holds in module globals) from one job to the next
+    """
+    from app.core.config import settings
+    from app.services.job_queue import redis_conn
+
+    worker_class = PreloadingWorker if settings.WORKER_PRELOAD else Worker
+
+    if settings.WORKER_CONCURRENCY > 1:
+        from rq.worker_pool import WorkerPool
+        pool = WorkerPool(list(queues), connection=redis_conn,
+                          num_workers=settings.WORKER_CONCURRENCY,
+                          worker_class=worker_class)
+        pool.start()
+    else:
+        worker = worker_class(list(queues), connection=redis_conn)
+        worker.work()
+
+def preload_services():
+    """Load the pipeline's models at worker startup, before the first job"""
+    from app.worker.process_document import preload_page_workers
+    preload_page_workers()
+
 def process_async(job_id: str, job_dir: str):
     from app.services.orchestrator import process_job
     return process_job(job_id, job_dir)
@@ -1,7 +1,14 @@
 import os
+import json
 import uuid
 from datetime import datetime
 import shutil
+import tempfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "jobs")
 
@@ -26,3 +33,49 @@ def get_all_jobs() -> list:
     if not os.path.exists(DATA_DIR):
         return []
     return [d for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))]
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    """Write payload to a temp file beside path, then atomically replace path"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_json(path: str, data) -> None:
+    """
+    Write data as indented JSON, using orjson when available
+
+    The file is replaced atomically, so readers never see a partial write.
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        payload = json.dumps(data, indent=2).encode("utf-8")
+    _write_atomic(path, payload)
+
+def write_jsonl(path: str, entries: list) -> None:
+    """
+    Write entries as JSON lines, using orjson when available
+
+    The file is replaced atomically, so readers never see a partial write.
+    """
+    if orjson is not None:
+        payload = b"".join(orjson.dumps(entry, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n" for entry in entries)
+    else:
+        payload = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+    _write_atomic(path, payload)
+
+def read_jsonl(path: str) -> list:
+    """
+    Read a JSON lines file in one read, using orjson when available
+    """
+    with open(path, "rb") as f:
+        lines = f.read().splitlines()
+    loads = orjson.loads if orjson is not None else json.loads
+    return [loads(line) for line in lines if line.strip()]
@@ -1,9 +1,16 @@
+import hashlib
+import logging
+import multiprocessing
 import os
+import threading
 import uuid
 import tempfile
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_path, pdfinfo_from_path
 import cv2
 import numpy as np
 
@@ -15,6 +22,312 @@ from app.services.orchestrator_v2 import DocumentProcessorV2
 from app.services.storage import StorageService
 from app.crud.job import job_crud
 
+logger = logging.getLogger(__name__)
+
+# Pages are processed in parallel worker processes, each holding its own copy
+# of the models, so the count is kept small by default
+PAGE_WORKERS = int(os.getenv("PAGE_WORKERS", "2"))
+
+# Minimum seconds between per-page progress writes to the job
+PROGRESS_UPDATE_INTERVAL = 0.5
+
+# Regions smaller than this (pixels) are never tables and go straight to OCR
+MIN_TABLE_AREA = 10000
+
+# OCR results kept per process for recently seen crops (headers and footers
+# recur across pages); the oldest entry is evicted first
+OCR_CACHE_SIZE = 256
+_OCR_CACHE: Dict[Tuple[bytes, Tuple[int, ...], str], Dict[str, Any]] = {}
+
+# Per-process page services, built when a page worker starts
+_PAGE_SERVICES: Optional[Dict[str, Any]] = None
+
+# Page worker pool shared by every job this process runs, created on first
+# use; its workers keep their loaded services between jobs
+_PAGE_POOL: Optional[ProcessPoolExecutor] = None
+_PAGE_POOL_LOCK = threading.Lock()
+
+# Per-process BGR page image, reused while the page size stays the same (a
+# worker processes one page at a time)
+_PAGE_BUFFER: Optional[np.ndarray] = None
+
+
+def _get_page_services() -> Dict[str, Any]:
+    global _PAGE_SERVICES
+    if _PAGE_SERVICES is None:
+        _PAGE_SERVICES = {
+            'ocr': OCRService(),
+            'layout': LayoutService(),
+            'text': TextNormalizationService(),
+            'pii': PIIDetectionService(),
+            'trust': TrustScoreService(),
+            'table': TableExtractionService()
+        }
+    return _PAGE_SERVICES
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _PAGE_POOL
+    with _PAGE_POOL_LOCK:
+        if _PAGE_POOL is None:
+            # forkserver: workers don't inherit this process's threads and
+            # database connections
+            _PAGE_POOL = ProcessPoolExecutor(
+                max_workers=PAGE_WORKERS,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_get_page_services
+            )
+        return _PAGE_POOL
+
+
+def _discard_page_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken page pool so the next job starts a new one"""
+    global _PAGE_POOL
+    with _PAGE_POOL_LOCK:
+        if _PAGE_POOL is pool:
+            _PAGE_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _warm_page_worker() -> None:
+    """Runs in a page worker; its services are loaded by the initializer"""
+
+
+def preload_page_workers() -> None:
+    """Start every page worker, loading its models, before the first job"""
+    pool = _get_page_pool()
+    for future in [pool.submit(_warm_page_worker) for _ in range(PAGE_WORKERS)]:
+        future.result()
+
+
+def _random_uuids(count: int) -> List[str]:
+    """count random (version 4) UUID strings from a single urandom call"""
+    random_bytes = os.urandom(16 * count)
+    return [
+        str(uuid.UUID(bytes=random_bytes[i:i + 16], version=4))
+        for i in range(0, 16 * count, 16)
+    ]
+
+
+def _page_buffer(shape: Tuple[int, int, int]) -> np.ndarray:
+    global _PAGE_BUFFER
+    if _PAGE_BUFFER is None or _PAGE_BUFFER.shape != shape:
+        _PAGE_BUFFER = np.empty(shape, dtype=np.uint8)
+    return _PAGE_BUFFER
+
+
+def _ocr_regions(ocr_service, crops: List[np.ndarray], labels: List[str]) -> List[Dict[str, Any]]:
+    """
+    OCR a page's text region crops, with one batched call when the OCR
+    service provides extract_text_batch. Crops identical to a recently
+    seen one reuse its result
+    """
+    keys = [
+        (hashlib.blake2b(crop.tobytes(), digest_size=8).digest(), crop.shape, label)
+        for crop, label in zip(crops, labels)
+    ]
+
+    # First crop for each uncached key
+    missing = {}
+    for i, key in enumerate(keys):
+        if key not in _OCR_CACHE and key not in missing:
+            missing[key] = i
+
+    computed = {}
+    if missing:
+        missing_crops = [crops[i] for i in missing.values()]
+        missing_labels = [labels[i] for i in missing.values()]
+        extract_text_batch = getattr(ocr_service, 'extract_text_batch', None)
+        if extract_text_batch is not None:
+            results = extract_text_batch(missing_crops, missing_labels)
+        else:
+            results = [ocr_service.extract_text(crop, label) for crop, label in zip(missing_crops, missing_labels)]
+
+        computed = dict(zip(missing, results))
+
+    ocr_results = [computed[key] if key in computed else _OCR_CACHE[key] for key in keys]
+
+    _OCR_CACHE.update(computed)
+    while len(_OCR_CACHE) > OCR_CACHE_SIZE:
+        del _OCR_CACHE[next(iter(_OCR_CACHE))]
+
+    return ocr_results
+
+
+def _process_page(job_id: str, pdf_path: str, page_num: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Process one page in a worker process. Returns the page record fields,
+    the region record fields and the page's regions for redaction; the
+    database records are created by the parent
+    """
+    services = _get_page_services()
+    ocr_service = services['ocr']
+    layout_service = services['layout']
+    text_service = services['text']
+    pii_service = services['pii']
+    trust_service = services['trust']
+    table_service = services['table']
+
+    # Render just this page, rather than shipping rendered images between
+    # processes; each worker holds a single page image at a time
+    image = convert_from_path(pdf_path, dpi=300, first_page=page_num, last_page=page_num, thread_count=1)[0]
+    width, height = image.width, image.height
+
+    # Convert PIL image to OpenCV format into the reused page buffer,
+    # dropping the PIL copy (~25 MB at 300 DPI)
+    cv_image = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR, dst=_page_buffer((height, width, 3)))
+    del image
+
+    # Detect layout regions
+    regions = layout_service.detect_regions(cv_image)
+
+    # Page record fields
+    page_id, *region_ids = _random_uuids(len(regions) + 1)
+    page_record = {
+        'id': page_id,
+        'job_id': job_id,
+        'page_number': page_num,
+        'width': width,
+        'height': height
+    }
+
+    region_records = []
+    page_regions = []
+
+    # Tables too small to be real tables are read as text
+    labels = []
+    for region in regions:
+        label = region.get('label', 'text')
+        x1, y1, x2, y2 = region['bbox']
+        if label == 'table' and (x2 - x1) * (y2 - y1) < MIN_TABLE_AREA:
+            label = 'text'
+        labels.append(label)
+
+    # OCR all text regions of the page together
+    text_indices = [i for i, label in enumerate(labels) if label != 'table']
+    crops = []
+    for i in text_indices:
+        x1, y1, x2, y2 = regions[i]['bbox']
+        crops.append(cv_image[y1:y2, x1:x2])
+    ocr_results = dict(zip(text_indices, _ocr_regions(
+        ocr_service, crops, [labels[i] for i in text_indices]
+    )))
+
+    # Process each region
+    for i, region in enumerate(regions):
+        # Crop region
+        x1, y1, x2, y2 = region['bbox']
+        cropped_image = cv_image[y1:y2, x1:x2]
+        region_label = labels[i]
+
+        # Initialize variables
+        raw_text = ""
+        ocr_confidence = 0.0
+        normalized_text = ""
+        translation_confidence = 1.0
+        table_data = None
+
+        if region_label == 'table':
+            # Table extraction
+            try:
+                tables = table_service.extract_tables_from_image(cropped_image)
+                if tables:
+                    table_data = table_service.merge_table_data(tables)
+                    # Convert table data to text representation
+                    best_table = table_data.get('best_table', {})
+                    if best_table and 'data' in best_table:
+                        # Create a simple text representation of the table
+                        rows = best_table['data']
+                        if rows:
+                            headers = list(rows[0].keys())
+                            table_text = '\t'.join(headers) + '\n'
+                            for row in rows:
+                                table_text += '\t'.join(str(row.get(h, '')) for h in headers) + '\n'
+                            raw_text = table_text.strip()
+                            ocr_confidence = best_table.get('confidence', 0.8)
+            except Exception:
+                logger.exception("Table extraction failed for region %d", i)
+                # Fall back to OCR, so the region isn't left empty
+                region_label = 'text'
+                table_data = None
+                ocr_result = _ocr_regions(ocr_service, [cropped_image], [region_label])[0]
+                raw_text = ocr_result['text']
+                ocr_confidence = ocr_result['confidence']
+        else:
+            # OCR result for text regions
+            ocr_result = ocr_results[i]
+            raw_text = ocr_result['text']
+            ocr_confidence = ocr_result['confidence']
+
+        # Text normalization (skip for tables or empty text)
+        if raw_text and region_label != 'table':
+            norm_result = text_service.normalize_text(raw_text)
+            normalized_text = norm_result['normalized_text']
+            translation_confidence = norm_result['confidence']
+        else:
+            normalized_text = raw_text
+
+        # PII detection
+        pii_detected = []
+        if normalized_text:
+            pii_result = pii_service.detect_pii(normalized_text)
+            pii_detected = pii_result['entities']
+
+        # Calculate trust score (PII confidence defaults to high if no PII)
+        pii_confidence = max((e.get('confidence', 0) for e in pii_detected), default=1.0) if pii_detected else 1.0
+        trust_score = trust_service.calculate_trust_score({
+            'ocr_confidence': ocr_confidence,
+            'translation_confidence': translation_confidence,
+            'pii_confidence': pii_confidence,
+            'layout_confidence': region.get('confidence', 0.8)
+        })
+
+        # Region record fields
+        region_id = region_ids[i]
+        region_records.append({
+            'id': region_id,
+            'job_id': job_id,
+            'page_id': page_id,
+            'bbox': {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2},
+            'label': region_label,
+            'raw_text': raw_text,
+            'ocr_confidence': ocr_confidence,
+            'normalized_text': normalized_text,
+            'translation_confidence': translation_confidence,
+            'pii_detected': pii_detected,
+            'trust_score': trust_score
+        })
+
+        page_regions.append({
+            'id': region_id,
+            'bbox': [x1, y1, x2, y2],
+            'text': normalized_text,
+            'pii_detected': pii_detected,
+            'table_data': table_data
+        })
+
+    return page_record, region_records, page_regions
+
+
+def _maybe_update_progress(db: Session, job: Job, progress: str, last_update: float, force: bool = False) -> float:
+    """
+    Write progress to the job unless the last write was under
+    PROGRESS_UPDATE_INTERVAL ago; returns the time of the last write
+    """
+    now = time.monotonic()
+    if not force and now - last_update < PROGRESS_UPDATE_INTERVAL:
+        return last_update
+    job_crud.update(db, db_obj=job, obj_in={"progress": progress})
+    return now
+
+
+def _redact_and_upload(redaction_service, storage: StorageService, pdf_path: str,
+                       pages_data: List[Dict[str, Any]], storage_path: str) -> str:
+    """Create the redacted PDF and upload it; returns the local redacted path"""
+    redacted_path = redaction_service.create_redacted_pdf(pdf_path, pages_data)
+    storage.upload_file(redacted_path, storage_path)
+    return redacted_path
+
 
 def process_document_job(job_id: str) -> bool:
     """
@@ -25,166 +338,74 @@ def process_document_job(job_id: str) -> bool:
         # Get job
         job = job_crud.get(db, job_id=job_id)
         if not job:
-            print(f"Job {job_id} not found")
+            logger.warning("Job %s not found", job_id)
             return False
 
         # Update job status to processing
         job_crud.update(db, db_obj=job, obj_in={"status": JobStatus.PROCESSING, "progress": "Starting document processing..."})
 
-        # Initialize services
+        # Initialize services (the page services live in the worker processes)
         storage = StorageService()
-        ocr_service = OCRService()
-        layout_service = LayoutService()
-        text_service = TextNormalizationService()
-        pii_service = PIIDetectionService()
-        trust_service = TrustScoreService()
         redaction_service = PDFRedactionService()
-        table_service = TableExtractionService()
 
         # Download PDF from storage
         pdf_path = os.path.join(tempfile.gettempdir(), f"{job_id}.pdf")
         storage.download_file(job.storage_path, pdf_path)
 
-        # Read PDF bytes
-        with open(pdf_path, 'rb') as f:
-            pdf_bytes = f.read()
-
-        # Convert PDF to images
-        job_crud.update(db, db_obj=job, obj_in={"progress": "Converting PDF to images..."})
-        images = convert_from_bytes(pdf_bytes, dpi=300)
+        page_count = pdfinfo_from_path(pdf_path)['Pages']
 
         all_regions = []
         pages_data = []
 
-        # Process each page
-        for page_num, image in enumerate(images, 1):
-            job_crud.update(db, db_obj=job, obj_in={"progress": f"Processing page {page_num}/{len(images)}..."})
-
-            # Convert PIL image to OpenCV format
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-
-            # Detect layout regions
-            regions = layout_service.detect_regions(cv_image)
-
-            # Create page record
-            page_id = str(uuid.uuid4())
-            page = Page(
-                id=page_id,
-                job_id=job_id,
-                page_number=page_num,
-                width=image.width,
-                height=image.height
-            )
-            db.add(page)
-
-            page_regions = []
-
-            # Process each region
-            for i, region in enumerate(regions):
-                # Crop region
-                x1, y1, x2, y2 = region['bbox']
-                cropped_image = cv_image[y1:y2, x1:x2]
-                region_label = region.get('label', 'text')
-
-                # Initialize variables
-                raw_text = ""
-                ocr_confidence = 0.0
-                normalized_text = ""
-                translation_confidence = 1.0
-                table_data = None
-
-                if region_label == 'table':
-                    # Table extraction
-                    try:
-                        tables = table_service.extract_tables_from_image(cropped_image)
-                        if tables:
-                            table_data = table_service.merge_table_data(tables)
-                            # Convert table data to text representation
-                            best_table = table_data.get('best_table', {})
-                            if best_table and 'data' in best_table:
-                                # Create a simple text representation of the table
-                                rows = best_table['data']
-                                if rows:
-                                    headers = list(rows[0].keys())
-                                    table_text = '\t'.join(headers) + '\n'
-                                    for row in rows:
-                                        table_text += '\t'.join(str(row.get(h, '')) for h in headers) + '\n'
-                                    raw_text = table_text.strip()
-                                    ocr_confidence = best_table.get('confidence', 0.8)
-                    except Exception as e:
-                        print(f"Table extraction failed for region {i}: {e}")
-                        # Fallback to OCR
-                        region_label = 'text'
-                else:
-                    # OCR processing for text regions
-                    ocr_result = ocr_service.extract_text(cropped_image, region_label)
-                    raw_text = ocr_result['text']
-                    ocr_confidence = ocr_result['confidence']
-
-                # Text normalization (skip for tables or empty text)
-                if raw_text and region_label != 'table':
-                    norm_result = text_service.normalize_text(raw_text)
-                    normalized_text = norm_result['normalized_text']
-                    translation_confidence = norm_result['confidence']
-                else:
-                    normalized_text = raw_text
-
-                # PII detection
-                pii_detected = []
-                if normalized_text:
-                    pii_result = pii_service.detect_pii(normalized_text)
-                    pii_detected = pii_result['entities']
-
-                # Calculate trust score
-                trust_score = trust_service.calculate_trust_score({
-                    'ocr_confidence': ocr_confidence,
-                    'translation_confidence': translation_confidence,
-                    'pii_confidence': max([e.get('confidence', 0) for e in pii_detected], default=1.0),
-                    'layout_confidence': region.get('confidence', 0.8)
-                })
-
-                # Create region record
-                region_id = str(uuid.uuid4())
-                db_region = Region(
-                    id=region_id,
-                    job_id=job_id,
-                    page_id=page_id,
-                    bbox={'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2},
-                    label=region_label,
-                    raw_text=raw_text,
-                    ocr_confidence=ocr_confidence,
-                    normalized_text=normalized_text,
-                    translation_confidence=translation_confidence,
-                    pii_detected=pii_detected,
-                    trust_score=trust_score
+        # Process pages in parallel; results are collected in page order
+        job_crud.update(db, db_obj=job, obj_in={"progress": f"Processing {page_count} pages..."})
+        last_update = time.monotonic()
+        executor = _get_page_pool()
+        futures = []
+        try:
+            futures = [
+                executor.submit(_process_page, job_id, pdf_path, page_num)
+                for page_num in range(1, page_count + 1)
+            ]
+
+            for page_num, future in enumerate(futures, 1):
+                page_record, region_records, page_regions = future.result()
+
+                db.add(Page(**page_record))
+                db.add_all([Region(**region_record) for region_record in region_records])
+
+                # Progress writes commit the session, flushing the pending rows
+                last_update = _maybe_update_progress(
+                    db, job, f"Processed page {page_num}/{page_count}...", last_update,
+                    force=page_num == page_count
                 )
-                db.add(db_region)
-
-                page_regions.append({
-                    'id': region_id,
-                    'bbox': [x1, y1, x2, y2],
-                    'text': normalized_text,
-                    'pii_detected': pii_detected,
-                    'table_data': table_data
-                })
-
-            pages_data.append({
-                'page_number': page_num,
-                'regions': page_regions
-            })
-
-            all_regions.extend(page_regions)
 
-        # Commit all pages and regions
-        db.commit()
+                pages_data.append({
+                    'page_number': page_num,
+                    'regions': page_regions
+                })
 
-        # Create redacted PDF
-        job_crud.update(db, db_obj=job, obj_in={"progress": "Creating redacted PDF..."})
-        redacted_path = redaction_service.create_redacted_pdf(pdf_path, pages_data)
+                all_regions.extend(page_regions)
+        except BrokenProcessPool:
+            # A dead page worker breaks the pool: drop it for the next job
+            _discard_page_pool(executor)
+            raise
+        except Exception:
+            # Don't leave this job's remaining pages queued in the shared pool
+            for future in futures:
+                future.cancel()
+            raise
+
+        # Create and upload the redacted PDF in the background while all
+        # pages and regions are committed
         redacted_storage_path = f"jobs/{job_id}/redacted.pdf"
-
-        # Upload redacted PDF to storage
-        storage.upload_file(redacted_path, redacted_storage_path)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            redaction = executor.submit(
+                _redact_and_upload, redaction_service, storage, pdf_path, pages_data, redacted_storage_path
+            )
+            db.commit()
+            job_crud.update(db, db_obj=job, obj_in={"progress": "Creating redacted PDF..."})
+            redacted_path = redaction.result()
 
         # Clean up temporary files
         os.unlink(pdf_path)
@@ -197,11 +418,11 @@ def process_document_job(job_id: str) -> bool:
             "redacted_path": redacted_storage_path
         })
 
-        print(f"Job {job_id} processed successfully")
+        logger.info("Job %s processed successfully", job_id)
         return True
 
     except Exception as e:
-        print(f"Error processing job {job_id}: {str(e)}")
+        logger.exception("Error processing job %s", job_id)
         # Update job status to failed
         job_crud.update(db, db_obj=job, obj_in={
             "status": JobStatus.FAILED,
@@ -1,12 +1,67 @@
+import os
+from dataclasses import dataclass
 import cv2
 import numpy as np
 from typing import List, Dict, Any, Tuple
 import layoutparser as lp
 
+# Opt-in: dynamically quantize the layout model's fully connected layers to
+# INT8 when it runs on CPU. Faster, but detection scores and boxes shift, so
+# check layout accuracy on your documents before enabling it
+LAYOUT_QUANTIZE = os.getenv("LAYOUT_QUANTIZE", "false").lower() == "true"
+
+# The fallback detector works on pages downscaled to this longest side
+FALLBACK_MAX_SIDE = 1500
+
+
+@dataclass
+class _Regions:
+    """
+    Layout regions as parallel arrays, one row per region; post-processing
+    works on these and converts back to region dicts at the end
+    """
+    bbox: np.ndarray   # (N, 4) x1, y1, x2, y2
+    conf: np.ndarray   # (N,)
+    label: np.ndarray  # (N,) label strings
+
+    @classmethod
+    def from_dicts(cls, regions: List[Dict[str, Any]]) -> '_Regions':
+        return cls(
+            bbox=np.array([region['bbox'] for region in regions], dtype=np.int64).reshape(-1, 4),
+            conf=np.array([region['confidence'] for region in regions], dtype=np.float64),
+            label=np.array([region['label'] for region in regions], dtype=object)
+        )
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    def take(self, index) -> '_Regions':
+        return _Regions(self.bbox[index], self.conf[index], self.label[index])
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [
+            {'bbox': bbox, 'label': label, 'confidence': confidence}
+            for bbox, label, confidence in zip(self.bbox.tolist(), self.label.tolist(), self.conf.tolist())
+        ]
+
 
 class LayoutService:
+    # layoutparser (PubLayNet) labels -> internal labels
+    _LABEL_MAP = {
+        'Text': 'text',
+        'Title': 'header',
+        'List': 'text',
+        'Table': 'table',
+        'Figure': 'image',
+        'Caption': 'text',
+        'Footer': 'text',
+        'Header': 'header',
+        'Reference': 'text'
+    }
+
     def __init__(self):
         self.model_loaded = False
+        self._gray_buffer = None
         try:
             # Import layoutparser
             import layoutparser as lp
@@ -21,6 +76,9 @@ class LayoutService:
             )
             self.model_loaded = True
             print("LayoutParser PubLayNet model loaded successfully")
+
+            if LAYOUT_QUANTIZE:
+                self._quantize_model()
         except ImportError as e:
             print(f"LayoutParser not available: {e}")
             self.model_loaded = False
@@ -30,6 +88,26 @@ class LayoutService:
             traceback.print_exc()
             self.model_loaded = False
 
+    def _quantize_model(self):
+        """
+        Swap the Detectron2 network behind the LayoutParser model for one
+        whose Linear layers (the ROI box head) use dynamic INT8 weights.
+        CPU only; on failure the FP32 model is kept
+        """
+        try:
+            import torch
+
+            predictor = self.model.model  # Detectron2 DefaultPredictor
+            if next(predictor.model.parameters()).device.type != 'cpu':
+                return
+
+            predictor.model = torch.quantization.quantize_dynamic(
+                predictor.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            print("Layout model box head quantized to INT8")
+        except Exception as e:
+            print(f"Layout model quantization skipped: {e}")
+
     def detect_regions(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """
         Detect layout regions in the image
@@ -52,7 +130,7 @@ class LayoutService:
             
             # Convert BGR to RGB
             if len(image.shape) == 3 and image.shape[2] == 3:
-                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                image_rgb = image[:, :, ::-1]  # Channel-reversed view, no copy
                 print(f"Converted BGR to RGB for LayoutParser")
             else:
                 image_rgb = image
@@ -69,10 +147,11 @@ class LayoutService:
             print(f"LayoutParser returned {len(layout)} regions")
 
             regions = []
+            label_map = self._LABEL_MAP
             for block in layout:
                 # Convert layoutparser block to our format
                 x1, y1, x2, y2 = block.coordinates
-                label = self._map_layout_label(block.type)
+                label = label_map.get(block.type, 'text')
                 confidence = block.score
 
                 regions.append({
@@ -100,11 +179,16 @@ class LayoutService:
         Fallback region detection using basic image processing
         """
         try:
-            # Convert to grayscale
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            # Downscale large pages first; boxes are only layout hints
+            height, width = image.shape[:2]
+            scale = FALLBACK_MAX_SIDE / max(height, width)
+            if scale < 1:
+                page = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
             else:
-                gray = image
+                page, scale = image, 1.0
+
+            # Convert to grayscale
+            gray = self._to_gray(page)
 
             # Apply adaptive threshold
             binary = cv2.adaptiveThreshold(
@@ -115,28 +199,39 @@ class LayoutService:
             # Find contours
             contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-            regions = []
-            height, width = gray.shape
+            if not contours:
+                return []
 
-            # Filter contours by area and aspect ratio
-            min_area = (width * height) * 0.001  # 0.1% of image area
-            max_area = (width * height) * 0.8    # 80% of image area
+            # Filter contours by area and aspect ratio (relative to the
+            # downscaled page, so the fractions are unchanged)
+            small_height, small_width = gray.shape
+            min_area = (small_width * small_height) * 0.001  # 0.1% of image area
+            max_area = (small_width * small_height) * 0.8    # 80% of image area
 
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if min_area < area < max_area:
-                    x, y, w, h = cv2.boundingRect(contour)
+            areas = np.array([cv2.contourArea(contour) for contour in contours])
+            rects = np.array([cv2.boundingRect(contour) for contour in contours], dtype=np.int64)
+            aspect_ratios = rects[:, 2] / np.maximum(rects[:, 3], 1)
 
-                    # Filter by aspect ratio
-                    aspect_ratio = w / h
-                    if 0.1 < aspect_ratio < 10:  # Reasonable aspect ratios
-                        regions.append({
-                            'bbox': [x, y, x + w, y + h],
-                            'label': 'text',  # Default label
-                            'confidence': 0.5  # Lower confidence for fallback
-                        })
+            keep = (
+                (areas > min_area) & (areas < max_area)
+                & (aspect_ratios > 0.1) & (aspect_ratios < 10)  # Reasonable aspect ratios
+            )
 
-            return regions
+            # Boxes back in full-resolution pixels
+            rects = rects[keep]
+            x1 = np.floor(rects[:, 0] / scale).astype(np.int64)
+            y1 = np.floor(rects[:, 1] / scale).astype(np.int64)
+            x2 = np.minimum(np.ceil((rects[:, 0] + rects[:, 2]) / scale).astype(np.int64), width)
+            y2 = np.minimum(np.ceil((rects[:, 1] + rects[:, 3]) / scale).astype(np.int64), height)
+
+            return [
+                {
+                    'bbox': bbox,
+                    'label': 'text',  # Default label
+                    'confidence': 0.5  # Lower confidence for fallback
+                }
+                for bbox in np.column_stack((x1, y1, x2, y2)).tolist()
+            ]
 
         except Exception as e:
             print(f"Fallback region detection failed: {e}")
@@ -148,23 +243,18 @@ class LayoutService:
                 'confidence': 0.1
             }]
 
-    def _map_layout_label(self, layout_label: str) -> str:
+    def _to_gray(self, image: np.ndarray) -> np.ndarray:
         """
-        Map layoutparser labels to our internal labels
+        Convert BGR to grayscale into a buffer reused across same-sized pages
         """
-        label_mapping = {
-            'Text': 'text',
-            'Title': 'header',
-            'List': 'text',
-            'Table': 'table',
-            'Figure': 'image',
-            'Caption': 'text',
-            'Footer': 'text',
-            'Header': 'header',
-            'Reference': 'text'
-        }
+        if len(image.shape) != 3:
+            return image
 
-        return label_mapping.get(layout_label, 'text')
+        height, width = image.shape[:2]
+        if self._gray_buffer is None or self._gray_buffer.shape != (height, width):
+            self._gray_buffer = np.empty((height, width), dtype=image.dtype)
+
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray_buffer)
 
     def detect_tables(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """
@@ -172,30 +262,42 @@ class LayoutService:
         """
         try:
             # Convert to grayscale
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image
-
-            # Use morphological operations to detect table structure
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 25))
-            refined = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
-
-            # Find contours
-            contours, _ = cv2.findContours(refined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            gray = self._to_gray(image)
 
-            tables = []
-            for contour in contours:
-                x, y, w, h = cv2.boundingRect(contour)
-                area_ratio = cv2.contourArea(contour) / (w * h)
-
-                # Table regions typically have high density
-                if area_ratio > 0.7 and w > 100 and h > 50:
-                    tables.append({
-                        'bbox': [x, y, x + w, y + h],
-                        'label': 'table',
-                        'confidence': 0.7
-                    })
+            # Work at half resolution on the Otsu-inverted page (ink = 255)
+            height, width = gray.shape
+            small = cv2.resize(gray, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+            _, bw = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+
+            # Close the ruling and cell text into solid blocks: a 13x13
+            # rectangular close (25x25 at full scale), done as 13x1 and 1x13
+            # passes since a rect kernel decomposes exactly
+            h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 1))
+            v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 13))
+            closed = cv2.erode(cv2.erode(cv2.dilate(cv2.dilate(bw, h_kernel), v_kernel), h_kernel), v_kernel)
+
+            # One stats row per component (row 0 is the background)
+            _, _, stats, _ = cv2.connectedComponentsWithStats(closed, connectivity=8)
+            stats = stats[1:]
+            w = stats[:, cv2.CC_STAT_WIDTH]
+            h = stats[:, cv2.CC_STAT_HEIGHT]
+            density = stats[:, cv2.CC_STAT_AREA] / (w * h)
+
+            # Table regions typically have high density
+            keep = (density > 0.7) & (w > 50) & (h > 25)
+            x1 = stats[keep, cv2.CC_STAT_LEFT] * 2
+            y1 = stats[keep, cv2.CC_STAT_TOP] * 2
+            x2 = np.minimum(x1 + w[keep] * 2, width)
+            y2 = np.minimum(y1 + h[keep] * 2, height)
+
+            tables = [
+                {
+                    'bbox': bbox,
+                    'label': 'table',
+                    'confidence': 0.7
+                }
+                for bbox in np.column_stack((x1, y1, x2, y2)).tolist()
+            ]
 
             return tables
 
@@ -214,29 +316,30 @@ class LayoutService:
         min_area_px = max(2000, int(width * height * 0.001))  # Minimum area: 2000px or 0.1% of image
         merge_gap_px = max(10, int(min(width, height) * 0.01))  # 1% of smaller dimension
 
-        # Filter out tiny regions
-        filtered_regions = []
-        for region in regions:
-            x1, y1, x2, y2 = region['bbox']
-            area = (x2 - x1) * (y2 - y1)
-            if area >= min_area_px:
-                filtered_regions.append(region)
+        # Filter out tiny regions (one vectorized area check)
+        boxes = _Regions.from_dicts(regions)
+        x1, y1, x2, y2 = boxes.bbox.T
+        filtered = boxes.take(np.flatnonzero((x2 - x1) * (y2 - y1) >= min_area_px))
 
-        if len(filtered_regions) <= 1:
-            return filtered_regions
+        if len(filtered) <= 1:
+            return filtered.to_dicts()
 
         # Sort by y-coordinate (top to bottom)
-        filtered_regions.sort(key=lambda r: r['bbox'][1])
+        filtered = filtered.take(np.argsort(filtered.bbox[:, 1], kind='stable'))
 
-        # Merge vertically contiguous regions
-        merged_regions = []
-        current_group = [filtered_regions[0]]
+        # Merge vertically contiguous regions. Each region is compared with
+        # the group's merged box so far, which grows as regions join, so
+        # this stays a sequential scan
+        bboxes = filtered.bbox.tolist()
+        confidences = filtered.conf.tolist()
+        labels = filtered.label.tolist()
 
-        for region in filtered_regions[1:]:
-            prev_region = current_group[-1]
-            prev_x1, prev_y1, prev_x2, prev_y2 = prev_region['bbox']
-            curr_x1, curr_y1, curr_x2, curr_y2 = region['bbox']
+        merged_regions = []
+        prev_x1, prev_y1, prev_x2, prev_y2 = bboxes[0]
+        prev_confidence = confidences[0]
+        prev_label = labels[0]
 
+        for (curr_x1, curr_y1, curr_x2, curr_y2), confidence, label in zip(bboxes[1:], confidences[1:], labels[1:]):
             # Check if regions are vertically contiguous and similar horizontally
             vertical_gap = curr_y1 - prev_y2
             horizontal_overlap = min(prev_x2, curr_x2) - max(prev_x1, curr_x1)
@@ -244,88 +347,85 @@ class LayoutService:
 
             if vertical_gap <= merge_gap_px and horizontal_overlap_ratio > 0.5:
                 # Merge regions
-                merged_x1 = min(prev_x1, curr_x1)
-                merged_y1 = min(prev_y1, curr_y1)
-                merged_x2 = max(prev_x2, curr_x2)
-                merged_y2 = max(prev_y2, curr_y2)
+                prev_x1 = min(prev_x1, curr_x1)
+                prev_y1 = min(prev_y1, curr_y1)
+                prev_x2 = max(prev_x2, curr_x2)
+                prev_y2 = max(prev_y2, curr_y2)
 
                 # Use the higher confidence and most common label
-                merged_confidence = max(prev_region['confidence'], region['confidence'])
-                merged_label = prev_region['label'] if prev_region['confidence'] >= region['confidence'] else region['label']
-
-                merged_region = {
-                    'bbox': [merged_x1, merged_y1, merged_x2, merged_y2],
-                    'label': merged_label,
-                    'confidence': merged_confidence
-                }
-                current_group[-1] = merged_region
+                if prev_confidence < confidence:
+                    prev_label = label
+                prev_confidence = max(prev_confidence, confidence)
             else:
                 # Start new group
-                current_group.append(region)
+                merged_regions.append({
+                    'bbox': [prev_x1, prev_y1, prev_x2, prev_y2],
+                    'label': prev_label,
+                    'confidence': prev_confidence
+                })
+                prev_x1, prev_y1, prev_x2, prev_y2 = curr_x1, curr_y1, curr_x2, curr_y2
+                prev_confidence = confidence
+                prev_label = label
 
-        merged_regions = current_group
+        merged_regions.append({
+            'bbox': [prev_x1, prev_y1, prev_x2, prev_y2],
+            'label': prev_label,
+            'confidence': prev_confidence
+        })
 
         # If we still have too many tiny regions, fall back to projection-based detection
         if len(merged_regions) > 20:  # Arbitrary threshold for "too many"
             print(f"Too many regions detected ({len(merged_regions)}), falling back to projection detection")
-            return self._detect_regions_projection(filtered_regions, image_size)
+            return self._detect_regions_projection(filtered, image_size)
 
         return merged_regions
 
-    def _detect_regions_projection(self, regions: List[Dict[str, Any]], image_size: Tuple[int, int]) -> List[Dict[str, Any]]:
+    def _detect_regions_projection(self, regions: _Regions, image_size: Tuple[int, int]) -> List[Dict[str, Any]]:
         """
         Fallback: Use horizontal projection to detect text lines
         """
         try:
             height, width = image_size
 
-            # Group regions by similar y-coordinates (lines)
-            lines = []
-            sorted_regions = sorted(regions, key=lambda r: r['bbox'][1])  # Sort by y1
-
-            current_line = [sorted_regions[0]]
-            line_y_center = (sorted_regions[0]['bbox'][1] + sorted_regions[0]['bbox'][3]) / 2
-
-            for region in sorted_regions[1:]:
-                region_y_center = (region['bbox'][1] + region['bbox'][3]) / 2
-                if abs(region_y_center - line_y_center) <= 20:  # 20px tolerance for same line
-                    current_line.append(region)
-                else:
-                    # Process current line
-                    if current_line:
-                        lines.append(self._merge_line_regions(current_line))
-                    current_line = [region]
-                    line_y_center = region_y_center
+            # Group regions by similar y-coordinates (lines); after a stable
+            # sort by y1 each line is a contiguous run of rows
+            regions = regions.take(np.argsort(regions.bbox[:, 1], kind='stable'))  # Sort by y1
+            y_centers = ((regions.bbox[:, 1] + regions.bbox[:, 3]) / 2).tolist()
 
-            # Process last line
-            if current_line:
-                lines.append(self._merge_line_regions(current_line))
+            line_starts = [0]
+            line_y_center = y_centers[0]
+            for i, region_y_center in enumerate(y_centers[1:], 1):
+                if abs(region_y_center - line_y_center) > 20:  # 20px tolerance for same line
+                    line_starts.append(i)
+                    line_y_center = region_y_center
 
-            return lines
+            line_ends = line_starts[1:] + [len(regions)]
+            return [
+                self._merge_line_regions(regions.take(slice(start, end)))
+                for start, end in zip(line_starts, line_ends)
+            ]
 
         except Exception as e:
             print(f"Projection-based detection failed: {e}")
-            return regions
+            return regions.to_dicts()
 
-    def _merge_line_regions(self, line_regions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _merge_line_regions(self, line_regions: _Regions) -> Dict[str, Any]:
         """
         Merge multiple regions in the same line into one bounding box
         """
-        if not line_regions:
+        if not len(line_regions):
             return None
 
         if len(line_regions) == 1:
-            return line_regions[0]
+            return line_regions.to_dicts()[0]
 
         # Find overall bounding box
-        x1 = min(r['bbox'][0] for r in line_regions)
-        y1 = min(r['bbox'][1] for r in line_regions)
-        x2 = max(r['bbox'][2] for r in line_regions)
-        y2 = max(r['bbox'][3] for r in line_regions)
+        x1, y1 = line_regions.bbox[:, :2].min(axis=0).tolist()
+        x2, y2 = line_regions.bbox[:, 2:].max(axis=0).tolist()
 
         # Use highest confidence and most common label
-        max_confidence = max(r['confidence'] for r in line_regions)
-        labels = [r['label'] for r in line_regions]
+        max_confidence = float(line_regions.conf.max())
+        labels = line_regions.label.tolist()
         most_common_label = max(set(labels), key=labels.count)
 
         return {
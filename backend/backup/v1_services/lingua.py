@@ -1,11 +1,14 @@
 import re
 
+# Runs of whitespace, collapsed to one space
+_WS_RE = re.compile(r'\s+')
+
 def normalize_text(text: str) -> tuple:
     # Simple normalization for MVP
     normalized = text.strip()
 
     # Fix common spacing issues
-    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = _WS_RE.sub(' ', normalized)
 
     # Normalize dates (basic)
     # TODO: more advanced normalization
@@ -1,12 +1,60 @@
+import os
+import shutil
+import tempfile
 import cv2
 import numpy as np
 import easyocr
 from transformers import TrOCRProcessor, VisionEncoderDecoderModel
 from typing import Tuple, List, Dict, Any
 import torch
-from difflib import SequenceMatcher
 from langdetect import detect, LangDetectException
 
+# RapidFuzz is optional; without it text similarity uses difflib
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:
+    Indel = None
+    from difflib import SequenceMatcher
+
+# ONNX Runtime (through optimum) is optional; without it TrOCR runs in PyTorch
+try:
+    from optimum.onnxruntime import ORTModelForVision2Seq
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+except ImportError:
+    ORTModelForVision2Seq = None
+
+# fastText is optional; without it languages are detected with langdetect
+try:
+    import fasttext
+except ImportError:
+    fasttext = None
+
+# Numba is optional; without it line runs are found with NumPy array ops
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Exported TrOCR ONNX models are cached here, so each is exported once
+TROCR_ONNX_DIR = os.getenv(
+    "TROCR_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "yantra", "trocr-onnx")
+)
+
+# fastText language-ID model (lid.176.ftz from fasttext.cc)
+FASTTEXT_LID_MODEL = os.getenv(
+    "FASTTEXT_LID_MODEL", os.path.join(os.path.expanduser("~"), ".cache", "yantra", "lid.176.ftz")
+)
+
+# Lines per TrOCR generate call when batching lines across regions
+TROCR_BATCH_SIZE = int(os.getenv("TROCR_BATCH_SIZE", "16"))
+
+# EasyOCR batches group images whose sides round up to the same multiple of
+# this, so padding to a common size stays small
+EASYOCR_BUCKET_PX = 32
+
+# Common English words counted by calculate_lm_score
+COMMON_ENGLISH_WORDS = frozenset(('the', 'and', 'is', 'in', 'to', 'of', 'a', 'that'))
+
 # Initialize models (global for performance)
 
 # Helper functions for OCR improvements
@@ -14,10 +62,18 @@ def add_padding_to_crop(image: np.ndarray, padding: int = 10) -> np.ndarray:
     """
     Add padding around image to prevent tight crops
     """
-    return cv2.copyMakeBorder(
-        image, padding, padding, padding, padding,
-        cv2.BORDER_CONSTANT, value=[255, 255, 255]  # White padding
-    )
+    # Allocate the padded crop once, copy the crop in and whiten only the
+    # border strips
+    height, width = image.shape[:2]
+    padded = np.empty((height + 2 * padding, width + 2 * padding) + image.shape[2:], dtype=image.dtype)
+    padded[padding:padding + height, padding:padding + width] = image
+
+    # White padding
+    padded[:padding] = 255
+    padded[padding + height:] = 255
+    padded[padding:padding + height, :padding] = 255
+    padded[padding:padding + height, padding + width:] = 255
+    return padded
 
 def is_vertical_text(bbox: List[int]) -> bool:
     """
@@ -48,22 +104,95 @@ def rotate_if_vertical(image: np.ndarray, bbox: List[int]) -> Tuple[np.ndarray,
         rotated = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
         return rotated, True
     return image, False
-easyocr_reader = easyocr.Reader(['en', 'hi'], gpu=False)  # English and Hindi
+# English and Hindi with EasyOCR's default ('standard') recognizer; INT8
+# dynamic quantization on CPU
+easyocr_reader = easyocr.Reader(
+    ['en', 'hi'],
+    gpu=torch.cuda.is_available(),
+    quantize=True,
+    recog_network='standard',
+    cudnn_benchmark=True
+)
+
+def warm_up_easyocr():
+    """
+    Run the recognizer once on a blank line so the first real region does
+    not pay its setup cost; call at worker startup
+    """
+    try:
+        easyocr_reader.readtext(np.full((32, 128, 3), 255, dtype=np.uint8))
+    except Exception as e:
+        print(f"EasyOCR warmup failed: {e}")
 
 # TrOCR models
 trocr_processor = None
 trocr_model = None
 trocr_handwritten_processor = None
 trocr_handwritten_model = None
+# Whether both processors prepare images identically, so the printed pass's
+# pixel values can be reused for the handwritten retry
+trocr_shared_pixel_values = False
+
+def _export_trocr_onnx(model_name: str, export_dir: str, quantize: bool):
+    """
+    Export a TrOCR model to ONNX in export_dir; with quantize, the decoder
+    weights (the bulk of generate's work) are dynamically quantized to INT8.
+    The export is built in a temporary directory next to export_dir and moved
+    into place once complete; if another process published it first, that
+    copy is kept
+    """
+    parent_dir = os.path.dirname(export_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(dir=parent_dir, prefix=os.path.basename(export_dir) + '.')
+    try:
+        ORTModelForVision2Seq.from_pretrained(model_name, export=True).save_pretrained(staging_dir)
+
+        if quantize:
+            for file_name in os.listdir(staging_dir):
+                if file_name.startswith('decoder') and file_name.endswith('.onnx'):
+                    path = os.path.join(staging_dir, file_name)
+                    quantized_path = path + '.int8'
+                    quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+                    os.replace(quantized_path, path)
+
+        # Publish the finished export in one step
+        try:
+            os.replace(staging_dir, export_dir)
+        except OSError:
+            if not os.path.isdir(export_dir):
+                raise
+    finally:
+        # Left behind only if the export failed or lost the race
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+def load_trocr_model(model_name: str):
+    """
+    Load a TrOCR model through ONNX Runtime (INT8 decoder on CPU, CUDA
+    provider on GPU) when available, else as a PyTorch model
+    """
+    if ORTModelForVision2Seq is not None:
+        try:
+            use_gpu = torch.cuda.is_available()
+            suffix = 'cuda' if use_gpu else 'int8'
+            export_dir = os.path.join(TROCR_ONNX_DIR, f"{model_name.replace('/', '--')}-{suffix}")
+            if not os.path.isdir(export_dir):
+                _export_trocr_onnx(model_name, export_dir, quantize=not use_gpu)
+            provider = 'CUDAExecutionProvider' if use_gpu else 'CPUExecutionProvider'
+            return ORTModelForVision2Seq.from_pretrained(export_dir, provider=provider)
+        except Exception as e:
+            print(f"ONNX Runtime TrOCR unavailable for {model_name}, using PyTorch: {e}")
+
+    return VisionEncoderDecoderModel.from_pretrained(model_name)
 
 def initialize_trocr():
     """Initialize TrOCR models lazily"""
     global trocr_processor, trocr_model, trocr_handwritten_processor, trocr_handwritten_model
+    global trocr_shared_pixel_values
 
     if trocr_processor is None:
         try:
             trocr_processor = TrOCRProcessor.from_pretrained('microsoft/trocr-base-printed')
-            trocr_model = VisionEncoderDecoderModel.from_pretrained('microsoft/trocr-base-printed')
+            trocr_model = load_trocr_model('microsoft/trocr-base-printed')
             print("TrOCR printed model loaded successfully")
         except Exception as e:
             print(f"Failed to load TrOCR printed model: {e}")
@@ -71,139 +200,202 @@ def initialize_trocr():
     if trocr_handwritten_processor is None:
         try:
             trocr_handwritten_processor = TrOCRProcessor.from_pretrained('microsoft/trocr-base-handwritten')
-            trocr_handwritten_model = VisionEncoderDecoderModel.from_pretrained('microsoft/trocr-base-handwritten')
+            trocr_handwritten_model = load_trocr_model('microsoft/trocr-base-handwritten')
             print("TrOCR handwritten model loaded successfully")
         except Exception as e:
             print(f"Failed to load TrOCR handwritten model: {e}")
 
+    if trocr_processor and trocr_handwritten_processor:
+        trocr_shared_pixel_values = (
+            trocr_processor.image_processor.to_dict() == trocr_handwritten_processor.image_processor.to_dict()
+        )
+
 def perform_ocr_ensemble(image: np.ndarray, language: str = "english", bbox: List[int] = None) -> Tuple[str, float]:
     """
     OCR ensemble with TrOCR and EasyOCR
     Includes: padding, vertical text rotation, and handwritten model switching
     """
+    return perform_ocr_ensemble_batch([image], [language], [bbox])[0]
+
+def perform_ocr_ensemble_batch(images: List[np.ndarray], languages: List[str] = None,
+                               bboxes: List[List[int]] = None) -> List[Tuple[str, float]]:
+    """
+    OCR ensemble over several regions (e.g. a page) at once: EasyOCR passes
+    are batched by size and the lines of all TrOCR-routed regions share
+    batched generate calls. Returns (text, confidence) per region, in order
+    """
     initialize_trocr()
 
-    # Fix 3: Add padding to prevent tight crops
-    image = add_padding_to_crop(image, padding=10)
-
-    # Fix 1: Check for vertical text and rotate if needed
-    was_rotated = False
-    if bbox:
-        image, was_rotated = rotate_if_vertical(image, bbox)
-        if was_rotated:
-            print(f"Rotated vertical text region: {bbox}")
-
-    # Detect language
-    language_detected = detect_language(image)
-    print(f"Detected language: {language_detected}")
-
-    # Routing Logic
-    if language_detected == 'hi':
-        # Hindi/Indic -> Use EasyOCR directly
-        easyocr_text, easyocr_conf = perform_easyocr(image)
-        return easyocr_text, easyocr_conf
-    
-    # English/Other -> Use TrOCR with line segmentation
-    # Segment lines for TrOCR (it fails on paragraphs)
-    lines = segment_lines(image)
-    
-    full_text_parts = []
-    confidences = []
-    model_types = []
-    
-    for line_img in lines:
-        # Fix 2: Try printed model first, fall back to handwritten if low confidence
-        if trocr_processor and trocr_model:
-            # Try printed model first (faster)
-            line_text_printed, conf_printed = perform_trocr_ocr(line_img, handwritten=False)
-            
-            # If confidence is high, use printed result
-            if conf_printed >= 0.70:
-                if line_text_printed.strip():
-                    full_text_parts.append(line_text_printed)
-                    confidences.append(conf_printed)
-                    model_types.append('printed')
-            else:
-                # Low confidence - try handwritten model
-                if trocr_handwritten_processor and trocr_handwritten_model:
-                    line_text_handwritten, conf_handwritten = perform_trocr_ocr(line_img, handwritten=True)
-                    
-                    # Use better result
-                    if conf_handwritten > conf_printed:
-                        if line_text_handwritten.strip():
-                            full_text_parts.append(line_text_handwritten)
-                            confidences.append(conf_handwritten)
-                            model_types.append('handwritten')
-                            print(f"Switched to handwritten model (conf: {conf_handwritten:.3f} vs {conf_printed:.3f})")
-                    else:
-                        if line_text_printed.strip():
-                            full_text_parts.append(line_text_printed)
-                            confidences.append(conf_printed)
-                            model_types.append('printed')
-                else:
-                    # Handwritten model not available, use printed result
-                    if line_text_printed.strip():
-                        full_text_parts.append(line_text_printed)
-                        confidences.append(conf_printed)
-                        model_types.append('printed')
+    if bboxes is None:
+        bboxes = [None] * len(images)
+
+    prepared = []
+    for image, bbox in zip(images, bboxes):
+        # Fix 3: Add padding to prevent tight crops
+        image = add_padding_to_crop(image, padding=10)
+
+        # Fix 1: Check for vertical text and rotate if needed
+        if bbox:
+            image, was_rotated = rotate_if_vertical(image, bbox)
+            if was_rotated:
+                print(f"Rotated vertical text region: {bbox}")
+        prepared.append(image)
+
+    # Detect language (from an EasyOCR pass over each region)
+    results = [None] * len(prepared)
+    region_lines = {}
+    for i, (image, (easyocr_text, easyocr_conf)) in enumerate(zip(prepared, perform_easyocr_batch(prepared))):
+        language_detected = language_of_text(easyocr_text)
+        print(f"Detected language: {language_detected}")
+
+        # Routing Logic
+        if language_detected == 'hi':
+            # Hindi/Indic -> Use EasyOCR directly (the detection pass's result)
+            results[i] = (easyocr_text, easyocr_conf)
         else:
-            # Fallback if TrOCR not loaded
-            line_text, line_conf = perform_easyocr(line_img)
-            if line_text.strip():
-                full_text_parts.append(line_text)
-                confidences.append(line_conf)
-                model_types.append('easyocr')
-                
-    final_text = " ".join(full_text_parts)
-    final_conf = sum(confidences) / len(confidences) if confidences else 0.0
-    
-    # Log model usage
-    if model_types:
-        print(f"Model usage: {dict((x, model_types.count(x)) for x in set(model_types))}")
-    
-    return final_text, final_conf
+            # English/Other -> Use TrOCR with line segmentation
+            # Segment lines for TrOCR (it fails on paragraphs)
+            region_lines[i] = segment_lines(image)
+
+    # All lines of every TrOCR-routed region, tagged with their region
+    owners = [i for i, lines in region_lines.items() for _ in lines]
+    lines = [line for region in region_lines.values() for line in region]
+
+    if not (trocr_processor and trocr_model):
+        # Fallback if TrOCR not loaded: all lines through EasyOCR in batches
+        line_results = [
+            (line_text, line_conf, 'easyocr') for line_text, line_conf in perform_easyocr_batch(lines)
+        ]
+    else:
+        line_results = []
+        for start in range(0, len(lines), TROCR_BATCH_SIZE):
+            line_results.extend(_trocr_lines(lines[start:start + TROCR_BATCH_SIZE]))
+
+    region_parts = {i: ([], [], []) for i in region_lines}
+    for owner, (line_text, line_conf, model_type) in zip(owners, line_results):
+        if line_text.strip():
+            full_text_parts, confidences, model_types = region_parts[owner]
+            full_text_parts.append(line_text)
+            confidences.append(line_conf)
+            model_types.append(model_type)
+
+    for i, (full_text_parts, confidences, model_types) in region_parts.items():
+        final_text = " ".join(full_text_parts)
+        final_conf = sum(confidences) / len(confidences) if confidences else 0.0
+
+        # Log model usage
+        if model_types:
+            print(f"Model usage: {dict((x, model_types.count(x)) for x in set(model_types))}")
+
+        results[i] = (final_text, final_conf)
+
+    return results
+
+def _trocr_lines(lines: List[np.ndarray]) -> List[Tuple[str, float, str]]:
+    """
+    TrOCR a batch of lines: (text, confidence, model type) per line
+    """
+    # Fix 2: All lines through the printed model in one greedy batch (its
+    # text is kept at >= 0.70 confidence); lines below that get a second,
+    # beam-searched batch through the handwritten model, reusing the printed
+    # pass's pixel values when the processors agree
+    pixel_values = trocr_pixel_values(lines, trocr_processor)
+    printed_results = trocr_generate(pixel_values, trocr_processor, trocr_model, len(lines), num_beams=1)
+    handwritten_results = {}
+    retry = [i for i, (_, conf) in enumerate(printed_results) if conf < 0.70]
+    if retry and trocr_handwritten_processor and trocr_handwritten_model:
+        if trocr_shared_pixel_values and pixel_values is not None:
+            retry_pixel_values = pixel_values[retry]
+        else:
+            retry_pixel_values = trocr_pixel_values([lines[i] for i in retry], trocr_handwritten_processor)
+        handwritten_results = dict(zip(retry, trocr_generate(
+            retry_pixel_values, trocr_handwritten_processor, trocr_handwritten_model, len(retry)
+        )))
+
+    line_results = []
+    for i, (line_text_printed, conf_printed) in enumerate(printed_results):
+        handwritten_result = handwritten_results.get(i)
+
+        # Use better result
+        if handwritten_result is not None and handwritten_result[1] > conf_printed:
+            line_text_handwritten, conf_handwritten = handwritten_result
+            line_results.append((line_text_handwritten, conf_handwritten, 'handwritten'))
+            if line_text_handwritten.strip():
+                print(f"Switched to handwritten model (conf: {conf_handwritten:.3f} vs {conf_printed:.3f})")
+        else:
+            line_results.append((line_text_printed, conf_printed, 'printed'))
+
+    return line_results
 
 def perform_trocr_ocr(image: np.ndarray, handwritten: bool = False) -> Tuple[str, float]:
     """
     Perform OCR using TrOCR model
     """
+    return perform_trocr_ocr_batch([image], handwritten=handwritten)[0]
+
+def trocr_pixel_values(images: List[np.ndarray], processor) -> torch.Tensor:
+    """
+    Prepare line images as one TrOCR input batch (the processor resizes
+    every line to the model's input size, so they stack); None on failure
+    """
+    if not images or not processor:
+        return None
+
     try:
-        if handwritten:
-            processor = trocr_handwritten_processor
-            model = trocr_handwritten_model
-        else:
-            processor = trocr_processor
-            model = trocr_model
+        # Convert to PIL Images
+        pil_images = [cv2_to_pil(image) for image in images]
 
-        if not processor or not model:
-            return "", 0.0
+        # Process images
+        return processor(pil_images, return_tensors="pt").pixel_values
+
+    except Exception as e:
+        print(f"TrOCR preprocessing failed: {e}")
+        return None
 
-        # Convert to PIL Image
-        pil_image = cv2_to_pil(image)
+def trocr_generate(pixel_values: torch.Tensor, processor, model, count: int,
+                   num_beams: int = 4) -> List[Tuple[str, float]]:
+    """
+    Run one TrOCR generate call over a prepared batch of count lines
+    (num_beams=1 decodes greedily)
+    """
+    if not count:
+        return []
 
-        # Process image
-        pixel_values = processor(pil_image, return_tensors="pt").pixel_values
+    if pixel_values is None or not processor or not model:
+        return [("", 0.0)] * count
 
+    try:
         # Generate text
         with torch.no_grad():
             generated_ids = model.generate(
                 pixel_values,
                 max_length=128,
-                num_beams=4,
-                early_stopping=True
+                num_beams=num_beams,
+                early_stopping=num_beams > 1
             )
 
-        generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
+        generated_texts = processor.batch_decode(generated_ids, skip_special_tokens=True)
 
         # Estimate confidence (simplified - use model logits if available)
         # For now, use a proxy confidence based on text length and content
-        confidence = estimate_trocr_confidence(generated_text)
-
-        return generated_text.strip(), confidence
+        return [(text.strip(), estimate_trocr_confidence(text)) for text in generated_texts]
 
     except Exception as e:
         print(f"TrOCR OCR failed: {e}")
-        return "", 0.0
+        return [("", 0.0)] * count
+
+def perform_trocr_ocr_batch(images: List[np.ndarray], handwritten: bool = False) -> List[Tuple[str, float]]:
+    """
+    Perform OCR on several line images with one TrOCR generate call
+    """
+    if handwritten:
+        processor = trocr_handwritten_processor
+        model = trocr_handwritten_model
+    else:
+        processor = trocr_processor
+        model = trocr_model
+
+    return trocr_generate(trocr_pixel_values(images, processor), processor, model, len(images))
 
 def perform_easyocr(image: np.ndarray) -> Tuple[str, float]:
     """
@@ -229,6 +421,60 @@ def perform_easyocr(image: np.ndarray) -> Tuple[str, float]:
         print(f"EasyOCR failed: {e}")
         return "", 0.0
 
+def perform_easyocr_batch(images: List[np.ndarray]) -> List[Tuple[str, float]]:
+    """
+    Perform OCR on several images with batched EasyOCR calls
+    
+    Images are grouped into size buckets (sides rounded up to a multiple of
+    EASYOCR_BUCKET_PX); each bucket is padded (bottom/right, white) to a
+    common size so it can be stacked without resizing, then results are
+    combined per image as in perform_easyocr
+    """
+    buckets = {}
+    for i, image in enumerate(images):
+        key = (-(-image.shape[0] // EASYOCR_BUCKET_PX), -(-image.shape[1] // EASYOCR_BUCKET_PX))
+        buckets.setdefault(key, []).append(i)
+
+    outputs = [None] * len(images)
+    for indices in buckets.values():
+        for i, output in zip(indices, _easyocr_padded_batch([images[i] for i in indices])):
+            outputs[i] = output
+    return outputs
+
+def _easyocr_padded_batch(images: List[np.ndarray]) -> List[Tuple[str, float]]:
+    """
+    One batched EasyOCR call over images padded to their common size
+    """
+    if len(images) == 1:
+        return [perform_easyocr(images[0])]
+
+    try:
+        max_height = max(image.shape[0] for image in images)
+        max_width = max(image.shape[1] for image in images)
+        padded = [
+            cv2.copyMakeBorder(
+                image, 0, max_height - image.shape[0], 0, max_width - image.shape[1],
+                cv2.BORDER_CONSTANT, value=[255, 255, 255]
+            )
+            for image in images
+        ]
+
+        batch_results = easyocr_reader.readtext_batched(padded, batch_size=len(padded))
+
+        outputs = []
+        for results in batch_results:
+            if not results:
+                outputs.append(("", 0.0))
+                continue
+            texts = [result[1] for result in results]
+            confidences = [result[2] for result in results]
+            outputs.append((" ".join(texts).strip(), sum(confidences) / len(confidences)))
+        return outputs
+
+    except Exception as e:
+        print(f"Batched EasyOCR failed, falling back to per-image: {e}")
+        return [perform_easyocr(image) for image in images]
+
 def ensemble_decision(ocr_results: List[Dict[str, Any]]) -> Tuple[str, float]:
     """
     Make ensemble decision from multiple OCR results
@@ -243,9 +489,10 @@ def ensemble_decision(ocr_results: List[Dict[str, Any]]) -> Tuple[str, float]:
     primary_result = ocr_results[0]
 
     # Check agreement with other results
+    primary_text = primary_result['text'].lower()
     agreement_scores = []
     for result in ocr_results[1:]:
-        similarity = calculate_text_similarity(primary_result['text'], result['text'])
+        similarity = _text_ratio(primary_text, result['text'].lower())
         agreement_scores.append(similarity)
 
     # Boost confidence if there's agreement
@@ -265,7 +512,15 @@ def calculate_text_similarity(text1: str, text2: str) -> float:
     """
     Calculate similarity between two texts using Levenshtein ratio
     """
-    return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+    return _text_ratio(text1.lower(), text2.lower())
+
+def _text_ratio(text1: str, text2: str) -> float:
+    """
+    Similarity ratio 2 * matches / total length of two (lowercased) texts
+    """
+    if Indel is not None:
+        return Indel.normalized_similarity(text1, text2)
+    return SequenceMatcher(None, text1, text2).ratio()
 
 def calculate_lm_score(text: str) -> float:
     """
@@ -275,19 +530,25 @@ def calculate_lm_score(text: str) -> float:
     if not text or len(text.strip()) < 3:
         return 0.0
 
-    # Simple heuristics for text quality
-    words = text.split()
-    if not words:
+    # Simple heuristics for text quality: word count, total length and
+    # common English words (simplified) in one pass
+    word_count = 0
+    total_len = 0
+    common_count = 0
+    for word in text.split():
+        word_count += 1
+        total_len += len(word)
+        if word.lower() in COMMON_ENGLISH_WORDS:
+            common_count += 1
+
+    if not word_count:
         return 0.0
 
     # Average word length (reasonable words are 3-10 chars)
-    avg_word_len = sum(len(word) for word in words) / len(words)
+    avg_word_len = total_len / word_count
     length_score = 1.0 if 3 <= avg_word_len <= 10 else 0.5
 
-    # Presence of common English words (simplified)
-    common_words = ['the', 'and', 'is', 'in', 'to', 'of', 'a', 'that']
-    common_count = sum(1 for word in words if word.lower() in common_words)
-    common_score = min(common_count / len(words), 0.5) * 2  # Scale to 0-1
+    common_score = min(common_count / word_count, 0.5) * 2  # Scale to 0-1
 
     return (length_score + common_score) / 2
 
@@ -318,6 +579,12 @@ def cv2_to_pil(image: np.ndarray):
     Convert OpenCV image to PIL Image
     """
     from PIL import Image
+    if len(image.shape) == 3 and image.shape[2] == 3:
+        # PIL's raw decoder swaps BGR to RGB as it copies the pixels in, so
+        # there is no separate cv2 conversion copy
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        return Image.frombuffer('RGB', (width, height), image, 'raw', 'BGR', 0, 1)
     if len(image.shape) == 3:
         image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     return Image.fromarray(image)
@@ -330,19 +597,65 @@ def perform_ocr(image_path: str) -> Tuple[str, float]:
     image = cv2.imread(image_path)
     return perform_ocr_ensemble(image)
 
+# fastText language-ID model, loaded on first use (False if unavailable)
+lid_model = None
+
+def get_lid_model():
+    """Load the fastText language-ID model lazily"""
+    global lid_model
+
+    if lid_model is None:
+        lid_model = False
+        if fasttext is not None and os.path.isfile(FASTTEXT_LID_MODEL):
+            try:
+                lid_model = fasttext.load_model(FASTTEXT_LID_MODEL)
+                print("fastText language-ID model loaded successfully")
+            except Exception as e:
+                print(f"Failed to load fastText language-ID model: {e}")
+
+    return lid_model
+
+def detect_text_language(text: str) -> str:
+    """
+    Two-letter language code of text, with fastText when its model is
+    available, else langdetect (raises LangDetectException)
+    """
+    model = get_lid_model()
+    if model:
+        try:
+            labels, _ = model.predict(text.replace("\n", " "), k=1)
+            if labels:
+                return labels[0].replace("__label__", "")
+        except Exception as e:
+            print(f"fastText language detection failed, using langdetect: {e}")
+
+    return detect(text)
+
 def detect_language(image: np.ndarray) -> str:
     """
     Detect language using Tesseract OSD or langdetect on initial OCR pass
     """
+    return detect_language_and_text(image)[0]
+
+def detect_language_and_text(image: np.ndarray) -> Tuple[str, str, float]:
+    """
+    Detect language from an initial EasyOCR pass; returns
+    (language, text, confidence) so the EasyOCR result can be reused
+    """
+    # Fast initial pass with EasyOCR to get some text
+    text, confidence = perform_easyocr(image)
+    return language_of_text(text), text, confidence
+
+def language_of_text(text: str) -> str:
+    """
+    Language of an initial OCR pass's text ('en' when too short to tell)
+    """
     try:
-        # Fast initial pass with EasyOCR to get some text
-        text, _ = perform_easyocr(image)
         if not text or len(text.strip()) < 5:
             return 'en'
             
         try:
-            lang = detect(text)
-            return lang
+            return detect_text_language(text)
         except LangDetectException:
             return 'en'
             
@@ -350,6 +663,66 @@ def detect_language(image: np.ndarray) -> str:
         print(f"Language detection failed: {e}")
         return 'en'
 
+def _line_runs_scan(binary: np.ndarray) -> np.ndarray:
+    """
+    Text row runs of a binary (text = 255) image as an (M, 2) array of
+    [start, end) rows; a row holds text when its projection exceeds 5% of
+    the largest one. Projection, threshold and run scan share one pass
+    over the image
+    """
+    height, width = binary.shape
+    proj = np.empty(height, dtype=np.int64)
+    max_proj = 0
+    for y in range(height):
+        total = 0
+        for x in range(width):
+            total += int(binary[y, x])
+        proj[y] = total
+        if total > max_proj:
+            max_proj = total
+
+    threshold = max_proj * 0.05
+    runs = np.empty((height // 2 + 1, 2), dtype=np.int32)
+    count = 0
+    start = -1
+    for y in range(height):
+        if proj[y] > threshold:
+            if start < 0:
+                start = y
+        elif start >= 0:
+            runs[count, 0] = start
+            runs[count, 1] = y
+            count += 1
+            start = -1
+    if start >= 0:
+        runs[count, 0] = start
+        runs[count, 1] = height
+        count += 1
+    return runs[:count]
+
+
+def _line_runs_numpy(binary: np.ndarray) -> np.ndarray:
+    """
+    NumPy version of _line_runs_scan
+    """
+    # Horizontal projection
+    proj = cv2.reduce(binary, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+
+    # Threshold for "text present" in a row
+    threshold = np.max(proj) * 0.05
+
+    # Runs of text rows: [start, end) from the edges of the row mask
+    # (padded with empty rows so every run has both edges)
+    edges = np.diff(np.concatenate(([False], proj > threshold, [False])).astype(np.int8))
+    return np.column_stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+if njit is not None:
+    _line_runs = njit(cache=True)(_line_runs_scan)
+else:
+    _line_runs = _line_runs_numpy
+
+
 def segment_lines(image: np.ndarray) -> List[np.ndarray]:
     """
     Segment image into lines using horizontal projection
@@ -364,32 +737,21 @@ def segment_lines(image: np.ndarray) -> List[np.ndarray]:
         # Assuming standard document (black text on white bg), so invert
         _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
         
-        # Horizontal projection
-        proj = np.sum(binary, axis=1)
-        
-        # Find gaps
+        # Runs of rows with text, from the horizontal projection
+        runs = _line_runs(binary)
+
         lines = []
-        start_idx = None
-        
-        # Threshold for "text present" in a row
-        threshold = np.max(proj) * 0.05
-        
-        for i, val in enumerate(proj):
-            if val > threshold and start_idx is None:
-                start_idx = i
-            elif val <= threshold and start_idx is not None:
-                # End of line
-                if i - start_idx > 5: # Minimum line height
-                    # Add padding
-                    y1 = max(0, start_idx - 2)
-                    y2 = min(image.shape[0], i + 2)
-                    lines.append(image[y1:y2, :])
-                start_idx = None
-                
-        # Handle last line
-        if start_idx is not None:
-             lines.append(image[start_idx:, :])
-             
+        height = image.shape[0]
+        for start_idx, end_idx in runs.tolist():
+            if end_idx == height:
+                # Handle last line (runs to the bottom edge)
+                lines.append(image[start_idx:, :])
+            elif end_idx - start_idx > 5:  # Minimum line height
+                # Add padding
+                y1 = max(0, start_idx - 2)
+                y2 = min(height, end_idx + 2)
+                lines.append(image[y1:y2, :])
+
         if not lines:
             return [image]
             
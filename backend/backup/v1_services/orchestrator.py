@@ -1,21 +1,116 @@
 import os
-import json
+import asyncio
+import functools
+import hashlib
 import cv2
+import numpy as np
+import multiprocessing
+import queue
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
-from app.services.ingest import ingest_document
+from app.services.ingest import ingest_document, ingest_document_iter
 from app.services.layout import LayoutService
-from app.services.ocr import perform_ocr_ensemble
+from app.services.ocr import perform_ocr_ensemble, perform_ocr_ensemble_batch, warm_up_easyocr
 from app.services.text_normalization import TextNormalizationService
 from app.services.pii_detection import PIIDetectionService
 from app.services.trust_score import TrustScoreService
 from app.services.pdf_redaction import create_redacted_pdf
 from app.services.table_extraction import TableExtractionService
+from app.utils import write_json
 
 # Demo mode configuration
 DEMO_MODE = os.getenv("DEMO_MODE", "false").lower() == "true"
 
+# Worker processes for region OCR / normalization / PII / trust scoring (one
+# page of regions per task)
+REGION_WORKERS = int(os.getenv("REGION_WORKERS", str(os.cpu_count() or 1)))
+
+# Cropped region images saved for review: written by background threads, as
+# JPEG (quality 85) unless REGION_IMAGE_DEBUG asks for lossless PNG
+SAVE_REGION_IMAGES = os.getenv("SAVE_REGION_IMAGES", "true").lower() == "true"
+REGION_IMAGE_DEBUG = os.getenv("REGION_IMAGE_DEBUG", "false").lower() == "true"
+REGION_IMAGE_WRITERS = 4
+
+# Processed pages are single-channel binarized scans: they are decoded as
+# grayscale, and layout runs on a copy downscaled by this factor
+LAYOUT_DOWNSCALE = 2
+
+# Pages whose gray levels vary less than this (std) are blank and skipped;
+# pages with less than this share of dark (< 200) pixels skip the layout
+# model and are read as one whole-page region
+BLANK_PAGE_STD = 5.0
+SPARSE_PAGE_INK = 0.01
+
+# Region text shorter than this (ignoring surrounding whitespace), or with no
+# letters or digits at all, cannot hold PII and skips the PII detectors
+PII_MIN_CHARS = 3
+_LETTER_OR_DIGIT = re.compile(r"[^\W_]")
+
+# Decoded pages that may wait for layout detection before the reader blocks
+PAGE_QUEUE_SIZE = int(os.getenv("PAGE_QUEUE_SIZE", "4"))
+
+# Seconds a reader blocked on a full page queue waits before checking
+# whether process_job has stopped taking pages
+PAGE_QUEUE_POLL = 0.5
+
+# Per-process services for region workers, built once when the worker starts
+_REGION_SERVICES: Optional[Dict[str, Any]] = None
+
+# Region workers remember the language and OCR result of recent crops and
+# the PII result of recent texts, so pixel-identical regions (repeated
+# headers, stamps, form templates) skip those stages
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "4096"))
+PII_CACHE_SIZE = int(os.getenv("PII_CACHE_SIZE", "4096"))
+_OCR_CACHE: "OrderedDict[Tuple[bytes, Tuple[int, ...]], Tuple[str, str, float]]" = OrderedDict()
+
+# Services kept for every job this process runs (layout model, the region
+# worker pool and its loaded services, the demo client), created on first use
+_SERVICES: Dict[str, Any] = {}
+_SERVICES_LOCK = threading.Lock()
+
+@dataclass(slots=True)
+class RegionField:
+    """One region's post-OCR result; serialized once per job with to_field"""
+    region_id: str
+    page: int
+    bbox: List[int]
+    label: str
+    detected_language: str
+    raw_text: str
+    ocr_conf: float
+    normalized_text: str
+    trans_conf: float
+    pii: List[Dict[str, Any]]
+    trust_score: float
+    layout_conf: float
+
+    def to_field(self) -> Dict[str, Any]:
+        """Serialize as a result.json field"""
+        return {
+            "region_id": self.region_id,
+            "page": self.page,
+            "bbox": self.bbox,
+            "label": self.label,
+            "detected_language": self.detected_language,
+            "raw_text": self.raw_text,
+            "ocr_conf": self.ocr_conf,
+            "normalized_text": self.normalized_text,
+            "trans_conf": self.trans_conf,
+            "pii": self.pii,
+            "trust_score": self.trust_score,
+            "human_verified": False,
+            "verified_value": None,
+            "layout_conf": self.layout_conf
+        }
+
+
 if DEMO_MODE:
     # Import demo pipeline when in demo mode
     import sys
@@ -29,144 +124,309 @@ if DEMO_MODE:
 
 
 
-def process_job(job_id: str, job_dir: str) -> dict:
+def get_services() -> Dict[str, Any]:
     """
-    Layout-first, region-aware document processing pipeline
+    Services shared by every process_job call in this process; call at
+    worker startup so the first job does not pay for model loading
     """
-    # Check if demo mode is enabled
-    if DEMO_MODE:
-        return process_job_demo(job_id, job_dir)
-    
-    # Initialize services
-    layout_service = LayoutService()
-    text_normalizer = TextNormalizationService()
-    pii_detector = PIIDetectionService()
-    trust_scorer = TrustScoreService()
-    table_extractor = TableExtractionService()
+    with _SERVICES_LOCK:
+        if not _SERVICES:
+            _SERVICES['layout'] = LayoutService()
+            # Workers come from a forkserver so they are never forked while
+            # a job's page reader thread holds a lock
+            _SERVICES['region_pool'] = ProcessPoolExecutor(
+                max_workers=REGION_WORKERS,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_get_region_services
+            )
+        return _SERVICES
+
+
+def _discard_region_pool(region_pool: ProcessPoolExecutor) -> None:
+    """Drop a broken region pool so the next job starts a fresh one"""
+    with _SERVICES_LOCK:
+        if _SERVICES.get('region_pool') is region_pool:
+            _SERVICES.clear()
+    region_pool.shutdown(wait=False)
+
+
+def _get_demo_pipeline() -> "DemoPipeline":
+    with _SERVICES_LOCK:
+        if 'demo' not in _SERVICES:
+            _SERVICES['demo'] = DemoPipeline()
+        return _SERVICES['demo']
+
+
+def _get_region_services() -> Dict[str, Any]:
+    global _REGION_SERVICES
+    if _REGION_SERVICES is None:
+        _REGION_SERVICES = {
+            'text': TextNormalizationService(),
+            'pii': PIIDetectionService(),
+            'trust': TrustScoreService(),
+            'table': TableExtractionService(ocr=perform_ocr_ensemble)
+        }
+        warm_up_easyocr()
+    return _REGION_SERVICES
 
-    # Step 1: Ingest & preprocess images
-    pages_dir, processed_images = ingest_document(job_id, job_dir)
 
-    # Create regions folder for saving cropped region images
-    regions_dir = os.path.join(job_dir, "regions")
-    os.makedirs(regions_dir, exist_ok=True)
+def _process_page_regions(tasks: List[Tuple[Dict[str, Any], str, int, cv2.Mat]]) -> List[RegionField]:
+    """
+    Language detection, OCR and post-OCR stages for one page's regions in a
+    worker process; regions without text are dropped
+    """
+    services = _get_region_services()
+
+    # Crops seen before (on this page or in earlier jobs) reuse their cached
+    # results; the shape stands in for the bbox, which only matters through
+    # its aspect ratio
+    keys = [_crop_key(region_image) for _, _, _, region_image in tasks]
+    results = {}
+    for key in keys:
+        cached = _OCR_CACHE.get(key)
+        if cached is not None:
+            _OCR_CACHE.move_to_end(key)
+            results[key] = cached
+
+    # OCR and table extraction take BGR crops (language detection keeps the
+    # grayscale ones)
+    tasks = [
+        (region, region_id, page_num, cv2.cvtColor(region_image, cv2.COLOR_GRAY2BGR)
+         if region_image.ndim == 2 else region_image, region_image)
+        for region, region_id, page_num, region_image in tasks
+    ]
+
+    # First task with each uncached crop
+    misses = {}
+    for i, key in enumerate(keys):
+        if key not in results:
+            misses.setdefault(key, i)
+
+    if misses:
+        miss_tasks = [tasks[i] for i in misses.values()]
+
+        # Step 3: Per-region language detection (on the grayscale crops)
+        miss_languages = [detect_region_language(gray) for _, _, _, _, gray in miss_tasks]
+
+        # Step 4: OCR ensemble for the page's new crops, with bboxes for
+        # vertical text detection
+        ocr_results = perform_ocr_ensemble_batch(
+            [region_image for _, _, _, region_image, _ in miss_tasks],
+            miss_languages,
+            [region['bbox'] for region, _, _, _, _ in miss_tasks]
+        )
+
+        for key, detected_language, (raw_text, ocr_conf) in zip(misses, miss_languages, ocr_results):
+            results[key] = _OCR_CACHE[key] = (detected_language, raw_text, ocr_conf)
+        while len(_OCR_CACHE) > OCR_CACHE_SIZE:
+            _OCR_CACHE.popitem(last=False)
 
     fields = []
-    region_id_counter = 1
+    for (region, region_id, page_num, region_image, _), key in zip(tasks, keys):
+        detected_language, raw_text, ocr_conf = results[key]
 
-    for page_num, processed_image_path in enumerate(processed_images, 1):
-        # Load processed image for layout detection
-        processed_image = cv2.imread(processed_image_path)
-        
-        # Validate image before processing
-        if processed_image is None or processed_image.size == 0:
-            print(f"ERROR: Invalid image for page {page_num} - image is None or empty")
-            continue
-        
-        if len(processed_image.shape) < 2:
-            print(f"ERROR: Invalid image shape for page {page_num}: {processed_image.shape}")
-            continue
-        
-        height, width = processed_image.shape[:2]
-        if height == 0 or width == 0:
-            print(f"ERROR: Invalid image dimensions for page {page_num}: {width}x{height}")
+        # Skip empty regions
+        if not raw_text.strip():
             continue
-        
-        print(f"Processing page {page_num}: {width}x{height}, dtype={processed_image.dtype}")
-        
-        # Step 2: Layout detection - find semantic regions
-        regions = layout_service.detect_regions(processed_image)
 
-        # If no regions detected, treat whole page as one region
-        if not regions:
-            height, width = processed_image.shape[:2]
-            regions = [{
-                'bbox': [0, 0, width, height],
-                'label': 'text',
-                'confidence': 0.5
-            }]
+        # Steps 5-8
+        fields.append(build_region_field(
+            services['text'], services['pii'], services['trust'], services['table'],
+            region, region_id, page_num, region_image,
+            detected_language, raw_text, ocr_conf
+        ))
+    return fields
+
+
+def _crop_key(region_image: np.ndarray) -> Tuple[bytes, Tuple[int, ...]]:
+    """OCR cache key for a crop: a digest of its pixels and its shape"""
+    digest = hashlib.blake2b(np.ascontiguousarray(region_image), digest_size=16).digest()
+    return digest, region_image.shape
 
-        for region in regions:
-            region_id = f"r{region_id_counter}"
-            region_id_counter += 1
 
-            # Crop region from processed image
-            x1, y1, x2, y2 = region['bbox']
-            region_image = processed_image[y1:y2, x1:x2]
+def _may_contain_pii(text: str) -> bool:
+    """Whether text is long enough, with letters or digits, to be checked for PII"""
+    text = text.strip()
+    return len(text) >= PII_MIN_CHARS and _LETTER_OR_DIGIT.search(text) is not None
 
-            if region_image.size == 0:
-                continue  # Skip empty regions
 
-            # Save cropped region image for debugging/review
-            region_filename = f"{region_id}_page{page_num}_{region['label']}.png"
-            region_path = os.path.join(regions_dir, region_filename)
-            cv2.imwrite(region_path, region_image)
+@functools.lru_cache(maxsize=PII_CACHE_SIZE)
+def _detect_pii(pii_detector: PIIDetectionService, text: str) -> Dict[str, Any]:
+    """pii_detector.detect_pii(text), remembered for recent texts (callers
+    must not modify the result)"""
+    return pii_detector.detect_pii(text)
 
-            # Step 3: Per-region language detection
-            detected_language = detect_region_language(region_image)
 
-            # Step 4: OCR ensemble with bbox for vertical text detection
-            raw_text, ocr_conf = perform_ocr_ensemble(region_image, detected_language, bbox=region['bbox'])
+def _put_page(page_queue: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put item on page_queue unless stop is set first; whether it was put"""
+    while not stop.is_set():
+        try:
+            page_queue.put(item, timeout=PAGE_QUEUE_POLL)
+            return True
+        except queue.Full:
+            pass
+    return False
 
-            # Skip empty regions
-            if not raw_text.strip():
+
+def _read_pages(processed_images: Iterable[str], page_queue: queue.Queue, errors: List[BaseException],
+                stop: threading.Event) -> None:
+    """
+    Decode and validate processed pages into page_queue as (page_num,
+    grayscale page, downscaled BGR layout image), then None once every page
+    has been read or ingestion failed (the exception is added to errors).
+    Gives up as soon as stop is set (process_job failed)
+    """
+    try:
+        for page_num, processed_image_path in enumerate(processed_images, 1):
+            # Load processed image (single channel; crops are cut from it)
+            processed_image = cv2.imread(processed_image_path, cv2.IMREAD_GRAYSCALE)
+            
+            # Validate image before processing
+            if processed_image is None or processed_image.size == 0:
+                print(f"ERROR: Invalid image for page {page_num} - image is None or empty")
                 continue
+            
+            if len(processed_image.shape) < 2:
+                print(f"ERROR: Invalid image shape for page {page_num}: {processed_image.shape}")
+                continue
+            
+            height, width = processed_image.shape[:2]
+            if height == 0 or width == 0:
+                print(f"ERROR: Invalid image dimensions for page {page_num}: {width}x{height}")
+                continue
+
+            # Downscaled 3-channel copy for layout detection
+            layout_image = cv2.cvtColor(
+                cv2.resize(processed_image, None, fx=1 / LAYOUT_DOWNSCALE, fy=1 / LAYOUT_DOWNSCALE,
+                           interpolation=cv2.INTER_AREA),
+                cv2.COLOR_GRAY2BGR
+            )
+
+            if not _put_page(page_queue, (page_num, processed_image, layout_image), stop):
+                return
+    except BaseException as e:
+        # Ingest failures are raised by process_job once the pages read so
+        # far are done
+        errors.append(e)
+    finally:
+        _put_page(page_queue, None, stop)
+
+
+def process_job(job_id: str, job_dir: str) -> dict:
+    """
+    Layout-first, region-aware document processing pipeline
+    """
+    # Check if demo mode is enabled
+    if DEMO_MODE:
+        return process_job_demo(job_id, job_dir)
+    
+    # Shared services (region stages have theirs loaded in the pool workers)
+    services = get_services()
+    layout_service = services['layout']
+    region_pool = services['region_pool']
 
-            # Step 5: Post-OCR normalization
-            normalization_result = text_normalizer.normalize_text(raw_text)
-            normalized_text = normalization_result.get('normalized_text', raw_text)
-            trans_conf = normalization_result.get('confidence', 0.5)
-
-            # Step 6: PII detection ensemble
-            pii_result = pii_detector.detect_pii(normalized_text)
-            pii_entities = transform_pii_entities(pii_result.get('entities', []))
-
-            # Step 7: Handle tables if detected
-            if region['label'] == 'table':
-                table_data = table_extractor.extract_tables_from_image(region_image)
-                if table_data:
-                    # Convert table to structured text
-                    normalized_text = format_table_as_text(table_data)
-                    trans_conf = 0.8  # Higher confidence for structured extraction
-
-            # Step 8: Trust score calculation
-            confidences = {
-                'ocr_confidence': ocr_conf,
-                'translation_confidence': trans_conf,
-                'pii_confidence': pii_result.get('total_confidence', 1.0),
-                'layout_confidence': region['confidence']
-            }
-
-            # Add penalties for certain conditions
-            penalties = []
-            if detected_language != 'english':
-                penalties.append('indic_script')
-            if region['label'] == 'handwritten':
-                penalties.append('handwriting')
-            if region['label'] == 'table':
-                penalties.append('table')
-
-            confidences['penalties'] = penalties
-
-            trust_score = trust_scorer.calculate_trust_score(confidences)
-
-            field = {
-                "region_id": region_id,
-                "page": page_num,
-                "bbox": region['bbox'],
-                "label": region['label'],
-                "detected_language": detected_language,
-                "raw_text": raw_text,
-                "ocr_conf": ocr_conf,
-                "normalized_text": normalized_text,
-                "trans_conf": trans_conf,
-                "pii": pii_entities,
-                "trust_score": trust_score,
-                "human_verified": False,
-                "verified_value": None,
-                "layout_conf": region['confidence']
-            }
-            fields.append(field)
+    # Step 1: Ingest & preprocess images (pages are rendered ahead on a
+    # thread pool while earlier ones go through the later steps)
+    pages_dir, page_count, processed_images = ingest_document_iter(job_id, job_dir)
+
+    # Create regions folder for saving cropped region images
+    regions_dir = os.path.join(job_dir, "regions")
+    os.makedirs(regions_dir, exist_ok=True)
+
+    region_id_counter = 1
+    futures = []
+
+    # Three pipelined stages: a reader thread takes pages from ingestion as
+    # they are rendered and decodes them ahead (bounded by the page queue),
+    # layout runs page by page on this thread, and each page's regions go to
+    # a worker process together, so their OCR is batched. IDs are assigned
+    # here, in reading order
+    page_queue = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+    read_errors = []
+    stop_reading = threading.Event()
+    reader = threading.Thread(target=_read_pages, args=(processed_images, page_queue, read_errors, stop_reading),
+                              daemon=True)
+    reader.start()
+
+    if REGION_IMAGE_DEBUG:
+        region_image_ext, region_image_params = "png", []
+    else:
+        region_image_ext, region_image_params = "jpg", [cv2.IMWRITE_JPEG_QUALITY, 85]
+
+    # A dead region worker breaks the pool: drop it for the next job
+    try:
+        # Leaving the block also waits for outstanding region image writes
+        with ThreadPoolExecutor(max_workers=REGION_IMAGE_WRITERS) as image_pool:
+            for page_num, processed_image, layout_image in iter(page_queue.get, None):
+                height, width = processed_image.shape[:2]
+                print(f"Processing page {page_num}: {width}x{height}, dtype={processed_image.dtype}")
+            
+                # Blank pages have nothing to read; nearly blank ones are not
+                # worth the layout model
+                _, std = cv2.meanStdDev(processed_image)
+                if std[0, 0] < BLANK_PAGE_STD:
+                    print(f"Skipping blank page {page_num}")
+                    continue
+                sparse = np.count_nonzero(processed_image < 200) < SPARSE_PAGE_INK * processed_image.size
+
+                # Step 2: Layout detection - find semantic regions (on the
+                # downscaled page; boxes are scaled back to full resolution)
+                regions = [] if sparse else layout_service.detect_regions(layout_image)
+                del layout_image
+                for region in regions:
+                    x1, y1, x2, y2 = region['bbox']
+                    region['bbox'] = [
+                        min(x1 * LAYOUT_DOWNSCALE, width), min(y1 * LAYOUT_DOWNSCALE, height),
+                        min(x2 * LAYOUT_DOWNSCALE, width), min(y2 * LAYOUT_DOWNSCALE, height)
+                    ]
+
+                # If no regions detected, treat whole page as one region
+                if not regions:
+                    height, width = processed_image.shape[:2]
+                    regions = [{
+                        'bbox': [0, 0, width, height],
+                        'label': 'text',
+                        'confidence': 0.5
+                    }]
+
+                tasks = []
+                for region in regions:
+                    region_id = f"r{region_id_counter}"
+                    region_id_counter += 1
+
+                    # Crop region from processed image
+                    x1, y1, x2, y2 = region['bbox']
+                    region_image = processed_image[y1:y2, x1:x2]
+
+                    if region_image.size == 0:
+                        continue  # Skip empty regions
+
+                    # Save cropped region image for debugging/review
+                    if SAVE_REGION_IMAGES:
+                        region_filename = f"{region_id}_page{page_num}_{region['label']}.{region_image_ext}"
+                        region_path = os.path.join(regions_dir, region_filename)
+                        image_pool.submit(cv2.imwrite, region_path, region_image, region_image_params)
+
+                    tasks.append((region, region_id, page_num, region_image))
+
+                # Steps 3-8 run in a worker process
+                if tasks:
+                    futures.append(region_pool.submit(_process_page_regions, tasks))
+
+            if read_errors:
+                raise read_errors[0]
+
+            # Futures were submitted in reading order
+            fields = [field.to_field() for future in futures for field in future.result()]
+    except BrokenProcessPool:
+        _discard_region_pool(region_pool)
+        raise
+    finally:
+        # If this loop failed, nothing takes pages any more: stop the reader,
+        # then close ingestion so pages not yet rendered are dropped
+        stop_reading.set()
+        reader.join()
+        processed_images.close()
 
     # Step 9: Create redacted PDF
     create_redacted_pdf(job_id, job_dir, fields)
@@ -175,7 +435,7 @@ def process_job(job_id: str, job_dir: str) -> dict:
     result = {
         "job_id": job_id,
         "status": "done",
-        "pages": len(processed_images),
+        "pages": page_count,
         "fields": fields,
         "created_at": datetime.now().isoformat(),
         "processing_meta": {
@@ -186,11 +446,85 @@ def process_job(job_id: str, job_dir: str) -> dict:
     }
 
     result_path = os.path.join(job_dir, "result.json")
-    with open(result_path, 'w') as f:
-        json.dump(result, f, indent=2)
+    write_json(result_path, result)
 
     return result
 
+def build_region_field(
+    text_normalizer: TextNormalizationService,
+    pii_detector: PIIDetectionService,
+    trust_scorer: TrustScoreService,
+    table_extractor: TableExtractionService,
+    region: Dict[str, Any],
+    region_id: str,
+    page_num: int,
+    region_image: cv2.Mat,
+    detected_language: str,
+    raw_text: str,
+    ocr_conf: float
+) -> RegionField:
+    """
+    Run post-OCR stages (normalization, PII, tables, trust score) for one region
+    """
+    # Step 5: Post-OCR normalization
+    normalization_result = text_normalizer.normalize_text(raw_text)
+    normalized_text = normalization_result.get('normalized_text', raw_text)
+    trans_conf = normalization_result.get('confidence', 0.5)
+
+    # Step 6: PII detection ensemble (the same empty result the detectors
+    # give when they find nothing, for text too short to hold PII)
+    if _may_contain_pii(normalized_text):
+        pii_result = _detect_pii(pii_detector, normalized_text)
+    else:
+        pii_result = {'entities': [], 'has_pii': False, 'total_confidence': 0.0, 'entity_count': 0}
+    pii_entities = transform_pii_entities(pii_result.get('entities', []))
+
+    # Step 7: Handle tables if detected
+    if region['label'] == 'table':
+        tables = table_extractor.extract_tables_from_image(region_image)
+        # Convert table to structured text (the OCR text is kept if the
+        # tables have no cells)
+        table_text = format_table_as_text({'tables': tables})
+        if table_text:
+            normalized_text = table_text
+            trans_conf = 0.8  # Higher confidence for structured extraction
+
+    # Step 8: Trust score calculation
+    confidences = {
+        'ocr_confidence': ocr_conf,
+        'translation_confidence': trans_conf,
+        'pii_confidence': pii_result.get('total_confidence', 1.0),
+        'layout_confidence': region['confidence']
+    }
+
+    # Add penalties for certain conditions
+    penalties = []
+    if detected_language != 'english':
+        penalties.append('indic_script')
+    if region['label'] == 'handwritten':
+        penalties.append('handwriting')
+    if region['label'] == 'table':
+        penalties.append('table')
+
+    confidences['penalties'] = penalties
+
+    trust_score = trust_scorer.calculate_trust_score(confidences)
+
+    return RegionField(
+        region_id=region_id,
+        page=page_num,
+        bbox=region['bbox'],
+        label=region['label'],
+        detected_language=detected_language,
+        raw_text=raw_text,
+        ocr_conf=ocr_conf,
+        normalized_text=normalized_text,
+        trans_conf=trans_conf,
+        pii=pii_entities,
+        trust_score=trust_score,
+        layout_conf=region['confidence']
+    )
+
 def detect_region_language(region_image: cv2.Mat) -> str:
     """
     Detect language of a region based on script presence
@@ -224,27 +558,30 @@ def format_table_as_text(table_data: Dict[str, Any]) -> str:
     if not table_data or 'tables' not in table_data:
         return ""
 
-    formatted_text = ""
+    parts = []
     for table in table_data['tables']:
         if 'data' in table:
+            # Rows are records (column -> cell) or lists of cells
             for row in table['data']:
-                formatted_text += " | ".join(str(cell) for cell in row) + "\n"
-        formatted_text += "\n"
+                cells = row.values() if isinstance(row, dict) else row
+                parts.append(" | ".join(map(str, cells)))
+                parts.append("\n")
+        parts.append("\n")
 
-    return formatted_text.strip()
+    return "".join(parts).strip()
 
 def transform_pii_entities(entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Transform PII entities to match the expected schema
     """
-    transformed = []
-    for entity in entities:
-        transformed.append({
+    return [
+        {
             'type': entity.get('entity_type', 'unknown'),
             'span': [entity.get('start', 0), entity.get('end', 0)],
             'confidence': entity.get('confidence', 0.0)
-        })
-    return transformed
+        }
+        for entity in entities
+    ]
 
 
 def process_job_demo(job_id: str, job_dir: str) -> dict:
@@ -261,21 +598,32 @@ def process_job_demo(job_id: str, job_dir: str) -> dict:
         raise ValueError("No images found to process")
     
     # Initialize demo pipeline
-    demo_pipeline = DemoPipeline()
+    demo_pipeline = _get_demo_pipeline()
     
-    # For demo, we'll process the first image (or combine multiple if needed)
-    # Most demos will be single-page documents
-    first_image = processed_images[0]
-    
-    print(f"📄 Processing image: {first_image}")
-    
-    # Process with GPT-4o Vision
-    result = demo_pipeline.process_document(first_image, job_id=job_id)
+    # Most demos will be single-page documents; multi-page ones send every
+    # page concurrently and combine the fields
+    if len(processed_images) == 1:
+        print(f"📄 Processing image: {processed_images[0]}")
+        
+        # Process with GPT-4o Vision
+        result = demo_pipeline.process_document(processed_images[0], job_id=job_id)
+    else:
+        print(f"📄 Processing {len(processed_images)} pages")
+        page_results = asyncio.run(demo_pipeline.aprocess_documents(processed_images, job_id=job_id))
+
+        result = page_results[0]
+        fields = []
+        for page_num, page_result in enumerate(page_results, 1):
+            for field in page_result.get("fields", []):
+                field["page"] = page_num
+                field["region_id"] = f"page{page_num}_{field.get('region_id', len(fields) + 1)}"
+                fields.append(field)
+        result["fields"] = fields
+        result["pages"] = len(page_results)
     
     # Save result to job directory
     result_path = os.path.join(job_dir, "result.json")
-    with open(result_path, 'w') as f:
-        json.dump(result, f, indent=2)
+    write_json(result_path, result)
     
     print(f"✅ Demo processing complete for job {job_id}")
     
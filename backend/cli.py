@@ -155,15 +155,34 @@ def worker():
     """Start the RQ worker"""
     click.echo("Starting RQ worker...")
     try:
-        from rq import Worker, Connection
-        from app.services.job_queue import redis_conn
+        from app.services.worker import run_worker
 
-        with Connection(redis_conn):
-            worker = Worker(['yantra-ai-queue'])
-            worker.work()
+        run_worker()
     except Exception as e:
         click.echo(f"Error starting worker: {e}", err=True)
 
 
+
+@cli.command()
+@click.option('--config', 'config_path', default='config/k_ingest_config.yaml', help='K-Ingest config file')
+def export_trt(config_path):
+    """Build a TensorRT engine for the layout model on this GPU"""
+    click.echo("Exporting layout model to TensorRT...")
+    try:
+        from app.services.k_ingest import KIngestPipeline
+        from app.services.k_ingest.layout_detection import export_tensorrt_engine
+
+        layout_config = KIngestPipeline(config_path).config.get('layout_detection', {})
+        engine_path = export_tensorrt_engine(
+            layout_config.get('model_path', 'models/layout/doclayout_yolo_base.pt'),
+            layout_config.get('tensorrt_engine_dir', 'cache/trt'),
+            inference_size=layout_config.get('inference_size', 1024),
+            fp16=layout_config.get('fp16', False)
+        )
+        click.echo(f"Engine written to {engine_path}")
+    except Exception as e:
+        click.echo(f"Error exporting TensorRT engine: {e}", err=True)
+
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -7,16 +7,23 @@ to process complex documents (curly brace grouping, Hinglish text) for demo purp
 For production, this will be replaced with fine-tuned local models.
 """
 
+import asyncio
 import base64
 import json
+import mmap
 import os
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional
-from openai import OpenAI
+from typing import Dict, Any, List, Optional
+from openai import AsyncOpenAI, OpenAI
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables from parent directory's .env file
 env_path = Path(__file__).parent.parent / '.env'
 if env_path.exists():
@@ -25,61 +32,11 @@ if env_path.exists():
 else:
     print(f"⚠️  No .env file found at {env_path}")
 
+# Most GPT-4o page requests in flight at once for multi-page documents
+MAX_CONCURRENT_REQUESTS = int(os.getenv("DEMO_MAX_CONCURRENT_REQUESTS", "8"))
 
-class DemoPipeline:
-    """Demo pipeline using GPT-4o Vision API"""
-    
-    def __init__(self, api_key: Optional[str] = None):
-        """
-        Initialize the demo pipeline
-        
-        Args:
-            api_key: OpenAI API key (if not provided, reads from OPENAI_API_KEY env var)
-        """
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
-        
-        self.client = OpenAI(api_key=self.api_key)
-    
-    def encode_image(self, image_path: str) -> str:
-        """
-        Encode image to base64 string
-        
-        Args:
-            image_path: Path to image file
-            
-        Returns:
-            Base64 encoded image string
-        """
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
-    
-    def process_document(self, image_path: str, job_id: Optional[str] = None) -> Dict[str, Any]:
-        """
-        Process document using GPT-4o Vision
-        
-        Args:
-            image_path: Path to document image
-            job_id: Optional job ID (generated if not provided)
-            
-        Returns:
-            Structured JSON result matching Truth Layer schema
-        """
-        print(f"🚀 Truth Layer Demo: Processing {image_path}...")
-        
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
-        
-        # Generate job ID if not provided
-        if not job_id:
-            job_id = str(uuid.uuid4())
-        
-        # Encode image
-        base64_image = self.encode_image(image_path)
-        
-        # Construct the prompt
-        prompt = """
+
+EXTRACTION_PROMPT = """
 You are the "Truth Layer" AI engine. Your job is to extract structured data from messy Indian documents (prescriptions, invoices, forms).
 
 CRITICAL RULES:
@@ -132,57 +89,170 @@ IMPORTANT:
 - Be thorough - extract ALL visible text, both printed and handwritten.
 - Return ONLY valid JSON, no additional text.
 """
+
+
+class DemoPipeline:
+    """Demo pipeline using GPT-4o Vision API"""
+    
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Initialize the demo pipeline
         
-        try:
-            # Call GPT-4o Vision API
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                },
-                            },
-                        ],
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.0,  # Deterministic output
-            )
-            
-            # Parse response
-            result = json.loads(response.choices[0].message.content)
-            
-            # Ensure job_id is set
-            result["job_id"] = job_id
-            
-            # Ensure status is set
-            if "status" not in result:
-                result["status"] = "done"
-            
-            # Ensure created_at is set
-            if "created_at" not in result:
-                result["created_at"] = datetime.utcnow().isoformat() + "Z"
+        Args:
+            api_key: OpenAI API key (if not provided, reads from OPENAI_API_KEY env var)
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
+        
+        self.client = OpenAI(api_key=self.api_key)
+    
+    def encode_image(self, image_path: str) -> str:
+        """
+        Encode image to base64 string
+        
+        Args:
+            image_path: Path to image file
             
-            # Ensure processing_meta is set
-            if "processing_meta" not in result:
-                result["processing_meta"] = {
-                    "layout_model": "gpt-4o-vision",
-                    "ocr_model": "gpt-4o-vision",
-                    "lingua_model": "gpt-4o-vision"
-                }
+        Returns:
+            Base64 encoded image string
+        """
+        with open(image_path, "rb") as image_file:
+            if os.fstat(image_file.fileno()).st_size == 0:
+                return ""
+
+            # Encode straight from a read-only mapping of the file, so the raw
+            # bytes are never copied onto the heap
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return base64.b64encode(mapped).decode('ascii')
+    
+    def process_document(self, image_path: str, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process document using GPT-4o Vision
+        
+        Args:
+            image_path: Path to document image
+            job_id: Optional job ID (generated if not provided)
             
+        Returns:
+            Structured JSON result matching Truth Layer schema
+        """
+        print(f"🚀 Truth Layer Demo: Processing {image_path}...")
+        
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+        
+        # Generate job ID if not provided
+        if not job_id:
+            job_id = str(uuid.uuid4())
+        
+        # Encode image
+        base64_image = self.encode_image(image_path)
+        
+        try:
+            # Call GPT-4o Vision API
+            response = self.client.chat.completions.create(**self._request(base64_image))
+            result = self._finalize_result(response, job_id)
+
             print("✅ Truth Layer Extraction Complete")
             return result
             
         except Exception as e:
             print(f"❌ Error processing document: {e}")
             raise
+
+    async def aprocess_documents(self, image_paths: List[str], job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Process several page images concurrently (at most
+        MAX_CONCURRENT_REQUESTS requests in flight) over one shared client
+        
+        Args:
+            image_paths: Paths to page images
+            job_id: Optional job ID (generated if not provided)
+            
+        Returns:
+            One result per image, in order
+        """
+        if not job_id:
+            job_id = str(uuid.uuid4())
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async with AsyncOpenAI(api_key=self.api_key) as client:
+            async def process_page(image_path: str) -> Dict[str, Any]:
+                print(f"🚀 Truth Layer Demo: Processing {image_path}...")
+
+                if not os.path.exists(image_path):
+                    raise FileNotFoundError(f"Image file not found: {image_path}")
+
+                # Encode off the event loop
+                base64_image = await loop.run_in_executor(None, self.encode_image, image_path)
+
+                async with semaphore:
+                    response = await client.chat.completions.create(**self._request(base64_image))
+                return self._finalize_result(response, job_id)
+
+            try:
+                results = await asyncio.gather(*(process_page(image_path) for image_path in image_paths))
+            except Exception as e:
+                print(f"❌ Error processing document: {e}")
+                raise
+
+        print("✅ Truth Layer Extraction Complete")
+        return list(results)
+
+    def _request(self, base64_image: str) -> Dict[str, Any]:
+        """
+        Chat completion arguments for one page image
+        """
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": EXTRACTION_PROMPT},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/jpeg;base64,{base64_image}"
+                            },
+                        },
+                    ],
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.0,  # Deterministic output
+        }
+
+    def _finalize_result(self, response, job_id: str) -> Dict[str, Any]:
+        """
+        Parse a chat completion into a result, filling in required fields
+        """
+        # Parse response
+        result = json.loads(response.choices[0].message.content)
+        
+        # Ensure job_id is set
+        result["job_id"] = job_id
+        
+        # Ensure status is set
+        if "status" not in result:
+            result["status"] = "done"
+        
+        # Ensure created_at is set
+        if "created_at" not in result:
+            result["created_at"] = datetime.utcnow().isoformat() + "Z"
+        
+        # Ensure processing_meta is set
+        if "processing_meta" not in result:
+            result["processing_meta"] = {
+                "layout_model": "gpt-4o-vision",
+                "ocr_model": "gpt-4o-vision",
+                "lingua_model": "gpt-4o-vision"
+            }
+        
+        return result
     
     def save_result(self, result: Dict[str, Any], output_path: str):
         """
@@ -192,8 +262,12 @@ IMPORTANT:
             result: Processing result
             output_path: Path to save JSON file
         """
-        with open(output_path, "w") as f:
-            json.dump(result, f, indent=2)
+        if orjson is not None:
+            with open(output_path, "wb") as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(output_path, "w") as f:
+                json.dump(result, f, indent=2)
         print(f"💾 Saved result to {output_path}")
 
 
@@ -0,0 +1,55 @@
+"""
+Helpers shared by the tests
+"""
+
+import importlib.util
+import os
+import sys
+import types
+from unittest import mock
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def has_modules(*names: str) -> bool:
+    """Whether every named module can be imported"""
+    return all(importlib.util.find_spec(name) is not None for name in names)
+
+
+def load_with_stand_ins(name: str, relative_path: str, stand_ins: dict):
+    """
+    Load the module at relative_path (from the backend directory) as name,
+    with the modules it imports from stand_ins (module name -> attributes)
+    replaced by placeholders while it loads
+    """
+    modules = {}
+    for module_name, attributes in stand_ins.items():
+        module = types.ModuleType(module_name)
+        module.__dict__.update(attributes)
+        modules[module_name] = module
+
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(sys.modules, modules):
+        spec.loader.exec_module(module)
+    return module
+
+
+def load_v1_orchestrator():
+    """
+    Load backup/v1_services/orchestrator.py on its own. The services it
+    imports by their old app.services paths are replaced by placeholders;
+    the functions under test take their services as arguments
+    """
+    return load_with_stand_ins('v1_orchestrator', os.path.join('backup', 'v1_services', 'orchestrator.py'), {
+        'app.services.ingest': {'ingest_document': None, 'ingest_document_iter': None},
+        'app.services.layout': {'LayoutService': object},
+        'app.services.ocr': {'perform_ocr_ensemble': None, 'perform_ocr_ensemble_batch': None,
+                             'warm_up_easyocr': None},
+        'app.services.text_normalization': {'TextNormalizationService': object},
+        'app.services.pii_detection': {'PIIDetectionService': object},
+        'app.services.trust_score': {'TrustScoreService': object},
+        'app.services.pdf_redaction': {'create_redacted_pdf': None},
+        'app.services.table_extraction': {'TableExtractionService': object},
+        'app.utils': {'write_json': None},
+    })
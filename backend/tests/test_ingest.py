@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from tests.support import has_modules, load_with_stand_ins
+
+
+def load_ingest():
+    """backup/v1_services/ingest.py without pdf2image (rendering is faked per test)"""
+    return load_with_stand_ins('v1_ingest', os.path.join('backup', 'v1_services', 'ingest.py'), {
+        'pdf2image': {'convert_from_path': None, 'pdfinfo_from_path': None},
+    })
+
+
+class FakePage:
+    """The parts of a rendered PIL page the ingest code uses"""
+
+    def __init__(self, pixels):
+        self.pixels = pixels
+        self.height, self.width = pixels.shape[:2]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.pixels
+
+
+@unittest.skipUnless(has_modules('cv2'), "OpenCV is not installed")
+class IngestPageTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ingest = load_ingest()
+
+    def setUp(self):
+        self.job_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.job_dir)
+        for name in ("pages", "processed"):
+            os.makedirs(os.path.join(self.job_dir, name))
+
+    def ingest_page(self, render):
+        dpis = []
+
+        def convert_from_path(pdf_path, dpi, **kwargs):
+            dpis.append(dpi)
+            return render(dpi)
+
+        with mock.patch.object(self.ingest, 'convert_from_path', convert_from_path), \
+                mock.patch.object(self.ingest.logger, 'exception'):
+            path = self.ingest.ingest_page("doc.pdf", os.path.join(self.job_dir, "pages"),
+                                           os.path.join(self.job_dir, "processed"), 0)
+        return path, dpis
+
+    def test_falls_back_to_a_lower_dpi_for_the_page(self):
+        page = FakePage(np.full((40, 30, 3), 255, dtype=np.uint8))
+
+        def render(dpi):
+            if dpi == 300:
+                raise RuntimeError("out of memory")
+            return [page]
+
+        path, dpis = self.ingest_page(render)
+        self.assertEqual(dpis, [300, 200])
+        self.assertTrue(os.path.exists(path))
+
+    def test_page_failing_validation_is_rendered_again_at_a_lower_dpi(self):
+        good = FakePage(np.full((40, 30, 3), 255, dtype=np.uint8))
+        # Black and white noise has the high-variance strips of corruption
+        noise = np.random.default_rng(0).choice([0, 255], size=(40, 30, 1)).astype(np.uint8)
+        corrupt = FakePage(np.repeat(noise, 3, axis=2))
+
+        _, dpis = self.ingest_page(lambda dpi: [corrupt if dpi == 300 else good])
+        self.assertEqual(dpis, [300, 200])
+
+    def test_page_that_never_renders_fails(self):
+        def render(dpi):
+            raise RuntimeError("broken page")
+
+        with self.assertRaisesRegex(ValueError, "Failed to render page 1"):
+            self.ingest_page(render)
+
+
+@unittest.skipUnless(has_modules('cv2'), "OpenCV is not installed")
+class IngestDocumentIterTest(unittest.TestCase):
+    def test_pdfinfo_failure_keeps_its_cause(self):
+        ingest = load_ingest()
+        cause = RuntimeError("Syntax Error: Couldn't read xref table")
+        with tempfile.TemporaryDirectory() as job_dir, \
+                mock.patch.object(ingest, 'pdfinfo_from_path', side_effect=cause):
+            with self.assertRaisesRegex(ValueError, "Couldn't read xref table") as raised:
+                ingest.ingest_document_iter('job', job_dir)
+        self.assertIs(raised.exception.__cause__, cause)
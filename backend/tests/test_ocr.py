@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from tests.support import has_modules, load_with_stand_ins
+
+
+class FakeReader:
+    def __init__(self, *args, **kwargs):
+        self.readtext_calls = 0
+
+    def readtext(self, image):
+        self.readtext_calls += 1
+        return []
+
+
+def load_ocr():
+    """backup/v1_services/ocr.py with its model libraries replaced (models are faked per test)"""
+    return load_with_stand_ins('v1_ocr', os.path.join('backup', 'v1_services', 'ocr.py'), {
+        'easyocr': {'Reader': FakeReader},
+        'transformers': {'TrOCRProcessor': None, 'VisionEncoderDecoderModel': None},
+        'torch': {'cuda': types.SimpleNamespace(is_available=lambda: False), 'Tensor': object},
+        'langdetect': {'detect': None, 'LangDetectException': Exception},
+    })
+
+
+class FakeExport:
+    """ORTModelForVision2Seq.from_pretrained(..., export=True) stand-in"""
+
+    def __init__(self, before_save=None, fail=False):
+        self.before_save = before_save
+        self.fail = fail
+
+    def from_pretrained(self, model_name, export):
+        return self
+
+    def save_pretrained(self, path):
+        if self.before_save:
+            self.before_save()
+        if self.fail:
+            raise RuntimeError("export failed")
+        with open(os.path.join(path, 'encoder_model.onnx'), 'w') as f:
+            f.write('exported')
+
+
+@unittest.skipUnless(has_modules('cv2'), "OpenCV is not installed")
+class ExportTrocrOnnxTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ocr = load_ocr()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.export_dir = os.path.join(self.cache_dir, 'model-int8')
+
+    def export(self, fake):
+        with mock.patch.object(self.ocr, 'ORTModelForVision2Seq', fake):
+            self.ocr._export_trocr_onnx('model', self.export_dir, quantize=False)
+
+    def test_export_is_published_and_staging_removed(self):
+        self.export(FakeExport())
+        self.assertEqual(os.listdir(self.cache_dir), ['model-int8'])
+        self.assertEqual(os.listdir(self.export_dir), ['encoder_model.onnx'])
+
+    def test_export_published_by_another_process_first_is_kept(self):
+        def publish_first():
+            os.makedirs(self.export_dir)
+            with open(os.path.join(self.export_dir, 'other.onnx'), 'w') as f:
+                f.write('other')
+
+        self.export(FakeExport(before_save=publish_first))
+        self.assertEqual(os.listdir(self.cache_dir), ['model-int8'])
+        self.assertEqual(os.listdir(self.export_dir), ['other.onnx'])
+
+    def test_failed_export_leaves_nothing_behind(self):
+        with self.assertRaisesRegex(RuntimeError, "export failed"):
+            self.export(FakeExport(fail=True))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+@unittest.skipUnless(has_modules('cv2'), "OpenCV is not installed")
+class EasyOcrWarmupTest(unittest.TestCase):
+    def test_import_does_not_run_the_recognizer_until_warm_up(self):
+        ocr = load_ocr()
+        self.assertEqual(ocr.easyocr_reader.readtext_calls, 0)
+        ocr.warm_up_easyocr()
+        self.assertEqual(ocr.easyocr_reader.readtext_calls, 1)
@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from tests.support import load_with_stand_ins
+
+
+def load_orchestrator_v2():
+    """orchestrator_v2 with its pipeline stages (and PyMuPDF) as placeholders"""
+    return load_with_stand_ins('orchestrator_v2', os.path.join('app', 'services', 'orchestrator_v2.py'), {
+        'fitz': {},
+        'app.services.k_ingest': {'KIngestPipeline': object},
+        'app.services.k_ocr': {'MultiTrackOCRPipeline': object},
+        'app.services.k_lingua': {'KLinguaPipeline': object},
+        'app.services.k_eval': {'KEvalPipeline': object},
+        'app.services.pii_detection': {'PIIDetectionService': object},
+        'app.services.pdf_redaction': {'create_redacted_pdf': None},
+    })
+
+
+class SubmitJobTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.orchestrator = load_orchestrator_v2()
+
+    def test_failed_job_writes_a_failed_result(self):
+        with tempfile.TemporaryDirectory() as job_dir:
+            with mock.patch.object(self.orchestrator, 'process_job', side_effect=RuntimeError("layout model missing")), \
+                    self.assertLogs(self.orchestrator.logger, 'ERROR'):
+                future = self.orchestrator.submit_job('job-1', job_dir)
+                with self.assertRaises(RuntimeError):
+                    future.result()
+
+                # The failure is recorded by a done callback on the worker
+                # thread, possibly just after result() returns
+                result_path = os.path.join(job_dir, 'result.json')
+                deadline = time.monotonic() + 5
+                while not os.path.exists(result_path) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+
+            with open(result_path) as f:
+                result = json.load(f)
+
+        self.assertEqual(result['job_id'], 'job-1')
+        self.assertEqual(result['status'], 'failed')
+        self.assertEqual(result['error'], "layout model missing")
@@ -0,0 +1,61 @@
+import random
+import re
+import unittest
+from unittest import mock
+
+from app.services import pii_detection
+from app.services.pii_detection import PIIDetectionService
+
+# Characters the custom patterns care about, with some filler
+ALPHABET = '0123456789' * 4 + '  --+.@_%' + 'ABCPQXYZabcxyz' + 'कमलनर'
+
+
+def reference_custom_patterns(service, text):
+    """
+    The original custom-pattern scan: every pattern run with re.finditer on
+    its own (CREDIT_CARD matches must pass the Luhn check)
+    """
+    found = []
+    for entity_type, pattern_info in service.custom_patterns.items():
+        for match in re.finditer(pattern_info['regex'], text, re.IGNORECASE | re.MULTILINE):
+            if entity_type == 'CREDIT_CARD' and not pii_detection._luhn_valid(match.group()):
+                continue
+            found.append((entity_type, match.start(), match.end()))
+    return found
+
+
+class CustomPatternScanTest(unittest.TestCase):
+    def setUp(self):
+        with mock.patch('builtins.print'):
+            self.service = PIIDetectionService()
+
+    def scan(self, text):
+        return [(e.entity_type, e.start, e.end) for e in self.service._detect_with_custom_patterns(text)]
+
+    def test_matches_the_per_pattern_reference(self):
+        rng = random.Random(0)
+        for _ in range(3000):
+            text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 40)))
+            with self.subTest(text=text):
+                self.assertEqual(sorted(self.scan(text)), sorted(reference_custom_patterns(self.service, text)))
+
+    def test_overlapping_matches_of_different_patterns_are_all_found(self):
+        self.assertEqual(sorted(self.scan('487059640235')), [
+            ('INDIAN_AADHAR', 0, 12),
+            ('INDIAN_PHONE', 1, 11),
+        ])
+
+    def test_luhn_rejected_card_span_is_still_scanned_by_other_patterns(self):
+        text = "4111 1111 1111 1112"
+        self.assertNotIn('CREDIT_CARD', [entity_type for entity_type, _, _ in self.scan(text)])
+        self.assertEqual(self.scan(text), [('INDIAN_AADHAR', 0, 14)])
+        entities = self.service.detect_pii(text)['entities']
+        self.assertEqual([(e['entity_type'], e['start'], e['end']) for e in entities],
+                         [('INDIAN_AADHAR', 0, 14)])
+
+    def test_services_share_compiled_patterns(self):
+        with mock.patch('builtins.print'):
+            other = PIIDetectionService()
+        for entity_type, pattern_info in self.service.custom_patterns.items():
+            with self.subTest(entity_type=entity_type):
+                self.assertIs(other.custom_patterns[entity_type]['compiled'], pattern_info['compiled'])
@@ -0,0 +1,38 @@
+import os
+import unittest
+
+from tests.support import has_modules, load_with_stand_ins
+
+
+def load_table_extraction():
+    """table_extraction without PyMuPDF and pandas (validation works on records)"""
+    return load_with_stand_ins('table_extraction', os.path.join('app', 'services', 'table_extraction.py'), {
+        'fitz': {},
+        'pandas': {'DataFrame': object},
+    })
+
+
+@unittest.skipUnless(has_modules('cv2'), "OpenCV is not installed")
+class ValidateTableStructureTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = load_table_extraction().TableExtractionService()
+
+    def validate(self, data):
+        return self.service.validate_table_structure({'data': data})
+
+    def test_rows_with_the_same_keys_and_content_pass(self):
+        self.assertTrue(self.validate([{'a': 'Name', 'b': 'Age'}, {'a': 'Ramesh', 'b': '42'}]))
+
+    def test_ragged_rows_fail(self):
+        self.assertFalse(self.validate([{'a': 'Name', 'b': 'Age'}, {'a': 'Ramesh'}]))
+        self.assertFalse(self.validate([{'a': 'Name'}, {'a': 'Ramesh', 'b': '42'}]))
+
+    def test_fewer_than_two_rows_fail(self):
+        self.assertFalse(self.validate([]))
+        self.assertFalse(self.validate([{'a': 'Name', 'b': 'Age'}]))
+
+    def test_zero_and_blank_cells_are_empty_and_nan_is_content(self):
+        nan = float('nan')
+        self.assertFalse(self.validate([{'a': 0, 'b': 'x'}, {'a': ' ', 'b': None}]))
+        self.assertTrue(self.validate([{'a': nan, 'b': 'x'}, {'a': nan, 'b': ''}]))
@@ -0,0 +1,51 @@
+import os
+import unittest
+from unittest import mock
+
+from tests.support import load_with_stand_ins
+
+
+def load_text_normalization():
+    """text_normalization without PyTorch (only used for IndicTrans2 inference)"""
+    return load_with_stand_ins('text_normalization', os.path.join('app', 'services', 'text_normalization.py'), {
+        'torch': {},
+    })
+
+
+class FailingTokenizer:
+    def __call__(self, *args, **kwargs):
+        raise RuntimeError("model server unavailable")
+
+
+class NormalizeCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module = load_text_normalization()
+
+    def setUp(self):
+        with mock.patch('builtins.print'):
+            self.service = self.module.TextNormalizationService()
+
+    def test_successful_result_is_cached(self):
+        self.assertEqual(self.service.normalize_text("नमस्ते")['confidence'], 0.8)
+        with mock.patch.object(self.service, '_clean_text') as clean_text:
+            self.assertEqual(self.service.normalize_text("नमस्ते")['confidence'], 0.8)
+        clean_text.assert_not_called()
+
+    def test_normalization_failure_is_not_cached(self):
+        with mock.patch.object(self.service, '_normalize_hindi', side_effect=RuntimeError("boom")), \
+                mock.patch('builtins.print'):
+            result = self.service.normalize_text("नमस्ते")
+        self.assertEqual(result['confidence'], 0.2)
+
+        self.assertEqual(self.service.normalize_text("नमस्ते")['confidence'], 0.8)
+
+    def test_translation_failure_is_not_cached(self):
+        self.service.indictrans2_loaded = True
+        self.service.indic_en_tokenizer = FailingTokenizer()
+        with mock.patch('builtins.print'):
+            results = self.service.batch_normalize(["नमस्ते", "hello"])
+        self.assertEqual(results[0]['confidence'], 0.3)
+
+        self.service.indictrans2_loaded = False
+        self.assertEqual(self.service.normalize_text("नमस्ते")['confidence'], 0.8)
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from tests.support import has_modules, load_v1_orchestrator
+
+
+class FakeNormalizer:
+    def normalize_text(self, text):
+        return {'normalized_text': text, 'confidence': 0.9}
+
+
+class FakePIIDetector:
+    def __init__(self):
+        self.texts = []
+
+    def detect_pii(self, text):
+        self.texts.append(text)
+        return {'entities': [], 'has_pii': False, 'total_confidence': 0.0, 'entity_count': 0}
+
+
+class FakeTrustScorer:
+    def calculate_trust_score(self, confidences):
+        return 0.5
+
+
+class FakeTableExtractor:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def extract_tables_from_image(self, image):
+        return self.tables
+
+
+@unittest.skipUnless(has_modules('cv2'), "OpenCV is not installed")
+class BuildRegionFieldTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.orchestrator = load_v1_orchestrator()
+
+    def build(self, text, label='text', pii_detector=None, tables=None):
+        region = {'bbox': [0, 0, 40, 20], 'label': label, 'confidence': 0.9}
+        return self.orchestrator.build_region_field(
+            FakeNormalizer(), pii_detector or FakePIIDetector(), FakeTrustScorer(),
+            FakeTableExtractor(tables or []), region, 'r1', 1,
+            np.zeros((20, 40, 3), dtype=np.uint8), 'english', text, 0.8
+        )
+
+    def test_text_that_may_hold_pii_reaches_the_detector(self):
+        texts = [
+            "PATIENT NAME: RAMESH KUMAR",
+            "visit www.example.org",
+            "server 10.0.0.1",
+            "name: ramesh kumar",
+            "ramesh.kumar\n@example.com",
+            "1234 5678 9012",
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                detector = FakePIIDetector()
+                self.build(text, pii_detector=detector)
+                self.assertEqual(detector.texts, [text])
+
+    def test_text_too_short_or_without_letters_skips_the_detector(self):
+        for text in ["7", " a ", "--", "* * *", "...."]:
+            with self.subTest(text=text):
+                detector = FakePIIDetector()
+                field = self.build(text, pii_detector=detector)
+                self.assertEqual(detector.texts, [])
+                self.assertEqual(field.pii, [])
+
+    def test_table_region_text_comes_from_the_table_cells(self):
+        tables = [{'data': [{0: 'Name', 1: 'Age'}, {0: 'Ramesh', 1: '42'}], 'confidence': 0.9}]
+        field = self.build("ocr text", label='table', tables=tables)
+        self.assertEqual(field.normalized_text, "Name | Age\nRamesh | 42")
+        self.assertEqual(field.trans_conf, 0.8)
+
+    def test_table_region_without_cells_keeps_the_ocr_text(self):
+        field = self.build("ocr text", label='table', tables=[])
+        self.assertEqual(field.normalized_text, "ocr text")
+
+
+@unittest.skipUnless(has_modules('cv2'), "OpenCV is not installed")
+class FormatTableAsTextTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.orchestrator = load_v1_orchestrator()
+
+    def test_rows_as_records_and_as_lists(self):
+        table_data = {'tables': [
+            {'data': [{'a': 1, 'b': 'x'}]},
+            {'data': [[2, 'y']]},
+        ]}
+        self.assertEqual(self.orchestrator.format_table_as_text(table_data), "1 | x\n\n2 | y")
+
+
+class FailingLayout:
+    def detect_regions(self, image):
+        raise RuntimeError("layout model failed")
+
+
+@unittest.skipUnless(has_modules('cv2'), "OpenCV is not installed")
+class ProcessJobFailureTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.orchestrator = load_v1_orchestrator()
+
+    def test_failed_job_stops_the_page_reader_and_closes_ingestion(self):
+        import cv2
+
+        with tempfile.TemporaryDirectory() as job_dir:
+            page_path = os.path.join(job_dir, "page.png")
+            cv2.imwrite(page_path, np.random.default_rng(0).integers(0, 256, (64, 64), dtype=np.uint8))
+            closed = threading.Event()
+
+            def pages():
+                try:
+                    while True:
+                        yield page_path
+                finally:
+                    closed.set()
+
+            services = {'layout': FailingLayout(), 'region_pool': None}
+            with mock.patch.object(self.orchestrator, 'get_services', return_value=services), \
+                    mock.patch.object(self.orchestrator, 'ingest_document_iter',
+                                      return_value=(job_dir, 100, pages())), \
+                    mock.patch.object(self.orchestrator, 'SAVE_REGION_IMAGES', False), \
+                    mock.patch('builtins.print'):
+                readers = threading.active_count()
+                with self.assertRaisesRegex(RuntimeError, "layout model failed"):
+                    self.orchestrator.process_job('job', job_dir)
+
+            self.assertTrue(closed.is_set())
+            self.assertEqual(threading.active_count(), readers)
@@ -5,13 +5,11 @@ RQ Worker entry point
 
 import sys
 import os
-from rq import Worker
 
 # Add the app directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
 
-from app.services.job_queue import redis_conn
+from app.services.worker import run_worker
 
 if __name__ == '__main__':
-    worker = Worker(['yantra-ai-queue'], connection=redis_conn)
-    worker.work()
+    run_worker()